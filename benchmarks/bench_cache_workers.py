@@ -0,0 +1,116 @@
+"""
+Benchmark of cache hit rates as API worker processes are added.
+
+A Zipf-distributed stream of queries is split round-robin across N worker processes, the way
+uvicorn's workers share incoming connections. Every worker runs a `ResultSetCache` and looks
+results up with `get_or_fetch`; a miss "runs" the query by sleeping `--db-latency` seconds
+and returning a synthetic result set. Two setups are compared for each worker count:
+
+- local: per-process caches only (`CACHE_BACKEND=local`), so every worker warms its own copy
+  and the aggregate hit rate drops as workers are added;
+- sqlite: the caches share a `SqliteCacheBackend` file, so a result fetched by one worker is
+  a hit in all of them, and concurrent misses for one query run it once.
+
+For each run the benchmark reports the aggregate hit rate, how many of the hits came from the
+shared tier, the number of database fetches and the request throughput.
+
+Run from the repository root:
+    python -m benchmarks.bench_cache_workers [--workers 1 2 4] [--requests 4000] [--queries 400]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from src.utils.cache_backend import SqliteCacheBackend
+from src.utils.result_cache import ResultSetCache
+from src.utils.result_set import ResultSet
+
+
+def zipf_stream(requests: int, queries: int, exponent: float, seed: int) -> list[int]:
+    weights = [1 / (rank ** exponent) for rank in range(1, queries + 1)]
+    return random.Random(seed).choices(range(queries), weights=weights, k=requests)
+
+
+def synthetic_result(query: int, rows: int) -> ResultSet:
+    return ResultSet(["ID", "DVC_NAME", "UTIL"], [(f"{query}-{index}", f"device-{index % 17}", index * 0.25) for index in range(rows)])
+
+
+async def serve(stream: list[int], args: argparse.Namespace, cache_path: str | None) -> dict:
+    backend = SqliteCacheBackend(cache_path) if cache_path else None
+    cache = ResultSetCache(max_bytes=256 * 1024 * 1024, ttl_seconds=300, max_rows=10_000, backend=backend)
+    fetches = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request(query: int) -> None:
+        nonlocal fetches
+
+        async def fetch() -> ResultSet:
+            nonlocal fetches
+            fetches += 1
+            await asyncio.sleep(args.db_latency)
+            return synthetic_result(query, args.rows)
+
+        async with semaphore:
+            await cache.get_or_fetch(f"SELECT ID, DVC_NAME, UTIL FROM REPORT_{query}", fetch)
+
+    await asyncio.gather(*(request(query) for query in stream))
+    stats = cache.stats()
+    return {"hits": stats["hits"], "misses": stats["misses"], "shared_hits": stats["shared_hits"], "fetches": fetches}
+
+
+def worker(stream: list[int], args: argparse.Namespace, cache_path: str | None, start_at: float, results) -> None:
+    # Workers start together so the shared setup also sees concurrent misses.
+    time.sleep(max(0.0, start_at - time.time()))
+    results.put(asyncio.run(serve(stream, args, cache_path)))
+
+
+def run_setup(stream: list[int], workers: int, args: argparse.Namespace, shared: bool) -> dict:
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="bench-cache-"), "cache.sqlite") if shared else None
+    if cache_path:
+        SqliteCacheBackend(cache_path).close()
+    results = multiprocessing.Queue()
+    start_at = time.time() + 0.5
+    processes = [
+        multiprocessing.Process(target=worker, args=(stream[index::workers], args, cache_path, start_at, results))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {"hits": 0, "misses": 0, "shared_hits": 0, "fetches": 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in processes:
+        process.join()
+    totals["seconds"] = time.time() - start_at
+    totals["hit_rate"] = totals["hits"] / len(stream)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare (default 1 2 4)")
+    parser.add_argument("--requests", type=int, default=4000, help="requests in the stream (default 4000)")
+    parser.add_argument("--queries", type=int, default=400, help="distinct queries (default 400)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of query popularity (default 1.1)")
+    parser.add_argument("--rows", type=int, default=200, help="rows per result (default 200)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds per database fetch (default 0.02)")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per worker (default 16)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    stream = zipf_stream(args.requests, args.queries, args.zipf, args.seed)
+    print(f"requests={args.requests}  distinct={len(set(stream))}  zipf={args.zipf}  rows={args.rows}  db_latency={args.db_latency}s")
+    print(f"{'setup':8} {'workers':>7} {'hit_rate':>8} {'shared':>7} {'fetches':>7} {'req/s':>8}")
+    for workers in args.workers:
+        for name, shared in (("local", False), ("sqlite", True)):
+            result = run_setup(stream, workers, args, shared)
+            print(f"{name:8} {workers:7} {result['hit_rate']:8.3f} {result['shared_hits']:7} {result['fetches']:7} "
+                  f"{args.requests / result['seconds']:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the forbidden-keyword guard.
+
+Compares the single trie-derived pattern in `src.utils.keywords` against the previous
+approach of running one compiled regex per keyword, on short and long inputs, and checks
+that both agree on every input.
+
+Run from the repository root:
+    python -m benchmarks.bench_keywords
+"""
+import re
+import timeit
+from src.utils.keywords import forbidden_keywords, Contains_Forbidden_Keywords
+
+legacy_patterns = [re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE) for keyword in forbidden_keywords]
+
+def legacy_contains(query: str) -> bool:
+    query = query.strip()
+    for pattern in legacy_patterns:
+        if pattern.search(query):
+            return True
+    return False
+
+SHORT_CLEAN = "how many DOM are available in CARD_SLOT_HIERARCHY_REPRT"
+SHORT_FORBIDDEN = "please drop table LEAF_AND_SPINE_C93180YC_REPRT"
+LONG_CLEAN = " ".join(["show the host name, device ip and free 100g ports for every leaf in region west"] * 40)
+LONG_FORBIDDEN = LONG_CLEAN + " and then truncate table CARD_SLOT_HIERARCHY_REPRT"
+
+CASES = {
+    "short_clean": SHORT_CLEAN,
+    "short_forbidden": SHORT_FORBIDDEN,
+    "long_clean": LONG_CLEAN,
+    "long_forbidden": LONG_FORBIDDEN,
+}
+
+def main(number: int = 200) -> None:
+    for name, query in CASES.items():
+        assert legacy_contains(query) == Contains_Forbidden_Keywords(query), name
+        legacy = timeit.timeit(lambda: legacy_contains(query), number=number) / number
+        combined = timeit.timeit(lambda: Contains_Forbidden_Keywords(query), number=number) / number
+        print(f"{name:16} len={len(query):5}  per-keyword={legacy * 1e6:9.1f}us  "
+              f"combined={combined * 1e6:8.1f}us  speedup={legacy / combined:6.1f}x")
+
+if __name__ == "__main__":
+    main()
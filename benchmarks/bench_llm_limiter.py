@@ -0,0 +1,108 @@
+"""
+Benchmark of the LLM call limiter against a quota-enforcing model stand-in.
+
+A burst of batch translations is queued at once while interactive questions keep arriving.
+They go through `SqlGenerator.generate` against a `FakeChatModel` that rejects calls above
+`--quota` per second with `ResourceExhausted`. Four limiter setups are compared:
+
+- none: no pacing and no retries, so every rejected call fails the translation (the previous
+  behaviour);
+- retry: no pacing, but quota errors are retried with jittered back-off;
+- paced: the limiter paced at the quota, with retries;
+- paced+20%: paced 20% above the quota, which the limiter has to adapt down from.
+
+For each setup the run reports translations that succeeded or failed, model calls made and
+rejected by the quota, and interactive and batch latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_llm_limiter [--quota 5] [--interactive 40] [--batch 40]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from fastapi import HTTPException
+from google.api_core.exceptions import ResourceExhausted
+from benchmarks.fakes import WORKLOAD, FakeChatModel
+from src.scripts.nl2sql_converter import SqlGenerator
+from src.utils.rate_limiter import LlmCallLimiter, Priority
+
+UNLIMITED = 1e9
+
+
+def limiter_setups(quota: float) -> dict[str, dict]:
+    burst = max(1, int(quota))
+    return {
+        "none": dict(rate=UNLIMITED, burst=10**6, max_concurrency=10**6, max_attempts=1),
+        "retry": dict(rate=UNLIMITED, burst=10**6, max_concurrency=10**6, max_attempts=4),
+        "paced": dict(rate=quota, burst=burst, max_concurrency=8, max_attempts=4),
+        "paced+20%": dict(rate=quota * 1.2, burst=burst, max_concurrency=8, max_attempts=4),
+    }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_setup(args: argparse.Namespace, setup: dict) -> dict:
+    llm = FakeChatModel(WORKLOAD, latency_seconds=args.llm_latency, jitter_seconds=0.05, quota_per_second=args.quota, quota_burst=max(1, int(args.quota)))
+    limiter = LlmCallLimiter(**setup, retry_base_seconds=0.5, retry_max_seconds=4.0, retry_on=(ResourceExhausted,), seed=args.seed)
+    generator = SqlGenerator(llm=llm, limiter=limiter)
+    questions = list(WORKLOAD)
+    rng = random.Random(args.seed)
+    latencies = {Priority.INTERACTIVE: [], Priority.BATCH: []}
+    outcomes = {"ok": 0, "failed": 0}
+
+    async def translate(question: str, priority: Priority, delay: float) -> None:
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        try:
+            sql = await generator.generate(question, "", priority)
+        except HTTPException:
+            sql = None
+        outcomes["ok" if sql else "failed"] += 1
+        if sql:
+            latencies[priority].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(translate(rng.choice(questions), Priority.BATCH, 0.0) for _ in range(args.batch)),
+        *(translate(rng.choice(questions), Priority.INTERACTIVE, index * args.interactive_interval) for index in range(args.interactive)),
+    )
+    return {
+        **outcomes,
+        "calls": llm.calls,
+        "rejected": llm.rejected,
+        "seconds": time.perf_counter() - started,
+        "interactive_p50": statistics.median(latencies[Priority.INTERACTIVE]) if latencies[Priority.INTERACTIVE] else 0.0,
+        "interactive_p95": percentile(latencies[Priority.INTERACTIVE], 0.95),
+        "batch_p95": percentile(latencies[Priority.BATCH], 0.95),
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"quota={args.quota}/s  interactive={args.interactive} every {args.interactive_interval}s  batch={args.batch} at t=0")
+    print(f"{'setup':10} {'ok':>4} {'failed':>6} {'calls':>6} {'rejected':>8} {'seconds':>8} {'int_p50':>8} {'int_p95':>8} {'batch_p95':>9}")
+    for name, setup in limiter_setups(args.quota).items():
+        result = await run_setup(args, setup)
+        print(f"{name:10} {result['ok']:4} {result['failed']:6} {result['calls']:6} {result['rejected']:8} {result['seconds']:8.2f} "
+              f"{result['interactive_p50']:8.2f} {result['interactive_p95']:8.2f} {result['batch_p95']:9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota", type=float, default=5.0, help="calls per second the fake model accepts (default 5)")
+    parser.add_argument("--interactive", type=int, default=40, help="interactive questions (default 40)")
+    parser.add_argument("--interactive-interval", type=float, default=0.1, help="seconds between interactive questions (default 0.1)")
+    parser.add_argument("--batch", type=int, default=40, help="batch questions queued at start (default 40)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM latency in seconds (default 0.3)")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark of schema-pruned prompts.
+
+For each question of the benchmark set, renders the prompt with the full schema and with
+the block chosen by the schema linker, and reports:
+
+- prompt size in estimated tokens (characters / 4) and the reduction, for the whole prompt
+  and for the schema block alone;
+- table recall: the share of tables the reference SQL reads that the linker kept;
+- column recall: the share of columns the reference SQL references that the linker kept;
+- linking time.
+
+Recall is the offline proxy for accuracy: a column missing from the prompt is a column the
+model cannot use. With `--live` the questions are also sent to the configured Gemini model
+with both prompts. The run then reports the real prompt tokens and how often each prompt
+produced SQL equivalent to the reference, compared after sqlglot normalization.
+
+Run from the repository root:
+    python -m benchmarks.bench_schema_linking [--live] [--min-relative-score 0.5]
+"""
+import argparse
+import asyncio
+import time
+from sqlglot import exp
+from benchmarks.fakes import WORKLOAD, FakeChatModel
+from src.scripts.nl2sql_converter import SqlGenerator
+from src.scripts.schema_catalog import get_schema_catalog
+from src.scripts.schema_linker import SchemaLinker
+from src.scripts.sql_analyzer import analyze_sql
+
+CASES = {
+    **WORKLOAD,
+    "show the serial number and firmware revision of every card in the north region":
+        "SELECT SERIAL_NUM, FIRMWARE_REV FROM CARD_SLOT_HIERARCHY_REPRT WHERE REGION = 'NORTH'",
+    "which manufacturers supply cards with an sfp":
+        "SELECT DISTINCT MANUFACTURER FROM CARD_SLOT_HIERARCHY_REPRT WHERE ISSFP = 'YES'",
+    "total and used 10g ports per host":
+        "SELECT HOST_NAME, TOTA_L10G_PRTS, USE_D10G_PRTS FROM LEAF_AND_SPINE_C93180YC_REPRT",
+    "breakout 10g ports on 100g utilization switches":
+        "SELECT HOST_NAME, BREAKOU_T10G_PRTS FROM LEAF_SPIN_E100G_UTIL_REPRT",
+    "device role and software revision for host-0042":
+        "SELECT DVC_ROLE, SW_REV FROM CARD_SLOT_HIERARCHY_REPRT WHERE HOST_NAME = 'host-0042'",
+    "how many 1g ports are free at each location":
+        "SELECT LOC_CODE, SUM(FRE_E1G_PRTS) FROM LEAF_AND_SPINE_C93180YC_REPRT GROUP BY LOC_CODE",
+}
+"""Questions with the reference SQL a correct translation is equivalent to."""
+
+
+def required_schema(sql: str, catalog) -> tuple[set[str], set[tuple[str, str]]]:
+    """Tables read by `sql` and the (table, column) pairs it names; `*` needs no column to be in the prompt."""
+    analysis = analyze_sql(sql, "mysql")
+    tables = set(analysis.tables)
+    aliases = {alias.alias.upper() for alias in analysis.expression.find_all(exp.Alias)}
+    columns = set()
+    for column in analysis.expression.find_all(exp.Column):
+        name = column.name.upper()
+        if name in aliases:
+            continue
+        owners = [table for table in tables if any(c.name == name for c in catalog.snapshot.tables[table].columns)]
+        columns.update((table, name) for table in owners[:1] if owners)
+    return tables, columns
+
+
+def normalized(sql: str | None) -> str | None:
+    if not sql:
+        return None
+    analysis = analyze_sql(sql, "mysql")
+    return analysis.expression.sql(dialect="mysql", normalize=True) if analysis.is_select else None
+
+
+class _UsageRecorder:
+    """Wraps a chat model and remembers the prompt tokens of its last response."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.input_tokens = None
+
+    async def ainvoke(self, prompt: str):
+        response = await self.llm.ainvoke(prompt)
+        self.input_tokens = (getattr(response, "usage_metadata", None) or {}).get("input_tokens")
+        return response
+
+
+async def live_run(generator: SqlGenerator, question: str, schema_context: str | None) -> tuple[str | None, int | None]:
+    try:
+        sql = await generator.generate(question, schema_context)
+    except Exception:
+        sql = None
+    return sql, generator.llm.input_tokens
+
+
+async def run(args: argparse.Namespace) -> None:
+    catalog = get_schema_catalog()
+    linker = SchemaLinker(catalog, min_relative_score=args.min_relative_score)
+    if args.live:
+        generator = SqlGenerator()
+        generator.llm = _UsageRecorder(generator.llm)
+    else:
+        generator = SqlGenerator(llm=FakeChatModel(CASES, latency_seconds=0, jitter_seconds=0))
+
+    full_schema = "\n".join(catalog.prompt_lines())
+    totals = {"full": 0, "linked": 0, "schema": 0, "linked_schema": 0, "tables": 0, "tables_kept": 0, "columns": 0, "columns_kept": 0}
+    live = {"full": 0, "linked": 0, "full_tokens": 0, "linked_tokens": 0}
+    print(f"{'question':60} {'full':>6} {'linked':>6} {'saved':>6} {'tables':>7} {'columns':>8} {'link_us':>8}")
+    for question, reference_sql in CASES.items():
+        started = time.perf_counter()
+        linked = linker.link(question)
+        link_us = (time.perf_counter() - started) * 1e6
+        schema_context = linked.render()
+
+        full_chars = len(generator.render_prompt(question))
+        linked_chars = len(generator.render_prompt(question, schema_context))
+        tables, columns = required_schema(reference_sql, catalog)
+        kept_tables = {table.name for table in linked.tables}
+        kept_columns = {(table.name, column.name) for table in linked.tables for column in table.columns}
+        tables_kept = len(tables & kept_tables)
+        columns_kept = len(columns & kept_columns)
+
+        totals["full"] += full_chars
+        totals["linked"] += linked_chars
+        totals["schema"] += len(full_schema)
+        totals["linked_schema"] += len(schema_context)
+        totals["tables"] += len(tables)
+        totals["tables_kept"] += tables_kept
+        totals["columns"] += len(columns)
+        totals["columns_kept"] += columns_kept
+        print(f"{question[:60]:60} {full_chars // 4:6} {linked_chars // 4:6} {1 - linked_chars / full_chars:6.0%} "
+              f"{tables_kept:>3}/{len(tables):<3} {columns_kept:>3}/{len(columns):<4} {link_us:8.1f}")
+
+        if args.live:
+            expected = normalized(reference_sql)
+            full_sql, full_tokens = await live_run(generator, question, None)
+            linked_sql, linked_tokens = await live_run(generator, question, schema_context)
+            live["full"] += normalized(full_sql) == expected
+            live["linked"] += normalized(linked_sql) == expected
+            live["full_tokens"] += full_tokens or 0
+            live["linked_tokens"] += linked_tokens or 0
+
+    print(f"\nprompt tokens (estimated): full={totals['full'] // 4} linked={totals['linked'] // 4} "
+          f"reduction={1 - totals['linked'] / totals['full']:.1%}")
+    print(f"schema block tokens (estimated): full={totals['schema'] // 4} linked={totals['linked_schema'] // 4} "
+          f"reduction={1 - totals['linked_schema'] / totals['schema']:.1%}")
+    print(f"table recall={totals['tables_kept'] / totals['tables']:.1%}  "
+          f"column recall={totals['columns_kept'] / totals['columns']:.1%}")
+    if args.live:
+        print(f"live prompt tokens: full={live['full_tokens']} linked={live['linked_tokens']}")
+        print(f"reference matches: full={live['full']}/{len(CASES)} linked={live['linked']}/{len(CASES)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-relative-score", type=float, default=0.5)
+    parser.add_argument("--live", action="store_true", help="Also translate every question with the configured Gemini model.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the response serialization.
+
+Encodes pages of a wide report result (the 17 card-slot columns plus a DECIMAL, a DATETIME
+and a binary column, as the MySQL driver returns them) three ways, and checks that the
+legacy and typed records decode to the same JSON:
+
+- legacy: `jsonable_encoder` over row dicts, then the stdlib `json` FastAPI renders with;
+- records: `src.utils.serialization.to_records` encoded with orjson;
+- compact: `to_compact`, the column names once and the rows as arrays.
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+"""
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from src.scripts.schema_catalog import get_schema_catalog
+from src.utils.result_set import ResultSet
+from src.utils.serialization import dumps, to_compact, to_records
+
+
+def wide_result(rows: int, seed: int = 7) -> ResultSet:
+    rng = random.Random(seed)
+    text_columns = [column.name for column in get_schema_catalog().snapshot.tables["CARD_SLOT_HIERARCHY_REPRT"].columns]
+    started = datetime(2024, 1, 1)
+    return ResultSet(
+        text_columns + ["UTILIZATION", "LAST_SEEN", "CHECKSUM"],
+        [
+            tuple(f"{column.lower()}-{index % 97}" for column in text_columns)
+            + (
+                Decimal(rng.randint(0, 10000)) / 100,
+                started + timedelta(minutes=index),
+                rng.randbytes(8).hex().encode("ascii"),
+            )
+            for index in range(rows)
+        ],
+    )
+
+
+def legacy(result_set: ResultSet) -> bytes:
+    content = jsonable_encoder(result_set.to_records())
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main(number: int = 20) -> None:
+    for rows in (10, 1000, 10000):
+        result_set = wide_result(rows)
+        assert json.loads(legacy(result_set)) == json.loads(dumps(to_records(result_set)))
+        timings = {
+            "legacy": timeit.timeit(lambda: legacy(result_set), number=number) / number,
+            "records": timeit.timeit(lambda: dumps(to_records(result_set)), number=number) / number,
+            "compact": timeit.timeit(lambda: dumps(to_compact(result_set)), number=number) / number,
+        }
+        sizes = {"records": len(dumps(to_records(result_set))), "compact": len(dumps(to_compact(result_set)))}
+        print(f"rows={rows:6}  legacy={timings['legacy'] * 1e3:8.2f}ms  "
+              f"records={timings['records'] * 1e3:7.2f}ms ({timings['legacy'] / timings['records']:4.1f}x)  "
+              f"compact={timings['compact'] * 1e3:7.2f}ms ({timings['legacy'] / timings['compact']:4.1f}x)  "
+              f"bytes records={sizes['records']} compact={sizes['compact']}")
+
+
+if __name__ == "__main__":
+    main()
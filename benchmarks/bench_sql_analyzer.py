@@ -0,0 +1,41 @@
+"""
+Micro-benchmark of the SQL analysis stage.
+
+Measures, for representative generated queries in both dialects, the cost of a cold parse
+and classification, of a repeated lookup served by the memoized `analyze_sql`, and of
+rendering a paginated rewrite from the parsed tree.
+
+Run from the repository root:
+    python -m benchmarks.bench_sql_analyzer
+"""
+import timeit
+from src.scripts.sql_analyzer import analyze_sql
+
+CASES = {
+    "simple": "SELECT * FROM CARD_SLOT_HIERARCHY_REPRT WHERE DOM = 'DOM-1'",
+    "columns": "SELECT HOST_NAME, DEVICE_IP, TOTA_L100G_PRTS FROM LEAF_AND_SPINE_C93180YC_REPRT WHERE REGION LIKE '%WEST%'",
+    "aggregate": "SELECT HOST_NAME, COUNT(*) FROM CARD_SLOT_HIERARCHY_REPRT GROUP BY HOST_NAME",
+    "union": (
+        "SELECT HOST_NAME, 'CARD_SLOT_HIERARCHY_REPRT' AS source_table FROM CARD_SLOT_HIERARCHY_REPRT "
+        "UNION ALL SELECT HOST_NAME, 'LEAF_AND_SPINE_C93180YC_REPRT' AS source_table FROM LEAF_AND_SPINE_C93180YC_REPRT"
+    ),
+    "join": (
+        "SELECT c.HOST_NAME, c.DOM, l.DEVICE_IP FROM CARD_SLOT_HIERARCHY_REPRT c "
+        "JOIN LEAF_AND_SPINE_C93180YC_REPRT l ON c.HOST_NAME = l.HOST_NAME WHERE l.TOTA_L100G_PRTS > 4 ORDER BY c.HOST_NAME"
+    ),
+}
+
+def main(number: int = 200) -> None:
+    parse = analyze_sql.__wrapped__
+    for dialect in ("mysql", "oracle"):
+        for name, sql in CASES.items():
+            analysis = analyze_sql(sql, dialect)
+            assert analysis.is_select, name
+            cold = timeit.timeit(lambda: parse(sql, dialect), number=number) / number
+            cached = timeit.timeit(lambda: analyze_sql(sql, dialect), number=number) / number
+            rewrite = timeit.timeit(lambda: analysis.paginate(10, 20), number=number) / number
+            print(f"{dialect:6} {name:10} len={len(sql):4}  parse={cold * 1e6:8.1f}us  "
+                  f"cached={cached * 1e6:6.2f}us  paginate={rewrite * 1e6:8.1f}us")
+
+if __name__ == "__main__":
+    main()
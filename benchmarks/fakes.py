@@ -0,0 +1,350 @@
+"""
+Local stand-ins for the external services the API depends on, used by the load test.
+
+- `FakeChatModel` replaces Gemini: it answers with canned SQL after a configurable delay,
+  and can enforce a requests-per-second quota by raising `ResourceExhausted` like the API.
+- `HashingEmbeddings` replaces the sentence-transformers model with a deterministic
+  bag-of-words hashing embedding, so the semantic cache and the local vector index work
+  without downloading a model.
+- `SqliteReportDB` replaces MySQL: an in-memory SQLite database seeded with synthetic rows
+  for the three report tables, exposing the same executor API as `MysqlDB`.
+- `FakeRedis` replaces a Redis server for the "redis" cache backend: an in-process store
+  implementing the subset of the `redis.Redis` client that `RedisCacheBackend` uses.
+"""
+import asyncio
+import fnmatch
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from fastapi import HTTPException
+from google.api_core.exceptions import ResourceExhausted
+from src.utils.cache_backend import UNLOCK_SCRIPT
+from src.utils.connection_pool import PoolManager
+from src.utils.metrics import stage_timer
+from src.utils.result_set import ResultSet
+
+REPORT_TABLES = {
+    "LEAF_AND_SPINE_C93180YC_REPRT": [
+        "ID", "HOST_NAME", "DVCIP", "LOC_CODE", "RTR_MODEL", "DVC_TYPE", "TOTA_L100G_PRTS", "USE_D100G_PRTS",
+        "FRE_E100G_PRTS", "TOTA_L10G_PRTS", "USE_D10G_PRTS", "FRE_E10G_PRTS", "TOTA_L1G_PRTS", "USE_D1G_PRTS",
+        "FRE_E1G_PRTS",
+    ],
+    "CARD_SLOT_HIERARCHY_REPRT": [
+        "ID", "MODEL", "SERIAL_NUM", "FIRMWARE_REV", "MANUFACTURER", "DESC", "CITY", "STATE", "SW_REV",
+        "HARDWARE_REV", "REGION", "HOST_NAME", "DVC_ROLE", "SLOT_HIERARCHY_DETS", "ISSFP", "DOM", "MODEL_NAME",
+        "DVCID",
+    ],
+    "LEAF_SPIN_E100G_UTIL_REPRT": [
+        "ID", "HOST_NAME", "DVCIP", "LOC_CODE", "RTR_MODEL", "DVC_TYPE", "TOTA_L100G_PRTS", "USE_D100G_PRTS",
+        "FRE_E100G_PRTS", "FRE_E100G_PERCENT", "BREAKOU_T10G_PRTS", "TOTA_L10G_PRTS", "USE_D10G_PRTS",
+        "FRE_E10G_PRTS", "FRE_E10G_PERCENT", "TOTA_L100G_CARD_PRTS",
+    ],
+}
+
+WORKLOAD = {
+    "show all line cards": "SELECT * FROM CARD_SLOT_HIERARCHY_REPRT",
+    "list host names and device ips of leaf and spine switches at location LOC-3":
+        "SELECT ID, HOST_NAME, DVCIP FROM LEAF_AND_SPINE_C93180YC_REPRT WHERE LOC_CODE = 'LOC-3'",
+    "how many cards are there in each region":
+        "SELECT REGION, COUNT(*) AS CARD_COUNT FROM CARD_SLOT_HIERARCHY_REPRT GROUP BY REGION",
+    "which hosts have free 100g ports in either port report": (
+        "SELECT HOST_NAME, FRE_E100G_PRTS, 'LEAF_AND_SPINE_C93180YC_REPRT' AS source_table FROM LEAF_AND_SPINE_C93180YC_REPRT "
+        "WHERE FRE_E100G_PRTS > '0' UNION ALL SELECT HOST_NAME, FRE_E100G_PRTS, 'LEAF_SPIN_E100G_UTIL_REPRT' AS source_table "
+        "FROM LEAF_SPIN_E100G_UTIL_REPRT WHERE FRE_E100G_PRTS > '0'"
+    ),
+    "show 100g utilization for switches with more than 50 percent free":
+        "SELECT * FROM LEAF_SPIN_E100G_UTIL_REPRT WHERE FRE_E100G_PERCENT > '50'",
+    "list cards that support digital optical monitoring":
+        "SELECT ID, HOST_NAME, MODEL, DOM FROM CARD_SLOT_HIERARCHY_REPRT WHERE DOM = 'YES'",
+    "show card models together with the device ip of their leaf switch": (
+        "SELECT c.HOST_NAME, c.MODEL, l.DVCIP FROM CARD_SLOT_HIERARCHY_REPRT c "
+        "JOIN LEAF_AND_SPINE_C93180YC_REPRT l ON c.HOST_NAME = l.HOST_NAME WHERE c.REGION = 'WEST'"
+    ),
+    "count leaf and spine switches by router model":
+        "SELECT RTR_MODEL, COUNT(*) AS SWITCHES FROM LEAF_AND_SPINE_C93180YC_REPRT GROUP BY RTR_MODEL",
+}
+"""Natural language questions the load test sends, with the SQL the fake model answers."""
+
+
+class _Message:
+    __slots__ = ("content", "usage_metadata")
+
+    def __init__(self, content: str, usage_metadata: dict):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class FakeChatModel:
+    """
+    Chat model stand-in: sleeps `latency_seconds` (± `jitter_seconds`), then returns the SQL canned for the question.
+
+    With `quota_per_second`, calls beyond that rate (bursts of up to `quota_burst`) are
+    rejected at once with `ResourceExhausted`, as the Gemini API does.
+    """
+
+    def __init__(
+        self,
+        canned_sql: dict[str, str],
+        latency_seconds: float = 0.3,
+        jitter_seconds: float = 0.1,
+        seed: int = 7,
+        quota_per_second: float | None = None,
+        quota_burst: int = 1,
+    ):
+        self.canned_sql = canned_sql
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self._random = random.Random(seed)
+        self.quota_per_second = quota_per_second
+        self.quota_burst = quota_burst
+        self._quota_tokens = float(quota_burst)
+        self._quota_updated = time.monotonic()
+        self.calls = 0
+        self.rejected = 0
+
+    def _within_quota(self) -> bool:
+        if self.quota_per_second is None:
+            return True
+        now = time.monotonic()
+        self._quota_tokens = min(self.quota_burst, self._quota_tokens + (now - self._quota_updated) * self.quota_per_second)
+        self._quota_updated = now
+        if self._quota_tokens < 1:
+            return False
+        self._quota_tokens -= 1
+        return True
+
+    async def ainvoke(self, prompt: str) -> _Message:
+        self.calls += 1
+        if not self._within_quota():
+            self.rejected += 1
+            await asyncio.sleep(0.02)
+            raise ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+        delay = max(0.0, self.latency_seconds + self._random.uniform(-self.jitter_seconds, self.jitter_seconds))
+        await asyncio.sleep(delay)
+        question = prompt.rsplit("Natural Language Query:", 1)[-1].lower()
+        sql = next((sql for key, sql in self.canned_sql.items() if key.lower() in question), '"ERROR"')
+        content = f"```sql\n{sql};\n```"
+        return _Message(content, {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4})
+
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words embedding with the `embed_query` / `embed_documents` interface of LangChain embeddings."""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def _synthetic_value(column: str, index: int, rng: random.Random) -> str:
+    if column == "ID":
+        return f"{index:08d}"
+    if column == "HOST_NAME":
+        return f"host-{index % 400:04d}"
+    if column == "DVCIP":
+        return f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+    if column == "LOC_CODE":
+        return f"LOC-{index % 12}"
+    if column == "REGION":
+        return ("NORTH", "SOUTH", "EAST", "WEST")[index % 4]
+    if column in ("DOM", "ISSFP"):
+        return "YES" if index % 3 == 0 else "NO"
+    if column in ("RTR_MODEL", "MODEL", "MODEL_NAME"):
+        return f"N9K-C93180YC-{('EX', 'FX', 'GX')[index % 3]}"
+    if column.endswith(("_PRTS", "_PERCENT")):
+        return str(rng.randint(0, 96))
+    return f"{column.lower()}-{rng.randint(0, 9999)}"
+
+
+class SqliteReportDB:
+    """
+    In-memory SQLite stand-in for `MysqlDB`, seeded with `rows_per_table` synthetic rows per report table.
+
+    Connections to one shared-cache database are handed out by the same `PoolManager` the
+    real executors use. `latency_seconds` adds a fixed delay per query to model network
+    round trips. SQL rendered for MySQL runs unchanged apart from `%s` placeholders.
+    """
+
+    dialect = "mysql"
+
+    def __init__(self, rows_per_table: int = 5000, pool_size: int = 8, latency_seconds: float = 0.0, seed: int = 7):
+        self.pool_size = pool_size
+        self.latency_seconds = latency_seconds
+        self.cost_guard = None
+        self._uri = f"file:bench_reports_{id(self)}?mode=memory&cache=shared"
+        self.pool = None
+        # Holding one connection open keeps the shared in-memory database alive.
+        self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        self._seed(rows_per_table, random.Random(seed))
+
+    def _seed(self, rows_per_table: int, rng: random.Random) -> None:
+        for table, columns in REPORT_TABLES.items():
+            column_sql = ", ".join(f'"{column}" TEXT' + (" PRIMARY KEY" if column == "ID" else "") for column in columns)
+            self._keeper.execute(f"CREATE TABLE {table} ({column_sql})")
+            rows = [[_synthetic_value(column, i, rng) for column in columns] for i in range(rows_per_table)]
+            placeholders = ", ".join("?" for _ in columns)
+            self._keeper.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        self._keeper.commit()
+
+    def initialize_pool(self):
+        self.pool = PoolManager(
+            "sqlite",
+            connect=lambda: sqlite3.connect(self._uri, uri=True, check_same_thread=False),
+            close=lambda connection: connection.close(),
+            min_size=self.pool_size,
+            max_size=self.pool_size,
+        )
+        self.pool.prewarm()
+
+    def pool_stats(self) -> dict | None:
+        return self.pool.stats() if self.pool else None
+
+    def close_pool(self):
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+
+    def Fetch_Rows(self, sql_query: str, params=None, handle=None, plan_key=None) -> ResultSet:
+        with stage_timer("pool_checkout"):
+            connection = self.pool.acquire()
+        if handle:
+            handle.attach(connection)
+        try:
+            with stage_timer("query_execution"):
+                if self.latency_seconds:
+                    time.sleep(self.latency_seconds)
+                cursor = connection.execute(sql_query.replace("%s", "?"), params or ())
+                columns = [col[0] for col in cursor.description]
+                rows = cursor.fetchall()
+            return ResultSet(columns, rows)
+        except sqlite3.Error:
+            raise HTTPException(status_code=400, detail="Error executing the MySQL query.")
+        finally:
+            if handle:
+                handle.detach()
+            self.pool.release(connection)
+
+    def Execute_Query(self, sql_query: str, params=None, handle=None, plan_key=None) -> list[dict]:
+        result_set = self.Fetch_Rows(sql_query, params, handle, plan_key)
+        if not result_set.rows:
+            raise HTTPException(status_code=404, detail="No data found for the given query.")
+        with stage_timer("row_materialization"):
+            return result_set.to_records()
+
+    def Stream_Query(self, sql_query: str, params=None, arraysize: int = 500, handle=None, plan_key=None):
+        connection = self.pool.acquire()
+        if handle:
+            handle.attach(connection)
+        try:
+            cursor = connection.execute(sql_query.replace("%s", "?"), params or ())
+            yield [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            if handle:
+                handle.detach()
+            self.pool.release(connection)
+
+    def Cancel_Query(self, connection):
+        connection.interrupt()
+
+
+class FakeRedis:
+    """Thread-safe in-memory stand-in for `redis.Redis` with millisecond expiry; values come back as bytes."""
+
+    def __init__(self):
+        self._values: dict[str, object] = {}
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return self._values.get(key)
+
+    @staticmethod
+    def _bytes(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value, px: int | None = None, nx: bool = False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._values[key] = self._bytes(value)
+            self._expires.pop(key, None)
+            if px is not None:
+                self._expires[key] = time.monotonic() + px / 1000
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                deleted += self._live(key) is not None
+                self._values.pop(key, None)
+                self._expires.pop(key, None)
+            return deleted
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._values[key] = self._bytes(value)
+            return value
+
+    def sadd(self, key: str, *members: str) -> int:
+        with self._lock:
+            current = self._live(key)
+            if current is None:
+                current = self._values[key] = set()
+            added = {self._bytes(member) for member in members} - current
+            current.update(added)
+            return len(added)
+
+    def smembers(self, key: str):
+        with self._lock:
+            return set(self._live(key) or ())
+
+    def pexpire(self, key: str, milliseconds: int) -> bool:
+        with self._lock:
+            if self._live(key) is None:
+                return False
+            self._expires[key] = time.monotonic() + milliseconds / 1000
+            return True
+
+    def eval(self, script: str, numkeys: int, *keys_and_args):
+        """Runs the scripts `RedisCacheBackend` sends; there is no Lua interpreter behind it."""
+        if script != UNLOCK_SCRIPT:
+            raise NotImplementedError("FakeRedis only runs the cache lease release script.")
+        key, token = keys_and_args
+        with self._lock:
+            if self._live(key) != self._bytes(token):
+                return 0
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+            return 1
+
+    def scan_iter(self, match: str = "*"):
+        with self._lock:
+            keys = [key for key in list(self._values) if self._live(key) is not None and fnmatch.fnmatchcase(key, match)]
+        yield from keys
@@ -0,0 +1,343 @@
+"""
+Load test of `/data-requests` against local stand-ins for Gemini, the vector index and MySQL.
+
+The application runs in-process behind an ASGI transport, with its startup and shutdown
+hooks, and the fakes from `benchmarks.fakes` are swapped in, so results depend only on the
+code under test and the configured latencies. The report covers:
+- overall throughput and latency percentiles,
+- p50/p95/p99 per pipeline stage (from every recorded stage duration) and per traced span,
+- process memory and connection pool statistics.
+
+Results are written as JSON under `benchmarks/results/`. Passing `--baseline` with an
+earlier result prints the change for each headline number.
+
+Run from the repository root:
+    python -m benchmarks.load_test --requests 500 --concurrency 16 --llm-latency 0.3
+    python -m benchmarks.load_test --rag --distinct --baseline benchmarks/results/<earlier>.json
+
+Settings can be overridden with repeated `--env NAME=VALUE`, e.g. `--env RESULT_CACHE_ENABLED=false`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCHEMA_TEXT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "embeddings", "schema_text")
+HASHING_MODEL = "benchmark-hashing-256"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests (default 500)")
+    parser.add_argument("--warmup", type=int, default=20, help="requests sent before measuring (default 20)")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once (default 16)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM latency in seconds (default 0.3)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="fake LLM latency jitter in seconds (default 0.1)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="added per-query database latency in seconds")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic rows per report table (default 5000)")
+    parser.add_argument("--pool-size", type=int, default=8, help="database pool and query thread count (default 8)")
+    parser.add_argument("--distinct", action="store_true", help="make every question unique so caches miss")
+    parser.add_argument("--keyset-ratio", type=float, default=0.2, help="share of requests using keyset pagination")
+    parser.add_argument("--rag", action="store_true", help="translate through the RAG prompt and local vector index")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations (slower)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="setting override")
+    parser.add_argument("--output", help="result file (default benchmarks/results/load_test-<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace, index_path: str) -> None:
+    # Settings are read at import time, so the environment has to be in place before `main` is imported.
+    defaults = {
+        "API_KEY": "benchmark",
+        "DB_USER": "benchmark",
+        "DB_PASS": "benchmark",
+        "DB_HOST": "localhost",
+        "DB_SERVICE_NAME": "benchmark",
+        "POOL_SIZE": str(args.pool_size),
+        "RETRIEVER_BACKEND": "local",
+        "LOCAL_INDEX_PATH": index_path,
+        "TRACING_EXPORTER": "memory",
+        "TRACING_MAX_SPANS": str(max(100000, (args.requests + args.warmup) * 20)),
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    for override in args.env:
+        name, _, value = override.partition("=")
+        os.environ[name] = value
+
+
+def install_fakes(args: argparse.Namespace, index_path: str):
+    from benchmarks.fakes import WORKLOAD, FakeChatModel, HashingEmbeddings, SqliteReportDB
+    from src.scripts import retriever
+    from src.scripts.nl2sql_converter import SqlGenerator, set_sql_generator
+    import main
+
+    embeddings = HashingEmbeddings()
+    retriever.set_embeddings(embeddings, model_name=HASHING_MODEL)
+    build_local_index(embeddings, index_path, HASHING_MODEL)
+    retriever.set_backend(retriever.LocalVectorBackend(index_path))
+
+    llm = FakeChatModel(WORKLOAD, latency_seconds=args.llm_latency, jitter_seconds=args.llm_jitter, seed=args.seed)
+    set_sql_generator(SqlGenerator(llm=llm))
+
+    database = SqliteReportDB(rows_per_table=args.rows, pool_size=args.pool_size, latency_seconds=args.db_latency, seed=args.seed)
+    main.db_instance = database
+    main.query_executor.db_instance = database
+
+    if args.rag:
+        from src.scripts.test import Convert_Natural_Language_To_Sql
+
+        main.Convert_Natural_Language_To_Sql = Convert_Natural_Language_To_Sql
+    return main, llm
+
+
+def build_local_index(embeddings, index_path: str, model_name: str) -> None:
+    # Splits on blank lines instead of the LangChain splitter so the load test needs no LangChain install.
+    from src.embeddings.ingest import Chunk, IngestionPipeline, LocalIndexWriter, chunk_id, load_text_documents
+
+    chunks = [
+        Chunk(chunk_id(model_name, piece.strip()), piece.strip(), source)
+        for source, text in load_text_documents(SCHEMA_TEXT_DIR)
+        for piece in text.split("\n\n") if piece.strip()
+    ]
+    IngestionPipeline(embeddings, LocalIndexWriter(index_path, model_name)).run(chunks)
+
+
+def build_requests(args: argparse.Namespace, count: int, rng: random.Random, offset: int = 0) -> list[dict]:
+    from benchmarks.fakes import WORKLOAD
+
+    questions = list(WORKLOAD)
+    payloads = []
+    for i in range(count):
+        question = rng.choice(questions)
+        if args.distinct:
+            question = f"{question} (request {offset + i})"
+        payload = {"user_query": question, "limit": 10, "offset": rng.choice((0, 0, 10, 20))}
+        if rng.random() < args.keyset_ratio:
+            payload.update(pagination="keyset", offset=0)
+        payloads.append(payload)
+    return payloads
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(rank(0.50), 3),
+        "p95": round(rank(0.95), 3),
+        "p99": round(rank(0.99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class StageRecorder:
+    """
+    Keeps every duration observed by the `nl2sql_stage_seconds` histogram, per stage.
+
+    Percentiles read off the histogram would be interpolated inside its buckets, so every
+    sub-0.1 ms stage would report the same numbers; the raw durations give the real ones.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def install(self) -> None:
+        from src.utils.metrics import STAGE_SECONDS, STAGES
+
+        for stage in STAGES:
+            # `stage_timer` reports through the labelled child's `observe`, looked up on every call.
+            child = STAGE_SECONDS.labels(stage=stage)
+            child.observe = self._recording(child.observe, self.durations[stage])
+
+    @staticmethod
+    def _recording(observe, durations: list[float]):
+        def record(amount: float, *args, **kwargs) -> None:
+            durations.append(amount)
+            observe(amount, *args, **kwargs)
+        return record
+
+    def clear(self) -> None:
+        for durations in self.durations.values():
+            durations.clear()
+
+    def report(self) -> dict:
+        report = {}
+        for stage, durations in self.durations.items():
+            if not durations:
+                continue
+            numbers = percentiles([duration * 1000 for duration in durations])
+            report[stage] = {
+                "count": numbers["count"],
+                "mean_ms": numbers["mean"],
+                **{f"{key}_ms": numbers[key] for key in ("p50", "p95", "p99")},
+            }
+        return report
+
+
+def memory_report() -> dict:
+    report = {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    try:
+        with open("/proc/self/statm") as statm:
+            report["rss_mb"] = round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except OSError:
+        pass
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["python_current_mb"] = round(current / 2**20, 1)
+        report["python_peak_mb"] = round(peak / 2**20, 1)
+    return report
+
+
+async def drive(client, payloads: list[dict], concurrency: int) -> tuple[list[float], dict[int, int]]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    latencies: list[float] = []
+    status_codes: dict[int, int] = defaultdict(int)
+
+    async def worker():
+        while not queue.empty():
+            payload = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.post("/data-requests", json=payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[response.status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, status_codes
+
+
+async def run(args: argparse.Namespace, index_path: str) -> dict:
+    import httpx
+
+    main, llm = install_fakes(args, index_path)
+    from src.utils.logger import dropped_records
+    from src.utils.tracing import get_exporter
+
+    rng = random.Random(args.seed)
+    warmup = build_requests(args, args.warmup, rng)
+    measured = build_requests(args, args.requests, rng, offset=args.warmup)
+    stage_recorder = StageRecorder()
+    stage_recorder.install()
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            await drive(client, warmup, args.concurrency)
+            exporter = get_exporter()
+            if exporter is not None and hasattr(exporter, "clear"):
+                exporter.clear()
+            stage_recorder.clear()
+            llm_calls_before = llm.calls
+            if args.tracemalloc:
+                tracemalloc.start()
+
+            started = time.perf_counter()
+            latencies, status_codes = await drive(client, measured, args.concurrency)
+            elapsed = time.perf_counter() - started
+
+            memory = memory_report()
+            stages = stage_recorder.report()
+            cache_stats = (await client.get("/data-requests/cache/stats")).json()
+            pool_stats = (await client.get("/data-requests/pool/stats")).json()
+
+    span_durations = defaultdict(list)
+    if exporter is not None and hasattr(exporter, "spans"):
+        for span in exporter.spans:
+            span_durations[span.name].append(span.duration_ms)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+        "llm_calls": llm.calls - llm_calls_before,
+        "stages_ms": stages,
+        "spans_ms": {name: percentiles(values) for name, values in sorted(span_durations.items())},
+        "memory": memory,
+        "cache_stats": cache_stats,
+        "pool_stats": pool_stats,
+        "log_records_dropped": dropped_records(),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(result: dict, baseline: dict) -> None:
+    print(f"\nAgainst {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    rows = [("throughput_rps", result["throughput_rps"], baseline.get("throughput_rps"))]
+    rows += [(f"latency {key}", result["latency_ms"].get(key), baseline.get("latency_ms", {}).get(key)) for key in ("p50", "p95", "p99")]
+    for stage, numbers in result["stages_ms"].items():
+        rows.append((f"{stage} p95", numbers["p95_ms"], baseline.get("stages_ms", {}).get(stage, {}).get("p95_ms")))
+    for name, current, previous in rows:
+        if current is None or not previous:
+            print(f"  {name:32} {current!s:>10}")
+            continue
+        print(f"  {name:32} {current:>10} (was {previous}, {(current - previous) / previous * 100:+.1f}%)")
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_path = os.path.join(index_dir, "schema_index")
+        configure_environment(args, index_path)
+        result = asyncio.run(run(args, index_path))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_test-{result['commit']}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file, indent=2)
+
+    latency = result["latency_ms"]
+    print(f"{latency['count']} requests at concurrency {args.concurrency}: {result['throughput_rps']} req/s, "
+          f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms, status {result['status_codes']}")
+    for stage, numbers in result["stages_ms"].items():
+        print(f"  {stage:20} n={numbers['count']:6}  p50={numbers['p50_ms']:9.3f}ms  "
+              f"p95={numbers['p95_ms']:9.3f}ms  p99={numbers['p99_ms']:9.3f}ms")
+    for name, numbers in result["spans_ms"].items():
+        print(f"  span {name:15} n={numbers['count']:6}  p50={numbers['p50']:9.3f}ms  "
+              f"p95={numbers['p95']:9.3f}ms  p99={numbers['p99']:9.3f}ms")
+    print(f"  memory {result['memory']}")
+    pool = result["pool_stats"]
+    print(f"  pool size={pool['size']} peak_in_use={pool['peak_in_use']} waited={pool['waited_checkouts']}/{pool['checkouts']} "
+          f"avg_wait={pool['avg_wait_ms']}ms max_wait={pool['max_wait_ms']}ms timeouts={pool['timeouts']}")
+    print(f"  log records dropped={result['log_records_dropped']}")
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            compare(result, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
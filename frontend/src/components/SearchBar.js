@@ -53,7 +53,7 @@ const SearchBar = ({ onSearch }) => {
   );
 
   useEffect(() => {
-    setAllSuggestions(getAutocompleteSuggestions());
+    getAutocompleteSuggestions().then(setAllSuggestions);
 
     if ("webkitSpeechRecognition" in window || "SpeechRecognition" in window) {
       const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
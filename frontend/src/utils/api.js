@@ -36,3 +36,11 @@ export const fetchData = async (query, offset = 0, limit = 10) => {
     throw error;
   }
 };
+
+// Fetch table and column names from the backend schema catalog
+export const fetchSchemaSuggestions = async (prefix = "", limit = 500) => {
+  const response = await axios.get(`${API_URL}/schema/autocomplete`, {
+    params: { prefix, limit },
+  });
+  return response.data.suggestions || [];
+};
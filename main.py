@@ -1,18 +1,163 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import time
+PROCESS_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from typing import Literal, NamedTuple
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from Nl2Sql_Api.src.scripts.nl2sql_converter import Convert_Natural_Language_To_Sql
+from src.scripts.nl2sql_converter import Convert_Natural_Language_To_Sql, get_sql_generator
 #from src.oracle_executer import OracleDB
-from Nl2Sql_Api.src.scripts.mysql_executer import MysqlDB
-from src.utils.keywords import Contains_Forbidden_Keywords
+from src.scripts.mysql_executer import MysqlDB
+from src.scripts.async_executor import AsyncQueryExecutor
+from src.scripts.pagination import KEYSET_COLUMN, decode_cursor, split_keyset_page
+from src.scripts.retriever import get_embeddings, warm_embeddings
+from src.scripts.schema_catalog import get_schema_catalog
+from src.scripts.schema_linker import query_terms
+from src.scripts.sql_analyzer import SqlAnalysis, analyze_select
+from src.utils.cache_backend import SqliteCacheBackend, create_cache_backend
+from src.utils.config import settings
+from src.utils.keywords import Find_Forbidden_Keyword
 from src.utils.logger import get_logger
+from src.utils.metrics import REQUEST_SECONDS, record_cache_lookup, render_metrics, stage_timer
+from src.utils.query_cache import TranslationCache
+from src.utils.rate_limiter import Priority
+from src.utils.result_cache import ResultSetCache
+from src.utils.semantic_cache import SemanticQueryCache
+from src.utils.result_set import ResultSet
+from src.utils.serialization import FastJSONResponse, iter_ndjson, to_compact, to_records
+from src.utils.single_flight import SingleFlight
+from src.utils.startup import StartupManager
+from src.utils.tracing import create_exporter, current_span, fingerprint, get_exporter, new_request_id, request_id_var, set_exporter, span, traced
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from fastapi.encoders import jsonable_encoder
+import asyncio
 logger = get_logger("API_Logger")
+startup_manager = StartupManager(PROCESS_STARTED)
+set_exporter(create_exporter())
 # db_instance = OracleDB()
 db_instance = MysqlDB()
-app = FastAPI()
+query_executor = AsyncQueryExecutor(
+    db_instance,
+    max_workers=db_instance.pool_size,
+    timeout_seconds=settings.QUERY_TIMEOUT_SECONDS,
+)
+# Shared by the worker processes; None keeps both caches local to each worker.
+shared_cache = create_cache_backend()
+translation_cache = TranslationCache(
+    max_entries=settings.TRANSLATION_CACHE_SIZE,
+    ttl_seconds=settings.TRANSLATION_CACHE_TTL_SECONDS,
+    backend=shared_cache or (SqliteCacheBackend(settings.TRANSLATION_CACHE_PATH) if settings.TRANSLATION_CACHE_PATH else None),
+)
+request_flights = SingleFlight()
+result_cache = None
+if settings.RESULT_CACHE_ENABLED:
+    result_cache = ResultSetCache(
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        max_rows=settings.RESULT_CACHE_MAX_ROWS,
+        backend=shared_cache,
+    )
+semantic_cache = None
+if settings.SEMANTIC_CACHE_ENABLED:
+    semantic_cache = SemanticQueryCache(
+        lambda user_query: get_embeddings().embed_query(user_query),
+        query_terms,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_entries=settings.SEMANTIC_CACHE_SIZE,
+    )
+schema_catalog = get_schema_catalog()
+
+async def refresh_schema_catalog() -> bool:
+    """Introspects the report tables through the query pool and loads them into the schema catalog."""
+    sql_query, params = schema_catalog.introspection_query(db_instance.dialect)
+    result_set = await query_executor.fetch_rows(sql_query, params)
+    return schema_catalog.load(result_set)
+
+async def refresh_schema_periodically():
+    while True:
+        try:
+            await refresh_schema_catalog()
+        except Exception as e:
+            logger.warning("Schema introspection failed; keeping catalog version %s: %s", schema_catalog.version, getattr(e, 'detail', e))
+        if settings.SCHEMA_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(settings.SCHEMA_REFRESH_SECONDS)
+
+async def shrink_pool_periodically():
+    # Surplus connections are otherwise only reaped when one is released, so a pool that goes quiet after a spike would keep its peak size.
+    interval = max(1.0, settings.DB_POOL_IDLE_TIMEOUT_SECONDS / 2)
+    while True:
+        await asyncio.sleep(interval)
+        pool = getattr(db_instance, "pool", None)
+        if pool is None:
+            continue
+        try:
+            closed = await asyncio.to_thread(pool.shrink)
+        except Exception:
+            logger.exception("Shrinking the database pool failed.")
+            continue
+        if closed:
+            logger.info("Closed %s idle database connections.", closed)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_manager.add("database_pool", db_instance.initialize_pool)
+    startup_manager.add("sql_generator", get_sql_generator)
+    if settings.SEMANTIC_CACHE_ENABLED or settings.WARM_EMBEDDINGS_ON_STARTUP:
+        startup_manager.add("embedding_model", warm_embeddings, background=not settings.WARM_EMBEDDINGS_ON_STARTUP)
+    await startup_manager.start()
+    schema_refresh_task = asyncio.create_task(refresh_schema_periodically())
+    pool_shrink_task = asyncio.create_task(shrink_pool_periodically())
+    yield
+    schema_refresh_task.cancel()
+    pool_shrink_task.cancel()
+    query_executor.shutdown()
+    db_instance.close_pool()
+    if get_exporter():
+        get_exporter().shutdown()
+
+app = FastAPI(lifespan=lifespan)
+startup_manager.mark_imported()
+
+REQUEST_ID_HEADER = "X-Request-ID"
+MAX_REQUEST_ID_LENGTH = 64
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    # A caller-supplied request id is kept so traces can be correlated with upstream logs.
+    request_id = request.headers.get(REQUEST_ID_HEADER, "")
+    if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH or not request_id.isprintable():
+        request_id = new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        with span("http_request", method=request.method, path=request.url.path) as request_span:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            request_span.set_attributes(
+                route=route.path if route else None,
+                status_code=response.status_code,
+                response_bytes=int(response.headers.get("content-length", 0)) or None,
+            )
+    finally:
+        request_id_var.reset(token)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template rather than raw path to keep the series count bounded.
+        route = request.scope.get("route")
+        REQUEST_SECONDS.labels(
+            route=route.path if route else "unmatched", method=request.method, status=str(status)
+        ).observe(time.perf_counter() - started)
 
 # app.add_middleware(
 #     CORSMiddleware,
@@ -38,57 +183,352 @@ class NlQueryRequest(BaseModel):
     user_query: str
     offset: int = 0
     limit: int = 10
+    stream: bool = False
+    pagination: Literal["offset", "keyset"] = "offset"
+    cursor: str | None = None
+    format: Literal["records", "compact"] = "records"
 
 MAX_LIMIT = 10
-AGGREGATE_KEYWORDS = ["COUNT", "AVG", "SUM", "MIN", "MAX", "TOTAL"]
-
-def format_sql_query(generated_sql: str, offset: int, limit: int) -> str:
-    if any(keyword in generated_sql.upper() for keyword in AGGREGATE_KEYWORDS):
-        return generated_sql
-    return f"""
-        SELECT * FROM (
-            SELECT a.*, ROWNUM rnum FROM ({generated_sql}) a WHERE ROWNUM <= {offset + limit}
-        )
-        WHERE rnum > {offset}
+
+async def fetch_page_from_cache(
+    analysis: SqlAnalysis,
+    offset: int,
+    limit: int,
+    last_key,
+    is_disconnected,
+) -> ResultSet | None:
     """
+    Serves a page by slicing the cached full result of the generated query.
 
-@app.post("/data-requests")
-async def process_request(request: NlQueryRequest):
+    On a miss the full result is fetched once across all workers, capped at the cache's row
+    limit, and cached when it fits. Returns None when the requested page lies beyond a result
+    too large to cache, in which case the caller runs the regular paged query. Such queries
+    are remembered, so later pages go straight to the paged query.
+    """
+    if analysis.has_aggregate:
+        full_sql, params = analysis.cap_rows(settings.AGGREGATE_MAX_ROWS), ()
+    elif analysis.supports_keyset:
+        full_sql, params = analysis.keyset_page(limit=result_cache.max_rows + 1)
+    else:
+        full_sql, params = analysis.cap_rows(result_cache.max_rows + 1), ()
 
-    user_query = request.user_query.strip()
-    requested_limit = min(request.limit, MAX_LIMIT)
+    result_set, complete, hit = await result_cache.get_or_fetch(
+        full_sql,
+        lambda: query_executor.fetch_rows(full_sql, params, is_disconnected=is_disconnected, plan_key=analysis.sql),
+        analysis.tables,
+        lease_seconds=settings.QUERY_TIMEOUT_SECONDS or 30.0,
+    )
+    record_cache_lookup("result", hit)
+    current_span().set_attribute("result_cache_hit", hit)
+    if result_set is None:
+        return None
 
-    if Contains_Forbidden_Keywords(user_query):
+    if analysis.has_aggregate:
+        start, stop = 0, None
+    else:
+        start = offset if last_key is None else result_set.index_after(KEYSET_COLUMN, last_key)
+        if start is None:
+            return None
+        stop = start + limit
+
+    if not complete and (stop is None or stop > result_cache.max_rows):
+        return None
+
+    page = result_set.page(start, stop)
+    if not page.rows:
+        raise HTTPException(status_code=404, detail="No data found for the given query.")
+    return page
+
+def validate_user_query(user_query: str) -> None:
+    with stage_timer("keyword_guard"):
+        forbidden_keyword = Find_Forbidden_Keyword(user_query)
+    if forbidden_keyword:
+        logger.warning("Rejected query containing restricted keyword '%s'.", forbidden_keyword)
         raise HTTPException(status_code=400,detail="Your query contains restricted terms related to database modifications, which are not allowed.")
 
     if not user_query:
         logger.warning("Received an empty query request.")
         raise HTTPException(status_code=400, detail="Query cannot be empty. Please enter a valid query.")
 
-    generated_sql = await Convert_Natural_Language_To_Sql(user_query)
+@app.post("/data-requests")
+@traced("process_request")
+async def process_request(request: NlQueryRequest, http_request: Request):
+
+    current_span().set_attributes(
+        pagination=request.pagination, offset=request.offset, limit=request.limit, stream=request.stream
+    )
+    user_query = request.user_query.strip()
+    requested_limit = min(request.limit, MAX_LIMIT)
+    validate_user_query(user_query)
+
+    if request.stream:
+        return await run_query_pipeline(request, user_query, requested_limit, http_request.is_disconnected)
+
+    # Identical questions asked concurrently (e.g. a shared dashboard) share one translation, execution
+    # and encoded response. The shared work is traced under the request that started it.
+    flight_key = (
+        TranslationCache.normalize_query(user_query), request.offset, requested_limit, request.pagination, request.cursor, request.format
+    )
+    return await request_flights.do(
+        flight_key,
+        lambda is_disconnected: encode_query_response(request, user_query, requested_limit, is_disconnected),
+        http_request.is_disconnected,
+    )
+
+async def encode_query_response(request: NlQueryRequest, user_query: str, requested_limit: int, is_disconnected) -> FastJSONResponse:
+    payload = await run_query_pipeline(request, user_query, requested_limit, is_disconnected)
+    with stage_timer("json_encoding"):
+        return FastJSONResponse(payload)
+
+class Translation(NamedTuple):
+    generated_sql: str
+    schema_version: str
+    query_vector: object = None
+    llm_seconds: float | None = None
+
+@traced("translate_query")
+async def translate_query(user_query: str, priority: Priority = Priority.INTERACTIVE) -> Translation:
+    schema_version = schema_catalog.version
+    generated_sql = await translation_cache.get(user_query, schema_version)
+    query_vector = None
+    llm_seconds = None
+    record_cache_lookup("translation", generated_sql is not None)
+
+    translation_source = "translation_cache"
+
+    if generated_sql:
+        logger.debug("Translation cache hit for query: %s", user_query)
+    elif semantic_cache:
+        try:
+            query_vector = await asyncio.to_thread(semantic_cache.embed, user_query)
+        except Exception:
+            # The semantic cache is only a shortcut; without an embedding the query is translated as usual.
+            logger.exception("Embedding failed; skipping the semantic cache.")
+        if query_vector is not None:
+            generated_sql = semantic_cache.lookup(user_query, query_vector, schema_version)
+            record_cache_lookup("semantic", generated_sql is not None)
+        if generated_sql:
+            translation_source = "semantic_cache"
+            await translation_cache.set(user_query, schema_version, generated_sql)
 
     if not generated_sql:
-        logger.warning(f"Failed to generate SQL for query: {user_query}")
-        raise HTTPException(status_code=400, detail="Quota exceeded. Please check your plan and billing details.")
+        async def generate() -> str:
+            nonlocal llm_seconds
+            llm_started = time.perf_counter()
+            generated_sql = await Convert_Natural_Language_To_Sql(user_query, query_vector, priority)
+            llm_seconds = time.perf_counter() - llm_started
 
-    logger.info(f"Generated SQL query: {generated_sql}")
+            if not generated_sql:
+                logger.warning("Failed to generate SQL for query: %s", user_query)
+                raise HTTPException(
+                    status_code=429, detail="LLM quota exceeded. Please retry shortly.", headers={"Retry-After": str(int(settings.LLM_RETRY_MAX_SECONDS))}
+                )
 
-    if any(keyword in generated_sql.upper() for keyword in AGGREGATE_KEYWORDS):
-        sql_query = generated_sql
-    else:
-        sql_query = "{} LIMIT {} OFFSET {}".format(generated_sql, requested_limit, request.offset)
-
-        # sql_query = f"""
-        #     SELECT * FROM (
-        #         SELECT a.*, ROWNUM rnum FROM ({generated_sql}) a WHERE ROWNUM <= {request.offset + requested_limit}
-        #     )
-        #     WHERE rnum > {request.offset}
-        # """
-        # sql_query = format_sql_query(generated_sql, request.offset, requested_limit)
-    query_result = db_instance.Execute_Query(sql_query)
-    logger.info("Successfully fetched and sent query results.")
+            # Only statements that parse as a single SELECT are cached and reused.
+            with stage_timer("sql_analysis"):
+                analyze_select(generated_sql, db_instance.dialect)
+            logger.info("Generated SQL query: %s", generated_sql)
+            return generated_sql
+
+        # Workers missing the same question at once wait for one LLM call instead of each making their own.
+        deadline = settings.LLM_BATCH_DEADLINE_SECONDS if priority == Priority.BATCH else settings.LLM_INTERACTIVE_DEADLINE_SECONDS
+        generated_sql, generated = await translation_cache.get_or_compute(user_query, schema_version, generate, lease_seconds=deadline)
+        translation_source = "llm" if generated else "translation_cache"
+
+    current_span().set_attributes(source=translation_source, schema_version=schema_version, sql_hash=fingerprint(generated_sql))
+    return Translation(generated_sql, schema_version, query_vector, llm_seconds)
+
+@traced("run_query_pipeline")
+async def run_query_pipeline(
+    request: NlQueryRequest,
+    user_query: str,
+    requested_limit: int,
+    is_disconnected,
+    translation: Translation | None = None,
+):
+    translation = translation or await translate_query(user_query)
+    generated_sql = translation.generated_sql
+
+    params = None
+    query_result = None
+    page_limit = settings.STREAM_MAX_ROWS if request.stream else requested_limit
+    with stage_timer("sql_analysis"):
+        analysis = analyze_select(generated_sql, db_instance.dialect)
+    use_keyset = request.pagination == "keyset" and analysis.supports_keyset and not request.stream
+    last_key = decode_cursor(request.cursor, generated_sql) if use_keyset and request.cursor else None
+    fetch_limit = page_limit + 1 if use_keyset else page_limit
+    pipeline_span = current_span()
+    pipeline_span.set_attributes(
+        sql_hash=fingerprint(generated_sql),
+        aggregate=analysis.has_aggregate,
+        keyset=use_keyset,
+        tables=sorted(analysis.tables),
+    )
+
+    if result_cache and not request.stream:
+        query_result = await fetch_page_from_cache(analysis, request.offset, fetch_limit, last_key, is_disconnected)
+
+    if query_result is None:
+        if analysis.has_aggregate:
+            sql_query = analysis.cap_rows(settings.AGGREGATE_MAX_ROWS)
+        elif analysis.supports_keyset:
+            sql_query, params = analysis.keyset_page(
+                limit=fetch_limit,
+                offset=request.offset if last_key is None else 0,
+                last_key=last_key,
+            )
+        else:
+            sql_query = analysis.paginate(page_limit, request.offset)
+        if request.stream:
+            columns, row_batches = await query_executor.open_stream(
+                sql_query, params, arraysize=settings.STREAM_ARRAYSIZE, is_disconnected=is_disconnected, plan_key=analysis.sql
+            )
+        else:
+            query_result = await query_executor.fetch_rows(
+                sql_query, params, is_disconnected=is_disconnected, plan_key=analysis.sql
+            )
+            if not query_result.rows:
+                raise HTTPException(status_code=404, detail="No data found for the given query.")
+
+    if semantic_cache and translation.llm_seconds is not None and translation.query_vector is not None:
+        semantic_cache.add(
+            user_query, translation.query_vector, generated_sql, translation.llm_seconds, translation.schema_version
+        )
+
+    if request.stream:
+        startup_manager.mark_request_served()
+        logger.debug("Streaming query results.")
+        return StreamingResponse(
+            iter_ndjson(columns, row_batches),
+            media_type="application/x-ndjson",
+        )
+    startup_manager.mark_request_served()
+    pipeline_span.set_attribute("row_count", len(query_result))
+    logger.debug("Successfully fetched and sent query results.")
+    next_cursor = None
+    if use_keyset:
+        query_result, next_cursor = split_keyset_page(query_result, requested_limit, generated_sql)
+    with stage_timer("row_materialization"):
+        payload = to_compact(query_result) if request.format == "compact" else to_records(query_result)
+    if request.pagination == "keyset":
+        if request.format == "records":
+            payload = {"Table_result": payload}
+        payload.update(next_cursor=next_cursor, pagination="keyset" if use_keyset else "offset")
     # return JSONResponse(content={"Table_result": query_result}, status_code=200,headers={"X-Custom-Header": "Query-Success"})
-    return jsonable_encoder(query_result)
+    return payload
+
+class BatchQueryRequest(BaseModel):
+    queries: list[NlQueryRequest]
+
+@app.post("/data-requests/batch")
+async def process_batch(batch: BatchQueryRequest, http_request: Request):
+    """
+    Runs several natural language queries in one request.
+
+    Each distinct query is translated once, with at most `BATCH_CONCURRENCY` translations in
+    flight. Their LLM calls go through the shared limiter at batch priority, behind any
+    interactive request; the resulting SQL runs in parallel across the database pool. Every
+    item reports its own result or error.
+    """
+    if len(batch.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.BATCH_MAX_QUERIES} queries.")
+
+    translation_slots = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    translations: dict[str, asyncio.Future] = {}
+
+    async def translate_limited(user_query: str) -> Translation:
+        async with translation_slots:
+            return await translate_query(user_query, Priority.BATCH)
+
+    async def translate_once(user_query: str) -> Translation:
+        key = TranslationCache.normalize_query(user_query)
+        if key not in translations:
+            translations[key] = asyncio.ensure_future(translate_limited(user_query))
+        return await translations[key]
+
+    async def run_item(item: NlQueryRequest) -> dict:
+        user_query = item.user_query.strip()
+        try:
+            validate_user_query(user_query)
+            item = item.model_copy(update={"stream": False})
+            translation = await translate_once(user_query)
+            result = await run_query_pipeline(
+                item, user_query, min(item.limit, MAX_LIMIT), http_request.is_disconnected, translation
+            )
+            return {"user_query": user_query, "status_code": 200, "result": result}
+        except HTTPException as e:
+            return {"user_query": user_query, "status_code": e.status_code, "error": e.detail}
+        except Exception:
+            # One failing item must not fail the rest of the batch.
+            logger.exception("Batch item failed: %s", user_query)
+            return {"user_query": user_query, "status_code": 500, "error": "Internal server error while processing the query."}
+
+    results = await asyncio.gather(*(run_item(item) for item in batch.queries))
+    logger.info("Processed batch of %s queries (%s distinct).", len(results), len(translations))
+    with stage_timer("json_encoding"):
+        return FastJSONResponse({"results": results})
+
+@app.get("/data-requests/cache/stats")
+async def cache_stats():
+    return {
+        "translation_cache": translation_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "shared_cache": await asyncio.to_thread(shared_cache.stats) if shared_cache else None,
+        "single_flight": request_flights.stats(),
+        "cost_guard": db_instance.cost_guard.stats() if db_instance.cost_guard else None,
+        "schema_catalog": schema_catalog.stats(),
+    }
+
+@app.get("/data-requests/pool/stats")
+async def pool_stats():
+    stats = db_instance.pool_stats()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Database connection pool is not initialized.")
+    return stats
+
+@app.get("/data-requests/llm/stats")
+async def llm_stats():
+    """Rate, queue and retry counters of the LLM call limiter."""
+    return get_sql_generator().limiter.stats()
+
+class CacheInvalidationRequest(BaseModel):
+    table: str | None = None
+    sql_query: str | None = None
+
+@app.post("/data-requests/cache/invalidate")
+async def invalidate_result_cache(request: CacheInvalidationRequest):
+    invalidated = await result_cache.invalidate(sql_query=request.sql_query, table=request.table) if result_cache else 0
+    return {"invalidated": invalidated}
+
+@app.get("/data-requests/schema/autocomplete")
+async def schema_autocomplete(prefix: str = "", limit: int = 50):
+    """Table and column names for the search bar, served from the schema catalog."""
+    limit = max(1, min(limit, 500))
+    return {"version": schema_catalog.version, "suggestions": schema_catalog.suggest(prefix, limit)}
+
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/traces/{request_id}")
+async def get_trace(request_id: str):
+    """Spans recorded for one request, when the configured exporter keeps them in memory."""
+    exporter = get_exporter()
+    spans = exporter.get_trace(request_id) if exporter else None
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace recorded for this request id.")
+    return {"request_id": request_id, "spans": spans}
+
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    report = startup_manager.report()
+    return JSONResponse(content=report, status_code=200 if report["ready"] else 503)
 
 # @app.post("/data-requests/shutdown")
 # async def shutdown_connection():
@@ -97,4 +537,8 @@ async def process_request(request: NlQueryRequest):
 #     return JSONResponse(content={"message": "Connection closed"}, status_code=200,headers={"X-Custom-Header": "Connection-Closed"})
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if settings.WEB_WORKERS > 1:
+        # Each worker imports this module on its own; set CACHE_BACKEND so they share their caches.
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=settings.WEB_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
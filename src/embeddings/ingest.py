@@ -0,0 +1,246 @@
+"""
+Incremental ingestion of the schema descriptions into the retriever's vector index.
+
+Every chunk is identified by a hash of its text and of the embedding model, so a run only
+embeds chunks that are new or changed and deletes the ones that disappeared. Unchanged
+chunks keep their vectors. Because the model is part of the id, switching models
+re-embeds everything instead of mixing vectors from two models in one index. Chunks are
+embedded in batches on a worker pool and written to the configured `RETRIEVER_BACKEND`
+in bulk, with the same model the retriever uses at query time.
+
+Run from the repository root:
+    python -m src.embeddings.ingest [--catalog] [--batch-size 32] [--workers 4]
+"""
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import NamedTuple
+import numpy as np
+from src.utils.config import settings
+from src.utils.logger import get_logger
+
+logger = get_logger("Ingest_Logger")
+
+SCHEMA_TEXT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_text")
+CHUNK_ID_PREFIX = "schema#"
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    id: str
+    text: str
+    source: str
+
+
+class IngestionReport(NamedTuple):
+    chunks: int
+    embedded: int
+    deleted: int
+    unchanged: int
+    seconds: float
+
+
+def chunk_id(model_name: str, text: str) -> str:
+    return CHUNK_ID_PREFIX + hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def load_text_documents(directory: str = SCHEMA_TEXT_DIR) -> list[tuple[str, str]]:
+    """(source, text) for every `.txt` file in `directory`, in name order."""
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            with open(os.path.join(directory, name), encoding="utf-8") as text_file:
+                documents.append((name, text_file.read()))
+    return documents
+
+
+def load_catalog_documents() -> list[tuple[str, str]]:
+    """One document per table of the schema catalog, holding its compact column fragment."""
+    from src.scripts.schema_catalog import get_schema_catalog
+
+    return [(f"catalog:{table}", fragment) for table, fragment in get_schema_catalog().fragments().items()]
+
+
+def split_documents(documents: list[tuple[str, str]], model_name: str, chunk_size: int = 1500, chunk_overlap: int = 200) -> list[Chunk]:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = {}
+    for source, text in documents:
+        for piece in splitter.split_text(text):
+            chunk = Chunk(chunk_id(model_name, piece), piece, source)
+            chunks.setdefault(chunk.id, chunk)
+    return list(chunks.values())
+
+
+class IndexWriter:
+    """Write side of a retriever backend: the ids it holds, and bulk upserts and deletes."""
+
+    def existing_ids(self) -> set[str]:
+        raise NotImplementedError
+
+    def upsert(self, ids: list[str], vectors: np.ndarray, metadata: list[dict]) -> None:
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]) -> None:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        pass
+
+
+class LocalIndexWriter(IndexWriter):
+    """
+    Updates the memory-mapped index of `LocalVectorBackend`.
+
+    The current files are read once, changes are applied in memory, and `commit` replaces
+    the files atomically. An index built with another model is discarded.
+    """
+
+    def __init__(self, index_path: str, model_name: str):
+        from src.scripts.retriever import LocalVectorBackend
+
+        self.index_path = index_path
+        self.model_name = model_name
+        index_model, ids, vectors, metadata = LocalVectorBackend.read(index_path)
+        if ids and index_model != model_name:
+            logger.warning("Index %s was embedded with %s; rebuilding it with %s.", index_path, index_model, model_name)
+            ids, vectors, metadata = [], vectors[:0], []
+        self.entries = {chunk: (vectors[i], metadata[i]) for i, chunk in enumerate(ids)}
+
+    def existing_ids(self) -> set[str]:
+        return set(self.entries)
+
+    def upsert(self, ids: list[str], vectors: np.ndarray, metadata: list[dict]) -> None:
+        for chunk, vector, meta in zip(ids, vectors, metadata):
+            self.entries[chunk] = (vector, meta)
+
+    def delete(self, ids: list[str]) -> None:
+        for chunk in ids:
+            self.entries.pop(chunk, None)
+
+    def commit(self) -> None:
+        from src.scripts.retriever import LocalVectorBackend
+
+        ids = list(self.entries)
+        vectors = np.stack([self.entries[chunk][0] for chunk in ids]) if ids else np.zeros((0, 1), dtype=np.float32)
+        LocalVectorBackend.save(
+            self.index_path, ids=ids, vectors=vectors, metadata=[self.entries[chunk][1] for chunk in ids], model_name=self.model_name
+        )
+
+
+class PineconeIndexWriter(IndexWriter):
+    """
+    Writes to the hosted Pinecone index in batches of `batch_size` vectors.
+
+    The index holds only schema chunks, so every id in it counts as existing. Vectors that
+    are not current chunks are deleted on the next run. That includes UUID-keyed vectors
+    left over from the earlier `from_texts` loader and vectors embedded with another model.
+    """
+
+    def __init__(self, api_key: str, index_name: str, model_name: str, batch_size: int = 100):
+        from pinecone import Pinecone
+
+        self.index = Pinecone(api_key=api_key).Index(index_name)
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    def existing_ids(self) -> set[str]:
+        ids = set()
+        for page in self.index.list():
+            ids.update(page)
+        return ids
+
+    def upsert(self, ids: list[str], vectors: np.ndarray, metadata: list[dict]) -> None:
+        records = [
+            (chunk, vector.tolist(), {**meta, "model": self.model_name})
+            for chunk, vector, meta in zip(ids, vectors, metadata)
+        ]
+        for start in range(0, len(records), self.batch_size):
+            self.index.upsert(vectors=records[start:start + self.batch_size])
+
+    def delete(self, ids: list[str]) -> None:
+        for start in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[start:start + 1000])
+
+
+def create_writer(model_name: str) -> IndexWriter:
+    if settings.RETRIEVER_BACKEND == "local":
+        return LocalIndexWriter(settings.LOCAL_INDEX_PATH, model_name)
+    if settings.RETRIEVER_BACKEND == "pinecone":
+        return PineconeIndexWriter(settings.PINECONE_API_KEY, settings.INDEX_NAME, model_name)
+    raise ValueError(f"Unknown RETRIEVER_BACKEND: {settings.RETRIEVER_BACKEND}")
+
+
+class IngestionPipeline:
+    """Embeds the chunks missing from `writer` in batches of `batch_size` on `max_workers` threads, then syncs the index."""
+
+    def __init__(self, embeddings, writer: IndexWriter, batch_size: int = 32, max_workers: int = 4):
+        self.embeddings = embeddings
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.max_workers <= 1:
+            vectors = [vector for batch in batches for vector in self.embeddings.embed_documents(batch)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed") as executor:
+                vectors = [vector for batch in executor.map(self.embeddings.embed_documents, batches) for vector in batch]
+        return np.asarray(vectors, dtype=np.float32)
+
+    def run(self, chunks: list[Chunk]) -> IngestionReport:
+        started = time.perf_counter()
+        existing = self.writer.existing_ids()
+        wanted = {chunk.id for chunk in chunks}
+        new_chunks = [chunk for chunk in chunks if chunk.id not in existing]
+        stale_ids = sorted(existing - wanted)
+
+        if new_chunks:
+            vectors = self.embed([chunk.text for chunk in new_chunks])
+            self.writer.upsert(
+                [chunk.id for chunk in new_chunks],
+                vectors,
+                [{"text": chunk.text, "source": chunk.source} for chunk in new_chunks],
+            )
+        if stale_ids:
+            self.writer.delete(stale_ids)
+        if new_chunks or stale_ids:
+            self.writer.commit()
+
+        report = IngestionReport(
+            chunks=len(chunks),
+            embedded=len(new_chunks),
+            deleted=len(stale_ids),
+            unchanged=len(chunks) - len(new_chunks),
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        logger.info("Schema index ingestion finished: %s", report._asdict())
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source-dir", default=SCHEMA_TEXT_DIR, help="directory of schema description .txt files")
+    parser.add_argument("--catalog", action="store_true", help="also index the per-table fragments of the schema catalog")
+    parser.add_argument("--batch-size", type=int, default=32, help="texts per embedding call (default 32)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent embedding batches (default 4)")
+    args = parser.parse_args()
+
+    from src.scripts.retriever import get_embedding_model_name, get_embeddings
+
+    model_name = get_embedding_model_name()
+    documents = load_text_documents(args.source_dir)
+    if args.catalog:
+        documents += load_catalog_documents()
+    chunks = split_documents(documents, model_name)
+    pipeline = IngestionPipeline(get_embeddings(), create_writer(model_name), args.batch_size, args.workers)
+    print(pipeline.run(chunks)._asdict())
+
+
+if __name__ == "__main__":
+    main()
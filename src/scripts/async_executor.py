@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterator, NamedTuple
+from fastapi import HTTPException
+from src.utils.result_set import ResultSet
+from src.utils.logger import get_logger
+from src.utils.tracing import fingerprint, span
+
+logger = get_logger("Execution_Logger")
+
+DISCONNECT_POLL_SECONDS = 0.5
+CANCEL_WORKERS = 2
+
+
+class QueryHandle:
+    """
+    Shared state between the event loop and the worker thread running a query.
+
+    The executor attaches the connection it checked out so the event loop can cancel the
+    statement on that connection when the query times out or the client goes away. The lock
+    is held while the cancel is sent, so `detach` waits for a cancel in flight; a cancelled
+    connection is then discarded rather than returned to the pool, where a late cancel could
+    otherwise abort the next request's query.
+    """
+
+    def __init__(self, timeout_seconds: float | None = None):
+        self.timeout_seconds = timeout_seconds
+        self.connection = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def attach(self, connection) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise HTTPException(status_code=499, detail="Query was cancelled before execution.")
+            self.connection = connection
+
+    def detach(self) -> bool:
+        """Returns True when the query was cancelled, in which case its connection must not be reused."""
+        with self._lock:
+            self.connection = None
+            return self.cancelled
+
+    def cancel(self, cancel_callback: Callable) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self.connection is not None:
+                cancel_callback(self.connection)
+
+
+class _RowStream(NamedTuple):
+    """A streaming query's row generator and the single thread that advances and closes it."""
+
+    rows: Iterator
+    executor: ThreadPoolExecutor
+    context: contextvars.Context
+
+    def close(self) -> None:
+        # Queued behind any fetch still running, so the generator is never closed mid-fetch.
+        self.executor.submit(self.rows.close)
+        self.executor.shutdown(wait=False)
+
+
+class AsyncQueryExecutor:
+    """
+    Runs the blocking `Execute_Query` / `Fetch_Rows` of a database executor off the event loop.
+
+    Queries are dispatched to a bounded thread pool sized to the database connection pool,
+    so concurrent requests run in parallel up to the pool size and queue beyond it instead
+    of stalling the event loop. Each query gets a timeout, and the running statement is
+    cancelled on the database when the timeout elapses or the client disconnects. Cancelling
+    may open a connection of its own, so it runs on a separate small pool without being
+    waited on.
+
+    `plan_key` is handed to the executor's cost guard, so pages of one query share a plan
+    estimate; it defaults to the SQL text.
+    """
+
+    def __init__(self, db_instance, max_workers: int, timeout_seconds: float | None = None):
+        self.db_instance = db_instance
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="db-query")
+        self._cancel_executor = ThreadPoolExecutor(max_workers=CANCEL_WORKERS, thread_name_prefix="db-cancel")
+
+    async def execute(
+        self,
+        sql_query: str,
+        params=None,
+        timeout_seconds: float | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        plan_key: str | None = None,
+    ) -> list[dict]:
+        return await self._run(self.db_instance.Execute_Query, sql_query, params, timeout_seconds, is_disconnected, plan_key)
+
+    async def fetch_rows(
+        self,
+        sql_query: str,
+        params=None,
+        timeout_seconds: float | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        plan_key: str | None = None,
+    ) -> ResultSet:
+        return await self._run(self.db_instance.Fetch_Rows, sql_query, params, timeout_seconds, is_disconnected, plan_key)
+
+    async def _run(self, query_method: Callable, sql_query: str, params, timeout_seconds, is_disconnected, plan_key=None):
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        handle = QueryHandle(timeout_seconds)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        query_future = loop.run_in_executor(
+            self._executor, context.run, self._traced_call, query_method, sql_query, params, handle, plan_key
+        )
+        return await self._await_query(query_future, handle, timeout_seconds, is_disconnected)
+
+    async def _await_query(
+        self,
+        query_future: asyncio.Future,
+        handle: QueryHandle,
+        timeout_seconds: float | None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None,
+        on_abandon: Callable[[], None] | None = None,
+    ):
+        """
+        Waits for `query_future`, cancelling the statement on timeout, disconnect or task cancellation.
+
+        `on_abandon` runs on the worker pool once an abandoned call has returned, so cleanup
+        never overlaps the thread still executing it.
+        """
+        watcher = asyncio.ensure_future(self._wait_for_disconnect(is_disconnected)) if is_disconnected else None
+        waiters = {query_future} | ({watcher} if watcher else set())
+
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout_seconds, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            self._abandon(query_future, handle, on_abandon)
+            raise
+        finally:
+            if watcher:
+                watcher.cancel()
+
+        if query_future in done:
+            return query_future.result()
+
+        self._abandon(query_future, handle, on_abandon)
+        if watcher in done:
+            logger.warning("Client disconnected; cancelled running query.")
+            raise HTTPException(status_code=499, detail="Client disconnected before the query completed.")
+
+        logger.warning("Query exceeded the %ss execution timeout and was cancelled.", handle.timeout_seconds)
+        raise HTTPException(status_code=504, detail="Query execution timed out.")
+
+    def _abandon(self, query_future: asyncio.Future, handle: QueryHandle, on_abandon: Callable[[], None] | None) -> None:
+        query_future.add_done_callback(self._discard_result)
+        self._cancel(handle)
+        if on_abandon:
+            query_future.add_done_callback(lambda _: on_abandon())
+
+    @staticmethod
+    def _traced_call(query_method: Callable, sql_query: str, params, handle: QueryHandle, plan_key: str | None):
+        # Runs on the worker thread, so the span measures execution rather than time queued for a thread.
+        with span(f"db.{query_method.__name__}", sql_hash=fingerprint(sql_query)) as query_span:
+            result = query_method(sql_query, params, handle, plan_key)
+            query_span.set_attribute("row_count", len(result))
+            return result
+
+    async def open_stream(
+        self,
+        sql_query: str,
+        params=None,
+        arraysize: int = 500,
+        timeout_seconds: float | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        plan_key: str | None = None,
+    ) -> tuple[list[str], AsyncIterator[list[tuple]]]:
+        """
+        Starts a streaming query and returns its column names and an async iterator of row batches.
+
+        The query is executed and its column names read before returning, so database errors
+        still surface as regular HTTP errors. A stream runs under a `QueryHandle` and a
+        deadline covering the whole response, and is cancelled on timeout or disconnect like
+        any other query. Each stream iterates on a thread of its own: it holds a pooled
+        connection between batches, so sharing the query pool could leave it waiting behind
+        workers that are themselves waiting for a connection. The connection is released on
+        that thread, after the last batch or once an abandoned fetch has returned.
+        """
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        handle = QueryHandle(timeout_seconds)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_seconds if timeout_seconds else None
+        rows = self.db_instance.Stream_Query(sql_query, params, arraysize, handle, plan_key)
+        stream = _RowStream(rows, ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-stream"), contextvars.copy_context())
+        columns = await self._next_batch(stream, handle, deadline, is_disconnected)
+        return columns, self._iter_batches(stream, handle, deadline)
+
+    async def _iter_batches(self, stream: _RowStream, handle: QueryHandle, deadline: float | None) -> AsyncIterator[list[tuple]]:
+        needs_close = True
+        try:
+            while True:
+                # A failed or abandoned fetch arranges its own close, once the worker has returned.
+                needs_close = False
+                batch = await self._next_batch(stream, handle, deadline, None)
+                if batch is None:
+                    stream.executor.shutdown(wait=False)
+                    return
+                needs_close = True
+                yield batch
+        finally:
+            if needs_close:
+                # The consumer stopped between fetches, so nothing is running the generator.
+                stream.close()
+
+    async def _next_batch(self, stream: _RowStream, handle: QueryHandle, deadline: float | None, is_disconnected):
+        loop = asyncio.get_running_loop()
+        timeout_seconds = max(0.0, deadline - loop.time()) if deadline is not None else None
+        batch_future = loop.run_in_executor(stream.executor, stream.context.run, next, stream.rows, None)
+        try:
+            # An abandoned fetch is closed by `on_abandon` once it returns.
+            return await self._await_query(batch_future, handle, timeout_seconds, is_disconnected, on_abandon=stream.close)
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            if batch_future.done():
+                # The generator raised, which already released its connection.
+                stream.executor.shutdown(wait=False)
+            raise
+
+    def _cancel(self, handle: QueryHandle) -> None:
+        try:
+            self._cancel_executor.submit(self._cancel_blocking, handle)
+        except RuntimeError:
+            # Shutting down; the connection pool is closed right after, which ends the statement.
+            logger.warning("Executor is shut down; running query was not cancelled.")
+
+    def _cancel_blocking(self, handle: QueryHandle) -> None:
+        try:
+            handle.cancel(self.db_instance.Cancel_Query)
+        except Exception:
+            logger.exception("Failed to cancel running query.")
+
+    @staticmethod
+    def _discard_result(future: asyncio.Future) -> None:
+        if not future.cancelled():
+            future.exception()
+
+    @staticmethod
+    async def _wait_for_disconnect(is_disconnected: Callable[[], Awaitable[bool]]) -> None:
+        while not await is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._cancel_executor.shutdown(wait=False)
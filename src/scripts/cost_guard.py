@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple
+from fastapi import HTTPException
+from src.utils.config import settings
+from src.utils.logger import get_logger
+
+logger = get_logger("Cost_Guard_Logger")
+
+
+class PlanEstimate(NamedTuple):
+    rows: float
+    """Rows the optimizer expects to read across every table access in the plan."""
+    cost: float
+    """Total optimizer cost of the plan, in the database's own units."""
+
+
+class CostGuard:
+    """
+    Pre-execution check of a query's optimizer estimate against fixed budgets.
+
+    Executors call `check` with the SQL they are about to run, a callable that explains it on
+    the connection they already hold and a `plan_key`. Estimates are cached per key. Paged
+    statements inline their LIMIT, OFFSET and keyset literal, so executors key them on the
+    dialect and the un-paginated query: the first page run is explained, and later pages of
+    the same query reuse its estimate. A plan over `max_rows` or `max_cost` is
+    either rejected with a 400 (`action="reject"`) or allowed with its execution time cut to
+    `cap_seconds` (`action="cap"`). When `EXPLAIN` itself fails the query is let through, so
+    a missing privilege or plan table never takes the service down.
+    """
+
+    def __init__(self, max_rows: float, max_cost: float, action: str = "cap", cap_seconds: float = 5.0, cache_size: int = 1024):
+        if action not in ("reject", "cap"):
+            raise ValueError(f"Unknown cost guard action: {action}")
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.action = action
+        self.cap_seconds = cap_seconds
+        self.cache_size = cache_size
+        self._estimates: OrderedDict[Hashable, PlanEstimate | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.explained = 0
+        self.rejected = 0
+        self.capped = 0
+
+    def check(self, sql_query: str, explain: Callable[[], PlanEstimate], plan_key: Hashable | None = None) -> float | None:
+        """Returns None when the plan is within budget, or the execution time limit to impose on it."""
+        plan_key = sql_query if plan_key is None else plan_key
+        with self._lock:
+            self.checks += 1
+            cached = plan_key in self._estimates
+            estimate = self._estimates.get(plan_key)
+            if cached:
+                self._estimates.move_to_end(plan_key)
+
+        if not cached:
+            try:
+                estimate = explain()
+            except Exception as e:
+                logger.warning("EXPLAIN failed, running query unchecked: %s", e)
+                estimate = None
+            with self._lock:
+                self.explained += 1
+                self._estimates[plan_key] = estimate
+                while len(self._estimates) > self.cache_size:
+                    self._estimates.popitem(last=False)
+
+        if estimate is None or (estimate.rows <= self.max_rows and estimate.cost <= self.max_cost):
+            return None
+
+        if self.action == "reject":
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Rejected query estimated at %.0f rows, cost %.0f: %s", estimate.rows, estimate.cost, sql_query)
+            raise HTTPException(
+                status_code=400,
+                detail="The generated query would scan too much data. Please add filters to narrow it down.",
+            )
+
+        with self._lock:
+            self.capped += 1
+        logger.warning("Capping query estimated at %.0f rows, cost %.0f to %ss.", estimate.rows, estimate.cost, self.cap_seconds)
+        return self.cap_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checks": self.checks,
+                "explained": self.explained,
+                "cached_plans": len(self._estimates),
+                "rejected": self.rejected,
+                "capped": self.capped,
+            }
+
+
+def create_cost_guard() -> CostGuard | None:
+    if not settings.COST_GUARD_ENABLED:
+        return None
+    return CostGuard(
+        max_rows=settings.COST_GUARD_MAX_ROWS,
+        max_cost=settings.COST_GUARD_MAX_COST,
+        action=settings.COST_GUARD_ACTION,
+        cap_seconds=settings.COST_GUARD_CAP_SECONDS,
+        cache_size=settings.COST_GUARD_CACHE_SIZE,
+    )
@@ -1,75 +1,257 @@
+import json
 import os
-from mysql.connector import pooling, Error
+import mysql.connector
+from mysql.connector import Error
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from src.scripts.cost_guard import PlanEstimate, create_cost_guard
+from src.utils.connection_pool import PoolTimeoutError, create_pool_manager
+from src.utils.metrics import stage_timer
+from src.utils.result_set import ResultSet
 # from src.utils.logger import get_logger
 
 load_dotenv()
 # logger = get_logger("Execution_Logger")
 
+def _rows_examined(node) -> float:
+    """Rows read according to an `EXPLAIN FORMAT=JSON` plan, following nested loop fan-out."""
+    if isinstance(node, list):
+        return sum(_rows_examined(child) for child in node)
+    if not isinstance(node, dict):
+        return 0.0
+
+    total = 0.0
+    for key, value in node.items():
+        if key == "nested_loop":
+            # Each table in a join is scanned once per row produced by the tables before it.
+            prefix_rows = 1.0
+            for step in value:
+                table = step.get("table")
+                if table is None:
+                    total += _rows_examined(step)
+                    continue
+                total += prefix_rows * float(table.get("rows_examined_per_scan", 0)) + _rows_examined(table)
+                prefix_rows = max(float(table.get("rows_produced_per_join", prefix_rows)), 1.0)
+        elif key == "table":
+            total += float(value.get("rows_examined_per_scan", 0)) + _rows_examined(value)
+        else:
+            total += _rows_examined(value)
+    return total
+
+def _query_cost(node) -> float:
+    if isinstance(node, list):
+        return sum(_query_cost(child) for child in node)
+    if not isinstance(node, dict):
+        return 0.0
+    if "query_cost" in node.get("cost_info", {}):
+        return float(node["cost_info"]["query_cost"])
+    return sum(_query_cost(value) for value in node.values())
+
 class MysqlDB:
 
+    dialect = "mysql"
+
     def __init__(self):
         self.pool = None
-        self.initialize_pool()
+        self.pool_size = int(os.getenv('POOL_SIZE', 5))
+        self.connect_args = {
+            "host": os.getenv('HOST_NAME'),
+            "user": os.getenv('USER_NAME'),
+            "password": os.getenv('PASSWORD'),
+            "database": os.getenv('DATABASE_NAME'),
+            "connect_timeout": 10,
+            # Pooled connections live for hours; without autocommit each one would keep its first
+            # REPEATABLE READ snapshot, serving stale report data and holding metadata locks.
+            "autocommit": True,
+            # A stream abandoned mid-way leaves unread rows; drain them instead of failing on close.
+            "consume_results": True,
+        }
+        self.cost_guard = create_cost_guard()
 
     def initialize_pool(self):
         try:
-            pool_size = int(os.getenv('POOL_SIZE', 5))
-            self.pool = pooling.MySQLConnectionPool(
-                pool_name="mysql_pool",
-                pool_size=pool_size,
-                pool_reset_session=True,
-                host=os.getenv('HOST_NAME'),
-                user=os.getenv('USER_NAME'),
-                password=os.getenv('PASSWORD'),
-                database=os.getenv('DATABASE_NAME'),
-                connect_timeout=10,
+            self.pool = create_pool_manager(
+                "mysql",
+                connect=lambda: mysql.connector.connect(**self.connect_args),
+                close=lambda connection: connection.close(),
+                validate=lambda connection: connection.is_connected(),
+                max_size=self.pool_size,
             )
+            self.pool.prewarm()
             # logger.info("MySQL connection pool initialized successfully.")
         except Error as e:
             # logger.error(f"MySQL connection pool initialization failed: {e}")
             raise HTTPException(status_code=500, detail="Unable to establish MySQL database connection.")
 
-    def Execute_Query(self, sql_query: str, params=None) -> list[dict]:
+    def Execute_Query(self, sql_query: str, params=None, handle=None, plan_key=None) -> list[dict]:
+        result_set = self.Fetch_Rows(sql_query, params, handle, plan_key)
+
+        if not result_set.rows:
+            # logger.warning(f"No data found for query: {sql_query}")
+            raise HTTPException(status_code=404, detail="No data found for the given query.")
+
+        # logger.debug(f"Query executed successfully with {len(result_set)} rows returned.")
+        with stage_timer("row_materialization"):
+            return result_set.to_records()
+
+    def Fetch_Rows(self, sql_query: str, params=None, handle=None, plan_key=None) -> ResultSet:
         if not self.pool:
             # logger.error("Attempted to execute a query without an initialized MySQL connection pool.")
             raise HTTPException(status_code=500, detail="MySQL connection is not initialized.")
 
         connection = None
+        cursor = None
+        capped = failed = cancelled = False
 
         try:
-            connection = self.pool.get_connection()
+            connection = self._checkout()
+            if handle:
+                handle.attach(connection)
             cursor = connection.cursor()
-            cursor.execute(sql_query, params or ())
-            columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-
-            if not results:
-                # logger.warning(f"No data found for query: {sql_query}")
-                raise HTTPException(status_code=404, detail="No data found for the given query.")
+            capped = self._apply_cost_guard(cursor, sql_query, params, plan_key)
+            with stage_timer("query_execution"):
+                cursor.execute(sql_query, params or ())
+                columns = [col[0] for col in cursor.description]
+                rows = cursor.fetchall()
+            return ResultSet(columns, rows)
 
-            # logger.debug(f"Query executed successfully with {len(results)} rows returned.")
-            return results
+        except HTTPException:
+            raise
 
         except Error as e:
+            failed = True
             # logger.error(f"MySQL error occurred during query execution: {e}")
             raise HTTPException(status_code=400, detail="Error executing the MySQL query.")
 
         except Exception as e:
+            failed = True
             # logger.exception(f"Unexpected error while executing MySQL query: {sql_query}")
             raise HTTPException(status_code=500, detail="Internal server error during query execution.")
 
         finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+            if handle:
+                cancelled = handle.detach()
+            if connection:
+                self._release(connection, cursor, capped, failed, discard=cancelled)
                 # logger.info("MySQL connection released back to pool.")
 
-    def close_pool(self):
+    def Stream_Query(self, sql_query: str, params=None, arraysize: int = 500, handle=None, plan_key=None):
+        """Yields the column names once, then lists of row tuples read with `fetchmany(arraysize)`."""
+        if not self.pool:
+            raise HTTPException(status_code=500, detail="MySQL connection is not initialized.")
 
-        self.pool = None
-        # logger.info("MySQL pool reference cleared (no explicit close method available).")
+        connection = None
+        cursor = None
+        capped = failed = cancelled = False
+
+        try:
+            connection = self._checkout()
+            if handle:
+                handle.attach(connection)
+            cursor = connection.cursor()
+            capped = self._apply_cost_guard(cursor, sql_query, params, plan_key)
+            with stage_timer("query_execution"):
+                cursor.execute(sql_query, params or ())
+            yield [col[0] for col in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                yield rows
+
+        except HTTPException:
+            raise
+
+        except Error as e:
+            failed = True
+            raise HTTPException(status_code=400, detail="Error executing the MySQL query.")
+
+        except Exception as e:
+            failed = True
+            raise HTTPException(status_code=500, detail="Internal server error during query execution.")
+
+        finally:
+            if handle:
+                cancelled = handle.detach()
+            if connection:
+                self._release(connection, cursor, capped, failed, discard=cancelled)
+
+    def _checkout(self):
+        try:
+            with stage_timer("pool_checkout"):
+                return self.pool.acquire()
+        except PoolTimeoutError:
+            raise HTTPException(status_code=503, detail="All database connections are busy. Please retry shortly.")
+
+    def _release(self, connection, cursor, capped: bool, failed: bool, discard: bool = False) -> None:
+        # A cancelled connection may still receive a late KILL QUERY, so it is closed instead of reused.
+        if discard:
+            self.pool.release(connection, discard=True)
+            return
+        # Closing the cursor drains unread rows (`consume_results`), so the connection can be reused.
+        try:
+            if cursor:
+                cursor.close()
+            if capped:
+                # Sessions are not reset on checkout, so undo the cost guard's time limit here.
+                reset_cursor = connection.cursor()
+                reset_cursor.execute("SET SESSION MAX_EXECUTION_TIME = DEFAULT")
+                reset_cursor.close()
+        except Error:
+            failed = True
+        self.pool.release(connection, discard=failed and not connection.is_connected())
+
+    def Explain_Query(self, sql_query: str, params=None) -> PlanEstimate:
+        if not self.pool:
+            raise HTTPException(status_code=500, detail="MySQL connection is not initialized.")
+
+        connection = self._checkout()
+        cursor = None
+        failed = False
+        try:
+            cursor = connection.cursor()
+            return self._explain(cursor, sql_query, params)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(connection, cursor, False, failed)
+
+    @staticmethod
+    def _explain(cursor, sql_query: str, params=None) -> PlanEstimate:
+        cursor.execute(f"EXPLAIN FORMAT=JSON {sql_query}", params or ())
+        plan = json.loads(cursor.fetchone()[0])
+        return PlanEstimate(rows=_rows_examined(plan), cost=_query_cost(plan))
+
+    def _apply_cost_guard(self, cursor, sql_query: str, params, plan_key=None) -> bool:
+        """Returns True when the session's execution time was capped and must be reset on release."""
+        if not self.cost_guard:
+            return False
+        cap_seconds = self.cost_guard.check(
+            sql_query, lambda: self._explain(cursor, sql_query, params), (self.dialect, plan_key or sql_query)
+        )
+        if cap_seconds:
+            cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(cap_seconds * 1000)}")
+            return True
+        return False
+
+    def Cancel_Query(self, connection):
+        # The running connection is busy, so the kill has to be issued from a separate session.
+        killer = mysql.connector.connect(**self.connect_args)
+        try:
+            killer.cmd_query(f"KILL QUERY {int(connection.connection_id)}")
+        finally:
+            killer.close()
+
+    def pool_stats(self) -> dict | None:
+        return self.pool.stats() if self.pool else None
+
+    def close_pool(self):
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        # logger.info("MySQL connection pool closed.")
 # db=MysqlDB()
 # s=db.Execute_Query("select*from ACTIVATION_SCHEDULER_INFO")
 
@@ -1,10 +1,10 @@
-import google.generativeai as Aimodel
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from fastapi import HTTPException
-from src.schema_details import get_metadata
+from src.scripts.schema_catalog import get_schema_catalog
+from src.scripts.schema_linker import get_schema_linker
 from src.utils.logger import get_logger
+from src.utils.metrics import stage_timer
+from src.utils.rate_limiter import LimiterDeadlineError, LimiterQueueFullError, LlmCallLimiter, Priority, create_llm_limiter
+from src.utils.tracing import span
 from google.api_core.exceptions import ResourceExhausted
 import re
 
@@ -17,120 +17,191 @@ if not API_KEY:
     logger.error("Missing API_KEY in environment variables.")
     raise HTTPException(status_code=500, detail="API_KEY is missing. Set it in the environment variables.")
 
-Aimodel.configure(api_key=API_KEY)
+LLM_MODEL = "gemini-2.0-flash"
+
+RULES_PROMPT = """
+You are a highly skilled SQL query generation tool designed for Oracle enterprise database environments. 
+Your sole function is to translate natural language requests into valid and efficient SQL SELECT statements. 
+Adhere strictly to the following rules, and respond ONLY with the generated SQL query.
+Any deviation from these rules will result in an error.
+
+**Mandatory Rules:**
+
+1. **SELECT-Only Operations:**
+* Your output MUST be a valid SQL SELECT statement, and ONLY a SELECT statement.
+* Any request implying data modification (DML, DDL, TCL, DCL) should result in the immediate response: `"ERROR"`.
+
+2. **Explicit Column Specification & Handling 'All Tables' Requests:**  
+* If the user specifies column names, include only those columns in the `SELECT` statement.  
+* If the user requests "all columns," "all data," or does not specify columns, use `SELECT *`. 
+* If the user requests "all tables,return `"ERROR" 
+* If no tables exist, return `"ERROR"`.
+
+3. **Schema Adherence & Validation:**  
+* Use only table and column names provided in the schema.  
+* If the user requests a non-existent table or column, return `"ERROR"`.
+
+4. **Handling Columns Appearing in Multiple Tables:**
+* If a column exists in multiple tables, return a `UNION ALL` query selecting that column from each table.
+* The result should include a new column indicating the source table name.
+
+
+5. **Precise Filtering & Conditions:**
+* Translate all WHERE clause conditions precisely as stated.
+* Ensure accurate handling of date ranges (using appropriate date/time functions if needed), numerical comparisons, and string matching (using LIKE or other relevant functions as needed).
+
+6. **Aggregation and Ordering Implementation:**
+* Correctly implement requested aggregation functions (COUNT) only.
+* Implement ORDER BY clauses exactly as requested, including the specified column(s) and sort order (ASC or DESC). Default to ASC if not specified.
+
+7. **Pagination is Strictly Prohibited (LIMIT, OFFSET, FETCH):**
+* Your output MUST NOT include:
+    * `LIMIT`
+    * `OFFSET`
+    * `FETCH NEXT … ROWS ONLY`
+* If a user requests any form of pagination, return `"ERROR"`
+
+8. **Zero Tolerance for Additional Text:**
+* Your output consists SOLELY of the generated SQL SELECT statement. Do NOT include any explanations, comments, or introductory text. Failure to adhere to this is an error.
+
+9. **Assume Correct Grammar:**
+* Assume that the user input is grammatically correct, though it might contain synonyms or multiple ways to ask the same question.
+
+**Process:**
+
+1. Receive a natural language request.
+2. Parse the request to identify:
+* The target table(s).
+* The desired columns.
+* Any filtering conditions (WHERE clause).
+* Any aggregation requirements.
+* Any sorting requirements (ORDER BY clause).
+* Any LIMIT/OFFSET requirements (which MUST NOT be included in the query).
+3. Construct a valid SQL SELECT statement that fulfills all requirements.
+4. If a requested column appears in multiple tables, construct a `UNION ALL` query with a `source_table` column..
+5. If the user asks for data from **both tables with a relationship**, construct an appropriate `JOIN` query.
+6. Output ONLY the SQL SELECT statement. If any rule is violated, output `"ERROR"`.
+
+"""
+
+CODE_FENCE_PATTERN = re.compile(r"^\s*```[ \t]*(?:sql\b)?|```\s*$", re.IGNORECASE)
 
 def clean_sql_query(query: str) -> str:
-    query_cleaned = re.sub(r'`|sql', '', query, flags=re.IGNORECASE)
-    return query_cleaned.strip()
-    
-
-def Convert_Natural_Language_To_Sql(user_query:str,params = None) -> str | None:
-            
-        schema_details=get_metadata()
-        if not schema_details:
+    # Only the markdown fence and its language tag are removed; backticks and "sql" inside
+    # the statement may be part of quoted identifiers or column names.
+    return CODE_FENCE_PATTERN.sub('', query.strip()).strip()
+
+
+class SqlGenerator:
+    """
+    Application-scoped natural language to SQL generator.
+
+    Built once at startup and shared by every request: the Gemini chat client (and the
+    HTTP/gRPC channel it keeps open) is reused, and the static rules prompt together with
+    the full schema block is rendered once per schema catalog version. Each call only appends
+    the user query and awaits the model through the async `ainvoke` path, so no worker thread
+    is held per translation. Calls are admitted by an `LlmCallLimiter` that keeps them within
+    the provider quota and retries quota errors.
+    """
+
+    def __init__(
+        self,
+        api_key: str = API_KEY,
+        model: str = LLM_MODEL,
+        temperature: float = 0,
+        llm=None,
+        limiter: LlmCallLimiter | None = None,
+    ):
+        self.model = model
+        if llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            llm = ChatGoogleGenerativeAI(model=model, api_key=api_key, temperature=temperature)
+        # Any chat model with an async `ainvoke(prompt)` returning a message with `.content` works here.
+        self.llm = llm
+        self.limiter = limiter or create_llm_limiter(retry_on=(ResourceExhausted,))
+
+        self.schema_catalog = get_schema_catalog()
+        if not self.schema_catalog.snapshot.tables:
             logger.error("Schema metadata retrieval failed.")
             raise HTTPException(status_code=500, detail="Schema metadata unavailable.")
 
-        prompt_template = f"""
-
-            You are a highly skilled SQL query generation tool designed for Oracle enterprise database environments. 
-            Your sole function is to translate natural language requests into valid and efficient SQL SELECT statements. 
-            Adhere strictly to the following rules, and respond ONLY with the generated SQL query.
-            Any deviation from these rules will result in an error.
-
-            **Mandatory Rules:**
-
-            1. **SELECT-Only Operations:**
-            * Your output MUST be a valid SQL SELECT statement, and ONLY a SELECT statement.
-            * Any request implying data modification (DML, DDL, TCL, DCL) should result in the immediate response: `"ERROR"`.
-
-            2. **Explicit Column Specification & Handling 'All Tables' Requests:**  
-            * If the user specifies column names, include only those columns in the `SELECT` statement.  
-            * If the user requests "all columns," "all data," or does not specify columns, use `SELECT *`. 
-            * If the user requests "all tables,return `"ERROR" 
-            * If no tables exist, return `"ERROR"`.
-
-            3. **Schema Adherence & Validation:**  
-            * Use only table and column names provided in the schema.  
-            * If the user requests a non-existent table or column, return `"ERROR"`.
-
-            4. **Handling Columns Appearing in Multiple Tables:**
-            * If a column exists in multiple tables, return a `UNION ALL` query selecting that column from each table.
-            * The result should include a new column indicating the source table name.
-        
-
-            5. **Precise Filtering & Conditions:**
-            * Translate all WHERE clause conditions precisely as stated.
-            * Ensure accurate handling of date ranges (using appropriate date/time functions if needed), numerical comparisons, and string matching (using LIKE or other relevant functions as needed).
-
-            6. **Aggregation and Ordering Implementation:**
-            * Correctly implement requested aggregation functions (COUNT) only.
-            * Implement ORDER BY clauses exactly as requested, including the specified column(s) and sort order (ASC or DESC). Default to ASC if not specified.
-
-            7. **Pagination is Strictly Prohibited (LIMIT, OFFSET, FETCH):**
-            * Your output MUST NOT include:
-                * `LIMIT`
-                * `OFFSET`
-                * `FETCH NEXT … ROWS ONLY`
-            * If a user requests any form of pagination, return `"ERROR"`
-
-            8. **Zero Tolerance for Additional Text:**
-            * Your output consists SOLELY of the generated SQL SELECT statement. Do NOT include any explanations, comments, or introductory text. Failure to adhere to this is an error.
-
-            9. **Assume Correct Grammar:**
-            * Assume that the user input is grammatically correct, though it might contain synonyms or multiple ways to ask the same question.
-
-            **Process:**
-
-            1. Receive a natural language request.
-            2. Parse the request to identify:
-            * The target table(s).
-            * The desired columns.
-            * Any filtering conditions (WHERE clause).
-            * Any aggregation requirements.
-            * Any sorting requirements (ORDER BY clause).
-            * Any LIMIT/OFFSET requirements (which MUST NOT be included in the query).
-            3. Construct a valid SQL SELECT statement that fulfills all requirements.
-            4. If a requested column appears in multiple tables, construct a `UNION ALL` query with a `source_table` column..
-            5. If the user asks for data from **both tables with a relationship**, construct an appropriate `JOIN` query.
-            6. Output ONLY the SQL SELECT statement. If any rule is violated, output `"ERROR"`.
-            
-            {'/n'.join(schema_details)}
-
-            Now, convert the following Natural Language Query: {user_query}"""
-        
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", api_key=API_KEY, temperature=0)
-
-        prompt = PromptTemplate(template=prompt_template,input_variables=["user_query"])
+        self._schema_version = None
+        self.schema_prompt_prefix = ""
+
+    def schema_prompt(self) -> str:
+        """Rules plus the full schema block, re-rendered only when the catalog version changes."""
+        snapshot = self.schema_catalog.snapshot
+        if snapshot.version != self._schema_version:
+            self.schema_prompt_prefix = RULES_PROMPT + "\n".join(snapshot.prompt_lines)
+            self._schema_version = snapshot.version
+        return self.schema_prompt_prefix
+
+    def render_prompt(self, user_query: str, schema_context: str | None = None) -> str:
+        if schema_context is None:
+            prefix = self.schema_prompt()
+        else:
+            prefix = f"{RULES_PROMPT}Schema:\n{schema_context}"
+        return f"{prefix}\n\nNow, convert the following Natural Language Query: {user_query}"
+
+    async def generate(self, user_query: str, schema_context: str | None = None, priority: Priority = Priority.INTERACTIVE) -> str | None:
+        with stage_timer("prompt_rendering"):
+            prompt = self.render_prompt(user_query, schema_context)
         try:
-              chain = (
-                    {"user_query":RunnablePassthrough()}
-                    |prompt
-                    |llm
-                    |RunnableLambda(lambda x:x.content)
-              )
-
-              sql_query = chain.invoke(user_query)
-              sql_query=clean_sql_query(sql_query)
-
-              if sql_query.endswith(';'):
-                sql_query = sql_query[:-1]
-                logger.info("Removed semicolon from generated SQL.")
-              else:
-                logger.info("No semicolon found in generated SQL.")
-
-              if "ERROR" in sql_query or not sql_query.lower().startswith("select"):
-                   logger.warning(f"Invalid SQL generated: {sql_query}")
-                   raise HTTPException(status_code=400, detail="Failed to process the input query into a valid SQL statement.")
-              return sql_query
-        
+            with span("llm_invoke", model=self.model, prompt_chars=len(prompt)) as llm_span, stage_timer("llm_call"):
+                response = await self.limiter.run(lambda: self.llm.ainvoke(prompt), priority)
+                usage = getattr(response, "usage_metadata", None) or {}
+                llm_span.set_attributes(
+                    prompt_tokens=usage.get("input_tokens"), completion_tokens=usage.get("output_tokens")
+                )
+
+            with stage_timer("sql_postprocess"):
+                sql_query = clean_sql_query(response.content)
+                if sql_query.endswith(';'):
+                    sql_query = sql_query[:-1]
+                    logger.debug("Removed semicolon from generated SQL.")
+
+            # Statement-level validation happens in `sql_analyzer` once the dialect is known.
+            if sql_query.strip('"\'` ').upper() == "ERROR":
+                logger.warning("Invalid SQL generated: %s", sql_query)
+                raise HTTPException(status_code=400, detail="Failed to process the input query into a valid SQL statement.")
+            return sql_query
+
+        except HTTPException:
+            raise
+
         except ResourceExhausted:
-            logger.error(f"Quota exceeded for query: {user_query}.")
+            logger.error("Quota exceeded for query: %s.", user_query)
             return None
 
-        except Exception as e:
-            logger.exception(f"SQL generation failed for query: {user_query}")
+        except LimiterQueueFullError:
+            logger.warning("LLM queue full; rejected query: %s", user_query)
+            raise HTTPException(status_code=503, detail="Too many queries are waiting for translation. Please retry shortly.", headers={"Retry-After": "1"})
+
+        except LimiterDeadlineError:
+            logger.warning("Translation deadline exceeded for query: %s", user_query)
+            raise HTTPException(status_code=504, detail="SQL generation timed out.")
+
+        except Exception:
+            logger.exception("SQL generation failed for query: %s", user_query)
             raise HTTPException(status_code=500, detail="SQL generation failed.")
 
-# s=Convert_Natural_Language_To_Sql(" i need number of dom available")
-# print(s)
\ No newline at end of file
+
+_sql_generator: SqlGenerator | None = None
+
+def get_sql_generator() -> SqlGenerator:
+    global _sql_generator
+    if _sql_generator is None:
+        _sql_generator = SqlGenerator()
+        logger.info("SQL generator initialized.")
+    return _sql_generator
+
+def set_sql_generator(generator: SqlGenerator | None) -> None:
+    global _sql_generator
+    _sql_generator = generator
+
+async def Convert_Natural_Language_To_Sql(user_query: str, query_vector=None, priority: Priority = Priority.INTERACTIVE) -> str | None:
+    schema_context = None
+    if settings.SCHEMA_LINKING_ENABLED:
+        schema_context = get_schema_linker().schema_context(user_query, query_vector)
+    return await get_sql_generator().generate(user_query, schema_context, priority)
@@ -1,66 +1,214 @@
+import uuid
 from src.utils.config import settings
 import oracledb
 from fastapi import HTTPException
+from src.scripts.cost_guard import PlanEstimate, create_cost_guard
+from src.utils.connection_pool import PoolTimeoutError, create_pool_manager
+from src.utils.metrics import stage_timer
+from src.utils.result_set import ResultSet
 from src.utils.logger import get_logger
 
 logger = get_logger("Execution_Logger")
 
 class OracleDB:
+    dialect = "oracle"
+
     def __init__(self):
         self.pool = None
+        self.pool_size = settings.DB_MAX_CONNECTIONS
+        self.cost_guard = create_cost_guard()
 
     def initialize_pool(self):
+        dsn = f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_SERVICE_NAME}"
         try:
-            self.pool = oracledb.SessionPool(
-                user=settings.DB_USER,
-                password=settings.DB_PASS,
-                dsn=f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_SERVICE_NAME}",
-                min=settings.DB_MIN_CONNECTIONS,
-                max=settings.DB_MAX_CONNECTIONS,
-                increment=settings.DB_CONNECTION_INCREMENT,
-                threaded=True,
-                encoding="UTF-8"
+            self.pool = create_pool_manager(
+                "oracle",
+                connect=lambda: oracledb.connect(user=settings.DB_USER, password=settings.DB_PASS, dsn=dsn),
+                close=lambda connection: connection.close(),
+                validate=self._ping,
+                max_size=self.pool_size,
             )
+            self.pool.prewarm()
             logger.info("Database connection pool initialized successfully.")
         except (oracledb.DatabaseError, ValueError) as e:
-            logger.error(f"Database connection error during pool initialization: {e}")
+            logger.error("Database connection error during pool initialization: %s", e)
             raise HTTPException(status_code=500, detail="Unable to establish database connection.")
 
-    def Execute_Query(self, sql_query: str, params=None) -> list[dict]:
+    @staticmethod
+    def _ping(connection) -> bool:
+        try:
+            connection.ping()
+            return True
+        except oracledb.Error:
+            return False
+
+    def Execute_Query(self, sql_query: str, params=None, handle=None, plan_key=None) -> list[dict]:
+        result_set = self.Fetch_Rows(sql_query, params, handle, plan_key)
+
+        if not result_set.rows:
+            logger.warning("No data found for query: %s", sql_query)
+            raise HTTPException(status_code=404, detail="No data found for the given query.")
+
+        logger.debug("Query executed successfully with %s rows returned.", len(result_set))
+        with stage_timer("row_materialization"):
+            return result_set.to_records()
+
+    def Fetch_Rows(self, sql_query: str, params=None, handle=None, plan_key=None) -> ResultSet:
 
         if not self.pool:
             logger.error("Attempted to execute a query without an initialized connection pool.")
             raise HTTPException(status_code=500, detail="Database connection is not initialized.")
 
         connection = None
+        failed = cancelled = False
 
         try:
-            connection = self.pool.acquire()
+            connection = self._checkout()
+            if handle:
+                handle.attach(connection)
+                connection.call_timeout = int(handle.timeout_seconds * 1000) if handle.timeout_seconds else 0
 
             with connection.cursor() as cursor:
-                cursor.execute(sql_query)
-                columns = [col[0] for col in cursor.description]
-                results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                self._apply_cost_guard(connection, cursor, sql_query, plan_key)
+                with stage_timer("query_execution"):
+                    cursor.execute(sql_query, params or [])
+                    columns = [col[0] for col in cursor.description]
+                    rows = cursor.fetchall()
+                return ResultSet(columns, rows)
 
-                if not results:
-                    logger.warning(f"No data found for query: {sql_query}")
-                    raise HTTPException(status_code=404, detail="No data found for the given query.")
-
-                logger.debug(f"Query executed successfully with {len(results)} rows returned.")
-                return results
+        except HTTPException:
+            raise
 
         except oracledb.DatabaseError as e:
-            logger.error(f"Database error occurred during query execution: {e}")
+            failed = True
+            logger.error("Database error occurred during query execution: %s", e)
             raise HTTPException(status_code=400, detail="Error executing the database query.")
         
         except Exception as e:
-            logger.exception(f"Unexpected error while executing query: {sql_query}")
+            failed = True
+            logger.exception("Unexpected error while executing query: %s", sql_query)
             raise HTTPException(status_code=500, detail="Internal server error during query execution.")
         
         finally:
+            if handle:
+                cancelled = handle.detach()
             if connection:
-                self.pool.release(connection)
-                logger.info("Database connection released back to pool.")
+                self._release(connection, failed, discard=cancelled)
+                logger.debug("Database connection released back to pool.")
+
+    def Stream_Query(self, sql_query: str, params=None, arraysize: int = 500, handle=None, plan_key=None):
+        """Yields the column names once, then lists of row tuples read with `fetchmany(arraysize)`."""
+        if not self.pool:
+            logger.error("Attempted to execute a query without an initialized connection pool.")
+            raise HTTPException(status_code=500, detail="Database connection is not initialized.")
+
+        connection = None
+        failed = cancelled = False
+
+        try:
+            connection = self._checkout()
+            if handle:
+                handle.attach(connection)
+                connection.call_timeout = int(handle.timeout_seconds * 1000) if handle.timeout_seconds else 0
+
+            with connection.cursor() as cursor:
+                cursor.arraysize = arraysize
+                self._apply_cost_guard(connection, cursor, sql_query, plan_key)
+                with stage_timer("query_execution"):
+                    cursor.execute(sql_query, params or [])
+                yield [col[0] for col in cursor.description]
+
+                while True:
+                    rows = cursor.fetchmany(arraysize)
+                    if not rows:
+                        break
+                    yield rows
+
+        except HTTPException:
+            raise
+
+        except oracledb.DatabaseError as e:
+            failed = True
+            logger.error("Database error occurred during query streaming: %s", e)
+            raise HTTPException(status_code=400, detail="Error executing the database query.")
+
+        except Exception as e:
+            failed = True
+            logger.exception("Unexpected error while streaming query: %s", sql_query)
+            raise HTTPException(status_code=500, detail="Internal server error during query execution.")
+
+        finally:
+            if handle:
+                cancelled = handle.detach()
+            if connection:
+                self._release(connection, failed, discard=cancelled)
+
+    def _checkout(self):
+        try:
+            with stage_timer("pool_checkout"):
+                return self.pool.acquire()
+        except PoolTimeoutError:
+            raise HTTPException(status_code=503, detail="All database connections are busy. Please retry shortly.")
+
+    def _release(self, connection, failed: bool = False, discard: bool = False) -> None:
+        # A cancelled session is never reused; after other failures it is kept only if it still answers a ping.
+        discard = discard or (failed and not self._ping(connection))
+        if not discard:
+            connection.call_timeout = 0
+        self.pool.release(connection, discard=discard)
+
+    def Explain_Query(self, sql_query: str, params=None) -> PlanEstimate:
+        if not self.pool:
+            logger.error("Attempted to explain a query without an initialized connection pool.")
+            raise HTTPException(status_code=500, detail="Database connection is not initialized.")
+
+        connection = self._checkout()
+        failed = False
+        try:
+            with connection.cursor() as cursor:
+                return self._explain(connection, cursor, sql_query)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(connection, failed)
+
+    @staticmethod
+    def _explain(connection, cursor, sql_query: str) -> PlanEstimate:
+        # EXPLAIN PLAN does not need bind values, so keyset placeholders can stay unbound.
+        statement_id = uuid.uuid4().hex[:30]
+        cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql_query}")
+        try:
+            cursor.execute(
+                """
+                SELECT MAX(CASE WHEN id = 0 THEN cost END),
+                       SUM(CASE WHEN operation = 'TABLE ACCESS' OR operation LIKE 'INDEX%' THEN cardinality END)
+                FROM plan_table WHERE statement_id = :statement_id
+                """,
+                statement_id=statement_id,
+            )
+            cost, rows = cursor.fetchone()
+        finally:
+            cursor.execute("DELETE FROM plan_table WHERE statement_id = :statement_id", statement_id=statement_id)
+            connection.commit()
+        return PlanEstimate(rows=float(rows or 0), cost=float(cost or 0))
+
+    def _apply_cost_guard(self, connection, cursor, sql_query: str, plan_key=None) -> None:
+        if not self.cost_guard:
+            return
+        cap_seconds = self.cost_guard.check(
+            sql_query, lambda: self._explain(connection, cursor, sql_query), (self.dialect, plan_key or sql_query)
+        )
+        if cap_seconds:
+            cap_ms = int(cap_seconds * 1000)
+            connection.call_timeout = min(connection.call_timeout, cap_ms) if connection.call_timeout else cap_ms
+
+    def Cancel_Query(self, connection):
+        connection.cancel()
+        logger.info("Cancelled running statement on database connection.")
+
+    def pool_stats(self) -> dict | None:
+        return self.pool.stats() if self.pool else None
 
     def close_pool(self):
         if self.pool:
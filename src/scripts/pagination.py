@@ -0,0 +1,46 @@
+import base64
+import hashlib
+import json
+import math
+from fastapi import HTTPException
+from src.utils.result_set import ResultSet
+
+KEYSET_COLUMN = "ID"
+"""Primary key every report table carries; keyset pages are ordered and sought on it."""
+
+
+def _query_fingerprint(generated_sql: str) -> str:
+    return hashlib.sha256(generated_sql.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(generated_sql: str, last_key) -> str:
+    payload = json.dumps({"q": _query_fingerprint(generated_sql), "k": last_key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, generated_sql: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+    if payload.get("q") != _query_fingerprint(generated_sql):
+        raise HTTPException(status_code=400, detail="Pagination cursor does not belong to this query.")
+    last_key = payload.get("k")
+    # The key is rendered into the page query, so only finite scalar keys are accepted.
+    if isinstance(last_key, bool) or not isinstance(last_key, (str, int, float)):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if isinstance(last_key, float) and not math.isfinite(last_key):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return last_key
+
+
+def split_keyset_page(result_set: ResultSet, limit: int, generated_sql: str) -> tuple[ResultSet, str | None]:
+    """Trims the look-ahead row fetched past `limit` and returns the cursor for the next page, if any."""
+    if len(result_set) <= limit:
+        return result_set, None
+    page = result_set.page(0, limit)
+    return page, encode_cursor(generated_sql, page.rows[-1][page.columns.index(KEYSET_COLUMN)])
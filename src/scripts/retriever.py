@@ -1,24 +1,179 @@
+import json
+import os
+import threading
+import numpy as np
 from src.utils.config import settings
-from langchain_huggingface import HuggingFaceEmbeddings
-from pinecone import Pinecone
+from src.utils.logger import get_logger
+from src.utils.metrics import stage_timer
+from src.utils.tracing import span
 
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-index = pc.Index(settings.INDEX_NAME)
+logger = get_logger("Retriever_Logger")
 
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+_embeddings = None
+_embedding_model = EMBEDDING_MODEL
+_backend = None
+_embeddings_lock = threading.Lock()
+_backend_lock = threading.Lock()
+
+def get_embeddings():
+    """Loads the sentence-transformers model on first use; later calls return the same instance."""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                _embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+                logger.info("Embedding model %s loaded.", EMBEDDING_MODEL)
+    return _embeddings
+
+def set_embeddings(embeddings, model_name: str = EMBEDDING_MODEL) -> None:
+    global _embeddings, _embedding_model
+    _embeddings = embeddings
+    _embedding_model = model_name
+
+def get_embedding_model_name() -> str:
+    """Name of the model queries are embedded with; an index must be built with the same one."""
+    return _embedding_model
+
+def warm_embeddings() -> None:
+    # The first encode call allocates the model's buffers; do it before real traffic arrives.
+    get_embeddings().embed_query("warm up")
+
+
+class RetrieverBackend:
+    """
+    Vector index holding the schema description chunks.
+
+    `query` returns the metadata of the `top_k` closest chunks, best first, each extended
+    with the chunk `id` and its similarity `score`.
+    """
+
+    def query(self, vector: list[float], top_k: int) -> list[dict]:
+        raise NotImplementedError
+
+
+class PineconeBackend(RetrieverBackend):
+    """Schema chunks stored in a hosted Pinecone index; only vectors embedded with `model_name` are matched."""
+
+    def __init__(self, api_key: str, index_name: str, model_name: str):
+        from pinecone import Pinecone
+
+        self.index = Pinecone(api_key=api_key).Index(index_name)
+        self.model_name = model_name
+
+    def query(self, vector: list[float], top_k: int) -> list[dict]:
+        response = self.index.query(
+            vector=list(vector), top_k=top_k, include_metadata=True, filter={"model": {"$eq": self.model_name}}
+        )
+        return [
+            {**match['metadata'], "id": match['id'], "score": match['score']}
+            for match in response.get('matches', [])
+        ]
+
+
+class LocalVectorBackend(RetrieverBackend):
+    """
+    In-process flat index over the schema chunks.
+
+    Vectors are L2-normalized at build time and stored in `<index_path>.npy`, which is
+    memory-mapped on load; chunk ids and metadata live next to it in `<index_path>.json`.
+    A query is one matrix-vector product followed by `argpartition`, so lookups stay
+    sub-millisecond for a corpus of table descriptions and need no network.
+    """
+
+    def __init__(self, index_path: str):
+        self.vectors = np.load(f"{index_path}.npy", mmap_mode="r")
+        with open(f"{index_path}.json", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("model") != get_embedding_model_name():
+            raise ValueError(
+                f"Index {index_path} was embedded with {manifest.get('model')} but queries use "
+                f"{get_embedding_model_name()}; rebuild it with `python -m src.embeddings.ingest`."
+            )
+        self.ids = manifest["ids"]
+        self.metadata = manifest["metadata"]
+        logger.info("Loaded local vector index with %s chunks from %s.", len(self.ids), index_path)
+
+    def query(self, vector: list[float], top_k: int) -> list[dict]:
+        if not self.ids:
+            return []
+        query_vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+
+        scores = self.vectors @ query_vector
+        top_k = min(top_k, scores.shape[0])
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [
+            {**self.metadata[i], "id": self.ids[i], "score": float(scores[i])}
+            for i in ranked
+        ]
+
+    @staticmethod
+    def read(index_path: str) -> tuple[str | None, list[str], np.ndarray, list[dict]]:
+        """Model name, ids, vectors and metadata of an index on disk, or an empty index if there is none."""
+        if not os.path.exists(f"{index_path}.json"):
+            return None, [], np.zeros((0, 0), dtype=np.float32), []
+        with open(f"{index_path}.json", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        return manifest.get("model"), manifest["ids"], np.load(f"{index_path}.npy"), manifest["metadata"]
+
+    @staticmethod
+    def save(index_path: str, ids: list[str], vectors, metadata: list[dict], model_name: str = EMBEDDING_MODEL) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to temporary files first so a running service never maps a half-written index.
+        with open(f"{index_path}.tmp.npy", "wb") as vector_file:
+            np.save(vector_file, matrix)
+        with open(f"{index_path}.tmp.json", "w", encoding="utf-8") as manifest_file:
+            json.dump({"model": model_name, "ids": ids, "metadata": metadata}, manifest_file)
+        os.replace(f"{index_path}.tmp.npy", f"{index_path}.npy")
+        os.replace(f"{index_path}.tmp.json", f"{index_path}.json")
+
+
+def create_backend() -> RetrieverBackend:
+    if settings.RETRIEVER_BACKEND == "local":
+        return LocalVectorBackend(settings.LOCAL_INDEX_PATH)
+    if settings.RETRIEVER_BACKEND == "pinecone":
+        return PineconeBackend(settings.PINECONE_API_KEY, settings.INDEX_NAME, get_embedding_model_name())
+    raise ValueError(f"Unknown RETRIEVER_BACKEND: {settings.RETRIEVER_BACKEND}")
+
+def get_backend() -> RetrieverBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+def set_backend(backend: RetrieverBackend | None) -> None:
+    global _backend
+    _backend = backend
 
 def semantic_search(query: str, top_k: int = 3) -> list:
     try:
-        query_embedding =  embeddings.embed_query(query)
-        
-        response = index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
-        
-        return [match['metadata'] for match in response.get('matches', [])]
-    
+        with span("semantic_search", top_k=top_k) as search_span, stage_timer("rag_retrieval"):
+            with span("embed_query"):
+                query_embedding = get_embeddings().embed_query(query)
+            with span("index_query", backend=settings.RETRIEVER_BACKEND):
+                matches = get_backend().query(query_embedding, top_k)
+            search_span.set_attributes(
+                chunk_ids=[match.get("id") for match in matches],
+                scores=[round(match["score"], 4) for match in matches if "score" in match],
+            )
+            return matches
+
     except Exception as e:
         print(f"Error during semantic search: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,224 @@
+import bisect
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from src.scripts.schema_details import get_metadata
+from src.utils.config import settings
+from src.utils.logger import get_logger
+from src.utils.result_set import ResultSet
+
+logger = get_logger("Schema_Logger")
+
+PRIMARY_KEY_PATTERN = re.compile(r"PRIMARY KEY \(([^)]*)\)")
+
+MYSQL_COLUMNS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_KEY
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+ORACLE_COLUMNS_QUERY = """
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.NULLABLE,
+           CASE WHEN pk.COLUMN_NAME IS NOT NULL THEN 'PRI' END
+    FROM ALL_TAB_COLUMNS c
+    LEFT JOIN (
+        SELECT cc.TABLE_NAME, cc.COLUMN_NAME
+        FROM ALL_CONSTRAINTS k
+        JOIN ALL_CONS_COLUMNS cc ON cc.OWNER = k.OWNER AND cc.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+        WHERE k.CONSTRAINT_TYPE = 'P' AND k.OWNER = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA')
+    ) pk ON pk.TABLE_NAME = c.TABLE_NAME AND pk.COLUMN_NAME = c.COLUMN_NAME
+    WHERE c.OWNER = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') AND c.TABLE_NAME IN ({placeholders})
+    ORDER BY c.TABLE_NAME, c.COLUMN_ID
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnInfo:
+    name: str
+    data_type: str
+    nullable: bool = True
+    primary_key: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class TableSchema:
+    name: str
+    columns: tuple[ColumnInfo, ...]
+
+    @property
+    def fragment(self) -> str:
+        """Compact one-line description used in prompts, e.g. `TABLE:ID VARCHAR2 NOT NULL,HOST VARCHAR2,PRIMARY KEY (ID)`."""
+        parts = [f"{c.name} {c.data_type}{'' if c.nullable else ' NOT NULL'}" for c in self.columns]
+        keys = [c.name for c in self.columns if c.primary_key]
+        if keys:
+            parts.append(f"PRIMARY KEY ({', '.join(keys)})")
+        return f"{self.name}:{','.join(parts)}"
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """Immutable view of the catalog; a refresh swaps in a new snapshot instead of mutating this one."""
+
+    version: str
+    tables: dict[str, TableSchema]
+    source: str
+    prompt_lines: tuple[str, ...]
+    suggestions: tuple[dict, ...]
+    suggestion_keys: tuple[str, ...]
+
+
+def describe_tables(names: list[str]) -> str:
+    if len(names) <= 1:
+        return "".join(names)
+    return f"{', '.join(names[:-1])} and {names[-1]}"
+
+
+def build_snapshot(tables: list[TableSchema], source: str) -> CatalogSnapshot:
+    fragments = [table.fragment for table in tables]
+    prompt_lines = (f"The database tables to query are {describe_tables([t.name for t in tables])}:", *fragments)
+    version = hashlib.sha256("\n".join(fragments).encode("utf-8")).hexdigest()[:16]
+
+    suggestions = [{"label": table.name, "type": "table"} for table in tables]
+    suggestions += [
+        {"label": column.name, "table": table.name, "type": "column"} for table in tables for column in table.columns
+    ]
+    # Sorted by upper-cased label so prefix lookups are a binary search.
+    suggestions.sort(key=lambda suggestion: (suggestion["label"].upper(), suggestion.get("table", "")))
+    return CatalogSnapshot(
+        version=version,
+        tables={table.name: table for table in tables},
+        source=source,
+        prompt_lines=prompt_lines,
+        suggestions=tuple(suggestions),
+        suggestion_keys=tuple(suggestion["label"].upper() for suggestion in suggestions),
+    )
+
+
+def parse_static_metadata(schema_details: list[str], table_names: list[str]) -> list[TableSchema]:
+    """Reads the `TABLE:COLUMN TYPE ...,PRIMARY KEY (ID)` strings of `get_metadata` into table schemas."""
+    text = "".join(schema_details)
+    # The header sentence also names each table followed by a colon, so take the last occurrence.
+    starts = sorted((text.rfind(f"{name}:"), name) for name in table_names if f"{name}:" in text)
+    tables = []
+    for (start, name), (end, _) in zip(starts, starts[1:] + [(len(text), None)]):
+        body = text[start + len(name) + 1:end]
+        key_match = PRIMARY_KEY_PATTERN.search(body)
+        keys = {key.strip() for key in key_match.group(1).split(",")} if key_match else set()
+        columns = []
+        for definition in body.split(","):
+            tokens = definition.split()
+            if len(tokens) < 2 or tokens[0] == "PRIMARY" or not tokens[0].isidentifier():
+                continue
+            columns.append(ColumnInfo(tokens[0], tokens[1], "NOT NULL" not in definition, tokens[0] in keys))
+        tables.append(TableSchema(name, tuple(columns)))
+    # Keep the configured table order rather than the order of appearance.
+    return sorted(tables, key=lambda table: table_names.index(table.name))
+
+
+class SchemaCatalog:
+    """
+    Versioned catalog of the report tables the application may query.
+
+    It starts from the static description in `schema_details.get_metadata` and is replaced by
+    what the database reports once `load` receives the rows of `introspection_query`, which the
+    application runs through its own pool on startup and then on an interval. Each state is an
+    immutable `CatalogSnapshot` carrying a version hash of the per-table fragments. The version
+    keys the translation and semantic caches, so a schema change invalidates them.
+    """
+
+    def __init__(self, table_names: list[str]):
+        self.table_names = [name.upper() for name in table_names]
+        self._snapshot = build_snapshot(parse_static_metadata(get_metadata() or [], self.table_names), "static")
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def prompt_lines(self) -> tuple[str, ...]:
+        return self._snapshot.prompt_lines
+
+    def fragments(self) -> dict[str, str]:
+        """Compact description of each table, keyed by table name, for indexing or pruned prompts."""
+        return {name: table.fragment for name, table in self._snapshot.tables.items()}
+
+    def introspection_query(self, dialect: str) -> tuple[str, tuple]:
+        if dialect == "mysql":
+            placeholders = ", ".join("%s" for _ in self.table_names)
+            return MYSQL_COLUMNS_QUERY.format(placeholders=placeholders), tuple(self.table_names)
+        placeholders = ", ".join(f":{i}" for i in range(1, len(self.table_names) + 1))
+        return ORACLE_COLUMNS_QUERY.format(placeholders=placeholders), tuple(self.table_names)
+
+    def load(self, result_set: ResultSet) -> bool:
+        """Replaces the catalog with introspected columns. Returns True when the schema version changed."""
+        columns_by_table: dict[str, list[ColumnInfo]] = {}
+        for table_name, column_name, data_type, nullable, column_key in result_set.rows:
+            columns_by_table.setdefault(table_name.upper(), []).append(
+                ColumnInfo(column_name, data_type.upper(), str(nullable).upper() in ("YES", "Y"), column_key == "PRI")
+            )
+        if not columns_by_table:
+            logger.warning("Schema introspection returned no columns; keeping the current catalog.")
+            return False
+
+        missing = [name for name in self.table_names if name not in columns_by_table]
+        if missing:
+            logger.warning("Tables missing from schema introspection: %s", ', '.join(missing))
+        tables = [TableSchema(name, tuple(columns_by_table[name])) for name in self.table_names if name in columns_by_table]
+        snapshot = build_snapshot(tables, "database")
+
+        with self._lock:
+            self.refreshes += 1
+            changed = snapshot.version != self._snapshot.version
+            self._snapshot = snapshot
+        if changed:
+            logger.info("Schema catalog updated to version %s (%s tables).", snapshot.version, len(tables))
+        return changed
+
+    def suggest(self, prefix: str = "", limit: int = 50) -> list[dict]:
+        """Table and column names starting with `prefix`, followed by names merely containing it."""
+        snapshot = self._snapshot
+        needle = prefix.strip().upper()
+        if not needle:
+            return list(snapshot.suggestions[:limit])
+
+        start = bisect.bisect_left(snapshot.suggestion_keys, needle)
+        matches = []
+        for index in range(start, len(snapshot.suggestions)):
+            if len(matches) >= limit or not snapshot.suggestion_keys[index].startswith(needle):
+                break
+            matches.append(snapshot.suggestions[index])
+        if len(matches) < limit:
+            matches += [
+                suggestion for key, suggestion in zip(snapshot.suggestion_keys, snapshot.suggestions)
+                if needle in key and not key.startswith(needle)
+            ][:limit - len(matches)]
+        return matches
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "source": snapshot.source,
+            "tables": len(snapshot.tables),
+            "columns": sum(len(table.columns) for table in snapshot.tables.values()),
+            "refreshes": self.refreshes,
+        }
+
+
+_schema_catalog: SchemaCatalog | None = None
+_catalog_lock = threading.Lock()
+
+def get_schema_catalog() -> SchemaCatalog:
+    global _schema_catalog
+    if _schema_catalog is None:
+        with _catalog_lock:
+            if _schema_catalog is None:
+                _schema_catalog = SchemaCatalog([name.strip() for name in settings.SCHEMA_TABLES.split(",") if name.strip()])
+    return _schema_catalog
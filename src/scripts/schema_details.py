@@ -17,5 +17,5 @@ def get_metadata() -> list | None:
         ]
 
     except Exception as e:
-        logger.error(f"Error retrieving metadata: {e}")
-        raise HTTPException(status_code=500, detail="Schema metadata retrieval failed.")
\ No newline at end of file
+        logger.error("Error retrieving metadata: %s", e)
+        raise HTTPException(status_code=500, detail="Schema metadata retrieval failed.")
@@ -0,0 +1,264 @@
+import math
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+from src.scripts.schema_catalog import SchemaCatalog, TableSchema, describe_tables, get_schema_catalog
+from src.utils.config import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import stage_timer
+from src.utils.tracing import span
+
+logger = get_logger("Schema_Logger")
+
+QUERY_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+JOIN_KEY_PATTERN = re.compile(r"(ID|IP|_NAME|_NUM|_CODE)$")
+MAX_CACHED_TERMS = 4096
+"""Query terms whose matches one `_LexicalIndex` remembers; questions are free text, so this is bounded."""
+
+STOPWORDS = frozenset({
+    "a", "all", "an", "and", "any", "are", "as", "at", "be", "by", "can", "do", "does", "each", "either", "every",
+    "find", "for", "from", "get", "give", "has", "have", "how", "i", "in", "is", "it", "its", "list", "many", "me",
+    "more", "most", "much", "my", "of", "on", "or", "per", "please", "report", "reports", "show", "than", "that",
+    "the", "their", "them", "there", "these", "this", "those", "to", "together", "want", "what", "where", "which",
+    "who", "with",
+})
+
+SYNONYMS = {
+    "port": ("prts",),
+    "ip": ("dvcip",),
+    "address": ("dvcip",),
+    "device": ("dvc",),
+    "location": ("loc",),
+    "site": ("loc",),
+    "router": ("rtr",),
+    "switch": ("leaf", "spine", "spin"),
+    "switche": ("leaf", "spine", "spin"),
+    "hostname": ("host",),
+    "utilization": ("util", "percent"),
+    "usage": ("util", "used"),
+    "optical": ("dom",),
+    "monitoring": ("dom",),
+    "sfp": ("issfp",),
+    "software": ("sw",),
+    "vendor": ("manufacturer",),
+    "serial": ("serial",),
+    "linecard": ("card",),
+}
+"""Maps words users type onto the abbreviations used in table and column names."""
+
+
+def query_terms(text: str) -> list[str]:
+    """Lower-cased, singularized content words of a question."""
+    terms = []
+    for word in QUERY_TERM_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _name_matches(term: str, tokens: frozenset[str], compact: str) -> bool:
+    # Names split words inconsistently (`TOTA_L100G_PRTS`, `FRE_E10G_PRTS`), so besides whole
+    # underscore tokens a term also matches inside the name with underscores removed.
+    if term in tokens:
+        return True
+    return (len(term) >= 3 or any(ch.isdigit() for ch in term)) and term in compact
+
+
+@dataclass(frozen=True, slots=True)
+class LinkedSchema:
+    """Tables and columns selected for one question, and the schema block rendered from them."""
+
+    tables: tuple[TableSchema, ...]
+    scores: dict[str, float]
+    matched_terms: tuple[str, ...]
+    pruned: bool
+
+    def render(self) -> str:
+        header = f"The database tables to query are {describe_tables([table.name for table in self.tables])}:"
+        return "\n".join([header, *(table.fragment for table in self.tables)])
+
+
+class _LexicalIndex:
+    """Table and column names of one catalog snapshot, tokenized for term lookups."""
+
+    def __init__(self, tables: list[TableSchema]):
+        self.tables = tables
+        self.entries = []
+        for table in tables:
+            self.entries.append((table.name, None, *self._tokenize(table.name)))
+            for column in table.columns:
+                self.entries.append((table.name, column.name, *self._tokenize(column.name)))
+        # Thread-safe LRU, so arbitrary user words cannot grow the index without limit.
+        self.matches = lru_cache(maxsize=MAX_CACHED_TERMS)(self._find_matches)
+        self._embeddings: np.ndarray | None = None
+
+    @staticmethod
+    def _tokenize(name: str) -> tuple[frozenset[str], str]:
+        lowered = name.lower()
+        return frozenset(lowered.split("_")), lowered.replace("_", "")
+
+    def _find_matches(self, term: str) -> tuple[tuple[str, str | None], ...]:
+        """(table, column) pairs whose name matches `term` directly or through a synonym; column is None for a table name."""
+        targets = (term, *SYNONYMS.get(term, ()))
+        return tuple(
+            (table, column) for table, column, tokens, compact in self.entries
+            if any(_name_matches(target, tokens, compact) for target in targets)
+        )
+
+
+class SchemaLinker:
+    """
+    Picks the tables and columns a question refers to, so the prompt carries only those.
+
+    Question words are matched against table and column names (after synonym expansion)
+    and weighted by how rare the match is across the schema. A table scores the sum of the
+    weights of the words that hit it, doubled for hits on the table name itself. Tables
+    named by the question, or scoring at least `min_relative_score` of the best score, are
+    kept. Within a kept table the prompt lists the matched columns, the primary key and
+    identifier-like columns shared with another kept table (likely join keys). A table hit
+    only by name keeps all of its columns.
+    With `embedding_weight` above zero, the cosine similarity between the question and
+    each table fragment is added to the normalized lexical score. A question matching
+    nothing falls back to the full schema.
+    """
+
+    def __init__(
+        self,
+        catalog: SchemaCatalog,
+        min_relative_score: float = 0.5,
+        embedding_weight: float = 0.0,
+        embed_query=None,
+        embed_documents=None,
+    ):
+        self.catalog = catalog
+        self.min_relative_score = min_relative_score
+        self.embedding_weight = embedding_weight
+        self.embed_query = embed_query
+        self.embed_documents = embed_documents
+        self._index: _LexicalIndex | None = None
+        self._index_version: str | None = None
+        self._lock = threading.Lock()
+
+    def _get_index(self) -> _LexicalIndex:
+        snapshot = self.catalog.snapshot
+        if snapshot.version != self._index_version:
+            with self._lock:
+                if snapshot.version != self._index_version:
+                    self._index = _LexicalIndex(list(snapshot.tables.values()))
+                    self._index_version = snapshot.version
+        return self._index
+
+    def _embedding_scores(self, index: _LexicalIndex, user_query: str, query_vector) -> dict[str, float]:
+        if index._embeddings is None:
+            vectors = np.asarray(self.embed_documents([table.fragment for table in index.tables]), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            index._embeddings = vectors / np.where(norms == 0, 1, norms)
+        if query_vector is None:
+            query_vector = self.embed_query(user_query)
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        similarities = index._embeddings @ (vector / norm if norm else vector)
+        return {table.name: float(score) for table, score in zip(index.tables, similarities)}
+
+    def link(self, user_query: str, query_vector=None) -> LinkedSchema:
+        index = self._get_index()
+        terms = list(dict.fromkeys(query_terms(user_query)))
+        entry_count = len(index.entries)
+
+        table_scores: dict[str, float] = {}
+        column_hits: dict[str, set[str]] = {}
+        name_hits: set[str] = set()
+        matched_terms = []
+        for term in terms:
+            matches = index.matches(term)
+            if not matches:
+                continue
+            matched_terms.append(term)
+            weight = math.log(1 + entry_count / len(matches))
+            for table_name in {table for table, _ in matches}:
+                table_scores[table_name] = table_scores.get(table_name, 0.0) + weight
+            for table_name, column_name in matches:
+                if column_name is None:
+                    table_scores[table_name] += weight
+                    name_hits.add(table_name)
+                else:
+                    column_hits.setdefault(table_name, set()).add(column_name)
+
+        if not table_scores:
+            return LinkedSchema(tuple(index.tables), {}, (), False)
+
+        best = max(table_scores.values())
+        scores = {name: score / best for name, score in table_scores.items()}
+        if self.embedding_weight > 0 and self.embed_documents is not None:
+            for name, similarity in self._embedding_scores(index, user_query, query_vector).items():
+                scores[name] = scores.get(name, 0.0) + self.embedding_weight * similarity
+            best = max(scores.values())
+            scores = {name: score / best for name, score in scores.items()}
+
+        selected = [
+            table for table in index.tables
+            if table.name in name_hits or scores.get(table.name, 0.0) >= self.min_relative_score
+        ]
+        column_counts: dict[str, int] = {}
+        for table in selected:
+            for column in table.columns:
+                column_counts[column.name] = column_counts.get(column.name, 0) + 1
+
+        pruned_tables = []
+        for table in selected:
+            hits = column_hits.get(table.name)
+            if not hits or (table.name in name_hits and len(hits) < 2):
+                pruned_tables.append(table)
+                continue
+            columns = tuple(
+                column for column in table.columns
+                if column.name in hits or column.primary_key
+                or (column_counts[column.name] > 1 and JOIN_KEY_PATTERN.search(column.name))
+            )
+            pruned_tables.append(TableSchema(table.name, columns))
+
+        pruned = len(pruned_tables) < len(index.tables) or any(
+            len(linked.columns) < len(table.columns) for linked, table in zip(pruned_tables, selected)
+        )
+        return LinkedSchema(tuple(pruned_tables), scores, tuple(matched_terms), pruned)
+
+    def schema_context(self, user_query: str, query_vector=None) -> str:
+        """Minimal schema block for `user_query`, for `SqlGenerator.generate(schema_context=...)`."""
+        with span("schema_linking") as link_span, stage_timer("schema_linking"):
+            linked = self.link(user_query, query_vector)
+            context = linked.render()
+            link_span.set_attributes(
+                tables=[table.name for table in linked.tables],
+                columns=sum(len(table.columns) for table in linked.tables),
+                pruned=linked.pruned,
+                schema_chars=len(context),
+            )
+        return context
+
+
+_schema_linker: SchemaLinker | None = None
+
+def get_schema_linker() -> SchemaLinker:
+    global _schema_linker
+    if _schema_linker is None:
+        embed_query = embed_documents = None
+        if settings.SCHEMA_LINKING_EMBEDDING_WEIGHT > 0:
+            from src.scripts.retriever import get_embeddings
+
+            embed_query = lambda text: get_embeddings().embed_query(text)
+            embed_documents = lambda texts: get_embeddings().embed_documents(texts)
+        _schema_linker = SchemaLinker(
+            get_schema_catalog(),
+            min_relative_score=settings.SCHEMA_LINKING_MIN_RELATIVE_SCORE,
+            embedding_weight=settings.SCHEMA_LINKING_EMBEDDING_WEIGHT,
+            embed_query=embed_query,
+            embed_documents=embed_documents,
+        )
+    return _schema_linker
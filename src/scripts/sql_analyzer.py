@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from fastapi import HTTPException
+from src.scripts.pagination import KEYSET_COLUMN
+from src.utils.logger import get_logger
+
+logger = get_logger("Sql_Analyzer_Logger")
+
+PAGE_ALIAS = "page_src"
+ANALYSIS_CACHE_SIZE = 1024
+
+# Nodes that make a statement more than a read, wherever they appear in the tree.
+WRITE_NODES = (
+    exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop,
+    exp.Alter, exp.Command, exp.Into, exp.Lock,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SqlAnalysis:
+    """
+    Parsed form of one generated query and the facts the request pipeline needs from it.
+
+    Built by `analyze_sql`, which memoizes on the SQL text, so a query is tokenized and parsed
+    once no matter how many stages ask about it. `expression` is shared between callers and
+    must not be mutated; the rewriting helpers work on copies.
+    """
+
+    sql: str
+    dialect: str
+    expression: exp.Expression | None
+    is_select: bool
+    has_aggregate: bool
+    has_order_by: bool
+    has_limit: bool
+    tables: frozenset[str]
+    supports_keyset: bool
+
+    def paginate(self, limit: int, offset: int = 0) -> str:
+        """Renders the query restricted to `limit` rows starting at `offset`, in the analysis dialect."""
+        query = self._pageable().limit(int(limit))
+        if offset:
+            query = query.offset(int(offset))
+        return query.sql(dialect=self.dialect)
+
+    def cap_rows(self, max_rows: int) -> str:
+        return self.paginate(max_rows)
+
+    def keyset_page(self, limit: int, offset: int = 0, last_key=None) -> tuple[str, tuple]:
+        """
+        Renders the query ordered on its `KEYSET_COLUMN` and restricted to one page; requires `supports_keyset`.
+
+        With `last_key` the page starts right after that key, so the database seeks the primary
+        key index instead of scanning and discarding `offset` rows. Without it the same ordering
+        is paged by offset, which keeps offset and keyset pages identical. For MySQL the key is
+        rendered as an escaped literal: the driver substitutes every `%s` in the statement text,
+        including those inside literals such as `LIKE '%spine%'`. Oracle binds it as `:last_key`.
+        """
+        query = self.expression.copy()
+        key = _key_expression(query)
+        params = ()
+        if last_key is not None:
+            if self.dialect == "mysql":
+                value = exp.Literal.string(last_key) if isinstance(last_key, str) else exp.Literal.number(last_key)
+            else:
+                value, params = exp.Placeholder(this="last_key"), (last_key,)
+            query = query.where(exp.GT(this=key.copy(), expression=value))
+        query = query.order_by(key.copy()).limit(int(limit))
+        if offset:
+            query = query.offset(int(offset))
+        return query.sql(dialect=self.dialect), params
+
+    def _pageable(self) -> exp.Select:
+        # A plain SELECT takes the clauses directly; set operations and queries that already
+        # restrict their rows are wrapped so the new clauses apply to the whole result.
+        if isinstance(self.expression, exp.Select) and not self.has_limit:
+            return self.expression.copy()
+        return exp.select("*").from_(self.expression.subquery(PAGE_ALIAS, copy=True))
+
+
+def _is_aggregate(select: exp.Select) -> bool:
+    if select.args.get("group") or select.args.get("having"):
+        return True
+    for projection in select.expressions:
+        for function in projection.find_all(exp.AggFunc):
+            # COUNT(*) OVER (...) keeps one row per input row; only plain aggregates collapse rows.
+            if not isinstance(function.parent, exp.Window) and function.parent_select is select:
+                return True
+    return False
+
+
+def _key_expression(select: exp.Select) -> exp.Expression | None:
+    """
+    The expression behind the single `KEYSET_COLUMN` in the select's output, or None if there is none or it is ambiguous.
+
+    `*` only counts for a single table, where it yields exactly one `ID`; over a join it may
+    yield several.
+    """
+    stars, keys = [], []
+    for projection in select.expressions:
+        if isinstance(projection, exp.Star) or (isinstance(projection, exp.Column) and projection.is_star):
+            stars.append(projection)
+        elif projection.alias_or_name.upper() == KEYSET_COLUMN:
+            keys.append(projection)
+    if stars:
+        source = select.args.get("from")
+        if keys or len(stars) > 1 or select.args.get("joins") or source is None or not isinstance(source.this, exp.Table):
+            return None
+        return exp.column(KEYSET_COLUMN)
+    if len(keys) != 1:
+        return None
+    key = keys[0].this if isinstance(keys[0], exp.Alias) else keys[0]
+    # The key is filtered on in WHERE, where window functions are not allowed.
+    return None if key.find(exp.Window) else key
+
+
+def _branches(expression: exp.Expression) -> list[exp.Select]:
+    if isinstance(expression, exp.SetOperation):
+        return _branches(expression.left) + _branches(expression.right)
+    if isinstance(expression, exp.Subquery):
+        return _branches(expression.this)
+    return [expression] if isinstance(expression, exp.Select) else []
+
+
+def _not_a_select(sql: str, dialect: str) -> SqlAnalysis:
+    return SqlAnalysis(sql, dialect, None, False, False, False, False, frozenset(), False)
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze_sql(sql: str, dialect: str = "mysql") -> SqlAnalysis:
+    """Parses `sql` in `dialect` and classifies it. Text that is not exactly one statement is reported as not a SELECT."""
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read=dialect) if statement is not None]
+    except SqlglotError as e:
+        logger.warning("Could not parse generated SQL: %s", e)
+        return _not_a_select(sql, dialect)
+
+    if len(statements) != 1:
+        return _not_a_select(sql, dialect)
+    expression = statements[0]
+    branches = _branches(expression)
+    if not branches or not isinstance(expression, (exp.Select, exp.SetOperation)) or expression.find(*WRITE_NODES):
+        return _not_a_select(sql, dialect)
+
+    cte_names = {cte.alias_or_name.upper() for cte in expression.find_all(exp.CTE)}
+    tables = frozenset(
+        table.name.upper() for table in expression.find_all(exp.Table) if table.name.upper() not in cte_names
+    )
+    has_aggregate = any(_is_aggregate(select) for select in branches)
+    has_order_by = expression.args.get("order") is not None
+    has_limit = any(expression.args.get(clause) is not None for clause in ("limit", "offset", "fetch"))
+    supports_keyset = (
+        isinstance(expression, exp.Select)
+        and not (has_aggregate or has_order_by or has_limit or expression.args.get("distinct"))
+        and _key_expression(expression) is not None
+    )
+    return SqlAnalysis(sql, dialect, expression, True, has_aggregate, has_order_by, has_limit, tables, supports_keyset)
+
+
+def analyze_select(sql: str, dialect: str = "mysql") -> SqlAnalysis:
+    """`analyze_sql`, rejecting anything but a single read-only SELECT with a 400."""
+    analysis = analyze_sql(sql, dialect)
+    if not analysis.is_select:
+        logger.warning("Rejected generated SQL that is not a single SELECT: %s", sql)
+        raise HTTPException(status_code=400, detail="Failed to process the input query into a valid SQL statement.")
+    return analysis
@@ -0,0 +1,376 @@
+"""
+Shared tiers for the translation and result caches.
+
+Each API worker keeps its own in-memory caches. A `CacheBackend` adds a tier behind them
+that every worker sees, so a translation or result computed by one worker is a hit in all
+of them:
+
+- `SqliteCacheBackend`: a WAL-mode SQLite file, by default on `/dev/shm`, shared by the
+  uvicorn workers of one host. Reads are a single indexed lookup in shared memory.
+- `RedisCacheBackend`: a Redis-compatible server for deployments spanning several hosts.
+  The client is pluggable; `create_cache_backend` builds one from `CACHE_URL` with the
+  optional `redis` package.
+
+Values are opaque bytes with a TTL and optional tags, which are used for invalidation by
+table. `get_or_compute` takes a short lease on a key, so concurrent misses for the same key
+across workers compute the value once while the others wait for it.
+
+The backend methods block on a file lock or a network round trip; callers on the event
+loop run them with `asyncio.to_thread`, as `get_or_compute` does.
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Iterable
+from src.utils.config import settings
+from src.utils.logger import get_logger
+
+logger = get_logger("Cache_Logger")
+
+
+class CacheBackend:
+    """Byte-valued store with TTLs, tags, counters and leases, shared between processes."""
+
+    name = "base"
+
+    def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete_tagged(self, tag: str) -> int:
+        """Deletes every entry stored with `tag`; returns how many there were."""
+        raise NotImplementedError
+
+    def clear(self, prefix: str) -> int:
+        """Deletes every entry whose key starts with `prefix`."""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def try_lock(self, key: str, lease_seconds: float) -> str | None:
+        """Takes the lease on `key` unless another holder's lease is still running; returns its token."""
+        raise NotImplementedError
+
+    def unlock(self, key: str, token: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+    def close(self) -> None:
+        pass
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[bytes | None]],
+        ttl_seconds: float,
+        tags: Iterable[str] = (),
+        lease_seconds: float = 30.0,
+        poll_seconds: float = 0.02,
+    ) -> tuple[bytes | None, bool]:
+        """
+        Returns `(value, computed)`. On a miss only the lease holder runs `compute`.
+
+        Other callers poll until the value appears, or take over once the lease is released
+        or expires without one. `compute` may return None for a value that must not be
+        stored; its caller then gets None back.
+        """
+        while True:
+            value = await asyncio.to_thread(self.get, key)
+            if value is not None:
+                return value, False
+            token = await asyncio.to_thread(self.try_lock, key, lease_seconds)
+            if token is not None:
+                try:
+                    # The previous holder may have stored the value just before releasing.
+                    value = await asyncio.to_thread(self.get, key)
+                    if value is not None:
+                        return value, False
+                    value = await compute()
+                    if value is not None:
+                        await asyncio.to_thread(self.set, key, value, ttl_seconds, list(tags))
+                    return value, True
+                finally:
+                    # Shielded so a cancelled caller still releases the lease instead of leaving it to expire.
+                    await asyncio.shield(asyncio.to_thread(self.unlock, key, token))
+            deadline = time.monotonic() + lease_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(poll_seconds)
+                value = await asyncio.to_thread(self.get, key)
+                if value is not None:
+                    return value, False
+                if not await asyncio.to_thread(self._locked, key):
+                    break
+
+    def _locked(self, key: str) -> bool:
+        raise NotImplementedError
+
+
+def default_sqlite_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "nl2sql-cache.sqlite")
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Cache shared by the worker processes of one host through a SQLite file.
+
+    The file uses WAL journaling, so readers never wait on writers. On tmpfs nothing is
+    written to disk. Each thread keeps its own connection. Expired entries are pruned
+    when values are stored, and once the stored values exceed `max_bytes` the entries
+    closest to expiry go first. Triggers keep the total size in the `meta` table, so
+    checking the budget does not scan the entries.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str | None = None, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path or default_sqlite_path()
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        self._write(self._create_schema)
+        logger.info("Shared cache at %s.", self.path)
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        for statement in (
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, size INTEGER NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at)",
+            "CREATE TABLE IF NOT EXISTS tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)) WITHOUT ROWID",
+            "CREATE INDEX IF NOT EXISTS tags_key ON tags (key)",
+            "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+            # Created in the same transaction as the starting total, so the two always agree.
+            "INSERT OR IGNORE INTO meta (key, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries",
+            "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries "
+            "BEGIN UPDATE meta SET value = value + new.size WHERE key = 'bytes'; END",
+            "CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries "
+            "BEGIN UPDATE meta SET value = value + new.size - old.size WHERE key = 'bytes'; END",
+            "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries "
+            "BEGIN UPDATE meta SET value = value - old.size WHERE key = 'bytes'; END",
+        ):
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _write(self, statements: Callable[[sqlite3.Connection], object]):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    def get(self, key: str) -> bytes | None:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()) -> None:
+        tags = list(tags)
+
+        def statements(connection: sqlite3.Connection) -> None:
+            now = time.time()
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would not fire the size trigger.
+            connection.execute(
+                "INSERT INTO entries (key, value, expires_at, size) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at, size = excluded.size",
+                (key, value, now + ttl_seconds, len(value)),
+            )
+            connection.execute("DELETE FROM tags WHERE key = ?", (key,))
+            connection.executemany("INSERT OR IGNORE INTO tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+            self._prune(connection, now)
+
+        self._write(statements)
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM tags WHERE key IN (SELECT key FROM entries WHERE expires_at <= ?)", (now,))
+        connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        excess = connection.execute("SELECT value FROM meta WHERE key = 'bytes'").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY expires_at"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", victims)
+        connection.executemany("DELETE FROM tags WHERE key = ?", victims)
+
+    def delete(self, key: str) -> bool:
+        def statements(connection: sqlite3.Connection) -> bool:
+            connection.execute("DELETE FROM tags WHERE key = ?", (key,))
+            return connection.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount > 0
+
+        return self._write(statements)
+
+    def delete_tagged(self, tag: str) -> int:
+        def statements(connection: sqlite3.Connection) -> int:
+            keys = [(key,) for (key,) in connection.execute("SELECT key FROM tags WHERE tag = ?", (tag,))]
+            deleted = sum(connection.execute("DELETE FROM entries WHERE key = ?", key).rowcount for key in keys)
+            connection.executemany("DELETE FROM tags WHERE key = ?", keys)
+            return deleted
+
+        return self._write(statements)
+
+    def clear(self, prefix: str) -> int:
+        def statements(connection: sqlite3.Connection) -> int:
+            connection.execute("DELETE FROM tags WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            return connection.execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)).rowcount
+
+        return self._write(statements)
+
+    def incr(self, key: str) -> int:
+        return self._write(lambda connection: connection.execute(
+            "INSERT INTO counters (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1 RETURNING value",
+            (key,),
+        ).fetchone()[0])
+
+    def counter(self, key: str) -> int:
+        row = self._connection().execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def try_lock(self, key: str, lease_seconds: float) -> str | None:
+        token = uuid.uuid4().hex
+
+        def statements(connection: sqlite3.Connection) -> bool:
+            now = time.time()
+            connection.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            return connection.execute(
+                "INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)", (key, token, now + lease_seconds)
+            ).rowcount == 1
+
+        return token if self._write(statements) else None
+
+    def unlock(self, key: str, token: str) -> None:
+        self._connection().execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    def _locked(self, key: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM locks WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone() is not None
+
+    def stats(self) -> dict:
+        connection = self._connection()
+        entries = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        size = connection.execute("SELECT value FROM meta WHERE key = 'bytes'").fetchone()[0]
+        return {"backend": self.name, "path": self.path, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+# Deletes the lease only while it still holds the caller's token.
+UNLOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache shared across hosts through a Redis-compatible server.
+
+    `client` needs the `get`, `set` (with `px`/`nx`), `delete`, `incr`, `sadd`, `smembers`,
+    `pexpire`, `scan_iter` and `eval` calls of `redis.Redis`. Keys are namespaced with
+    `prefix`. Leases are `SET NX PX` keys, released by a compare-and-delete script so an
+    expired holder never releases a lease another worker has taken since.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "nl2sql:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, tags: Iterable[str] = ()) -> None:
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+        self.client.set(self.prefix + key, value, px=ttl_ms)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            self.client.sadd(tag_key, key)
+            self.client.pexpire(tag_key, ttl_ms)
+
+    def delete(self, key: str) -> bool:
+        return bool(self.client.delete(self.prefix + key))
+
+    def delete_tagged(self, tag: str) -> int:
+        tag_key = f"{self.prefix}tag:{tag}"
+        keys = [member.decode() if isinstance(member, bytes) else member for member in self.client.smembers(tag_key)]
+        deleted = self.client.delete(*(self.prefix + key for key in keys)) if keys else 0
+        self.client.delete(tag_key)
+        return deleted
+
+    def clear(self, prefix: str) -> int:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}{prefix}*"))
+        return self.client.delete(*keys) if keys else 0
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(f"{self.prefix}counter:{key}"))
+
+    def counter(self, key: str) -> int:
+        value = self.client.get(f"{self.prefix}counter:{key}")
+        return int(value) if value is not None else 0
+
+    def try_lock(self, key: str, lease_seconds: float) -> str | None:
+        token = uuid.uuid4().hex
+        acquired = self.client.set(f"{self.prefix}lock:{key}", token, nx=True, px=max(1, int(lease_seconds * 1000)))
+        return token if acquired else None
+
+    def unlock(self, key: str, token: str) -> None:
+        self.client.eval(UNLOCK_SCRIPT, 1, f"{self.prefix}lock:{key}", token)
+
+    def _locked(self, key: str) -> bool:
+        return self.client.get(f"{self.prefix}lock:{key}") is not None
+
+
+def create_cache_backend() -> CacheBackend | None:
+    """The shared tier selected by `CACHE_BACKEND`, or None to keep the caches per process."""
+    if settings.CACHE_BACKEND == "local":
+        return None
+    if settings.CACHE_BACKEND == "sqlite":
+        return SqliteCacheBackend(settings.CACHE_SQLITE_PATH or None, settings.CACHE_SHARED_MAX_BYTES)
+    if settings.CACHE_BACKEND == "redis":
+        import redis
+
+        return RedisCacheBackend(redis.Redis.from_url(settings.CACHE_URL), prefix=settings.CACHE_KEY_PREFIX)
+    raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
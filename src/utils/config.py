@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-from src.utils.logger import get_logger
+from src.utils.logger import configure_logging, get_logger
 
 logger = get_logger("config")
 
@@ -42,11 +42,185 @@ class Settings(BaseSettings):
     DB_CONNECTION_INCREMENT: int = 1
     """Number of connections to add to the pool when more are needed. Default is 1."""
 
-    PINECONE_API_KEY: str
-    """Pinecone API key for rag model"""
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS: float = 5.0
+    """Seconds a query waits for a pooled connection when all are in use before failing with 503. Default is 5."""
 
-    INDEX_NAME: str
-    """Index_name for the stored metadata in the Pinecone"""
+    DB_POOL_VALIDATE_AFTER_SECONDS: float = 30.0
+    """Idle time after which a pooled connection is pinged before reuse. Default is 30."""
+
+    DB_POOL_IDLE_TIMEOUT_SECONDS: float = 300.0
+    """Idle time after which connections above `DB_MIN_CONNECTIONS` are closed. Default is 300."""
+
+    PINECONE_API_KEY: str = ""
+    """Pinecone API key for rag model, required when `RETRIEVER_BACKEND` is 'pinecone'."""
+
+    INDEX_NAME: str = ""
+    """Index_name for the stored metadata in the Pinecone, required when `RETRIEVER_BACKEND` is 'pinecone'."""
+
+    RETRIEVER_BACKEND: str = "pinecone"
+    """Vector index used for schema retrieval: 'pinecone' or 'local'. Default is 'pinecone'."""
+
+    LOCAL_INDEX_PATH: str = "src/embeddings/index/schema_index"
+    """Path prefix of the local vector index files (`.npy` vectors and `.json` metadata)."""
+
+    QUERY_TIMEOUT_SECONDS: float = 30.0
+    """Seconds a database query, or a whole streamed response, may run before it is cancelled on the server. Default is 30."""
+
+    STREAM_ARRAYSIZE: int = 500
+    """Rows fetched per round trip when streaming results with `stream=true`. Default is 500."""
+
+    STREAM_MAX_ROWS: int = 100000
+    """Upper bound on the rows a single streamed response may return. Default is 100000."""
+
+    AGGREGATE_MAX_ROWS: int = 1000
+    """Row cap injected into aggregate queries, which are returned whole instead of paged. Default is 1000."""
+
+    BATCH_MAX_QUERIES: int = 50
+    """Maximum number of queries accepted by one `/data-requests/batch` call. Default is 50."""
+
+    BATCH_CONCURRENCY: int = 4
+    """Translations run concurrently within a batch. Default is 4."""
+
+    LLM_REQUESTS_PER_SECOND: float = 5.0
+    """Sustained rate of LLM calls across all requests; set it to the provider quota. Default is 5 per second."""
+
+    LLM_BURST: int = 5
+    """LLM calls that may start back to back before `LLM_REQUESTS_PER_SECOND` pacing applies. Default is 5."""
+
+    LLM_MAX_CONCURRENCY: int = 8
+    """LLM calls in flight at once. Default is 8."""
+
+    LLM_MAX_QUEUE: int = 100
+    """Translations that may wait for an LLM slot before new ones are rejected with a 503. Default is 100."""
+
+    LLM_MAX_ATTEMPTS: int = 3
+    """Attempts per translation when the provider reports an exhausted quota. Default is 3."""
+
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    """Upper bound of the first jittered back-off after a quota error; doubles per attempt. Default is 0.5."""
+
+    LLM_RETRY_MAX_SECONDS: float = 8.0
+    """Cap on the back-off between quota retries. Default is 8."""
+
+    LLM_INTERACTIVE_DEADLINE_SECONDS: float = 20.0
+    """Time an interactive translation may spend queued, backing off and calling the LLM. Default is 20."""
+
+    LLM_BATCH_DEADLINE_SECONDS: float = 120.0
+    """Time a batch translation may spend queued, backing off and calling the LLM. Default is 120."""
+
+    TRANSLATION_CACHE_SIZE: int = 512
+    """Maximum number of natural language to SQL translations kept in memory. Default is 512."""
+
+    TRANSLATION_CACHE_TTL_SECONDS: int = 3600
+    """Seconds a cached translation stays valid before the LLM is asked again. Default is 3600."""
+
+    TRANSLATION_CACHE_PATH: str = ""
+    """Optional SQLite file used to persist translations across restarts when `CACHE_BACKEND` is "local". Empty disables it."""
+
+    CACHE_BACKEND: str = "local"
+    """Shared tier behind the translation and result caches: "local" (none), "sqlite" (one host) or "redis". Default is "local"."""
+
+    CACHE_SQLITE_PATH: str = ""
+    """SQLite file shared by the workers of one host. Default is empty, meaning nl2sql-cache.sqlite in /dev/shm or the temp directory."""
+
+    CACHE_SHARED_MAX_BYTES: int = 256 * 1024 * 1024
+    """Size budget of the SQLite shared cache in bytes. Default is 256 MiB."""
+
+    CACHE_URL: str = "redis://localhost:6379/0"
+    """Server used by the "redis" cache backend. Default is "redis://localhost:6379/0"."""
+
+    CACHE_KEY_PREFIX: str = "nl2sql:"
+    """Namespace of this deployment's keys on the "redis" cache backend. Default is "nl2sql:"."""
+
+    WEB_WORKERS: int = 1
+    """Uvicorn worker processes started by `python main.py`. Default is 1."""
+
+    RESULT_CACHE_ENABLED: bool = True
+    """Cache full query results and serve later pages by slicing them. Default is True."""
+
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    """Approximate memory budget of the result-set cache in bytes. Default is 64 MiB."""
+
+    RESULT_CACHE_TTL_SECONDS: float = 60.0
+    """Seconds a cached result set is served before the query runs again. Default is 60."""
+
+    RESULT_CACHE_MAX_ROWS: int = 5000
+    """Largest result, in rows, that is cached; bigger results are paged in the database. Default is 5000."""
+
+    WARM_EMBEDDINGS_ON_STARTUP: bool = False
+    """Load the embedding model before serving instead of in the background. Default is False."""
+
+    SEMANTIC_CACHE_ENABLED: bool = False
+    """Reuse validated SQL for queries with a similar embedding and the same literals and content words. Default is False."""
+
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    """Minimum cosine similarity for a semantic cache hit. Default is 0.92."""
+
+    SEMANTIC_CACHE_SIZE: int = 1024
+    """Maximum number of query embeddings kept in the semantic cache. Default is 1024."""
+
+    COST_GUARD_ENABLED: bool = False
+    """Run `EXPLAIN` on every query before executing it and act on expensive plans. Default is False."""
+
+    COST_GUARD_MAX_ROWS: int = 1000000
+    """Estimated rows scanned above which a plan counts as expensive. Default is 1000000."""
+
+    COST_GUARD_MAX_COST: float = 1000000.0
+    """Optimizer cost above which a plan counts as expensive. Default is 1000000."""
+
+    COST_GUARD_ACTION: str = "cap"
+    """What to do with an expensive plan: `reject` it with a 400, or `cap` its execution time. Default is 'cap'."""
+
+    COST_GUARD_CAP_SECONDS: float = 5.0
+    """Execution time limit imposed on expensive plans when the action is `cap`. Default is 5.0."""
+
+    COST_GUARD_CACHE_SIZE: int = 1024
+    """Number of plan estimates kept, keyed by SQL text. Default is 1024."""
+
+    TRACING_EXPORTER: str = "memory"
+    """Where finished trace spans go: 'memory', 'file', 'logging' or 'none'. Default is 'memory'."""
+
+    TRACING_MAX_SPANS: int = 10000
+    """Finished spans kept by the in-memory exporter for `/traces/{request_id}`, or waiting to be written by the 'file' exporter. Default is 10000."""
+
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    """File the 'file' exporter appends spans to, one JSON object per line."""
+
+    LOG_LEVEL: str = "INFO"
+    """Level of every application logger without an entry in `LOG_LEVELS`. Default is INFO."""
+
+    LOG_LEVELS: str = ""
+    """Per-logger levels, e.g. `Pool_Logger=DEBUG,Execution_Logger=WARNING`. Default is empty."""
+
+    LOG_FORMAT: str = "text"
+    """Log line format: 'text' or 'json' (one object per record with the request id). Default is 'text'."""
+
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+    """Fraction of DEBUG records kept when DEBUG is enabled; lower it to thin out busy debug logs. Default is 1.0."""
+
+    LOG_QUEUE_SIZE: int = 10000
+    """Records buffered for the background log writer; further records are dropped. Default is 10000."""
+
+    SCHEMA_TABLES: str = "LEAF_AND_SPINE_C93180YC_REPRT,CARD_SLOT_HIERARCHY_REPRT,LEAF_SPIN_E100G_UTIL_REPRT"
+    """Comma-separated tables the schema catalog introspects and exposes to the prompt and autocomplete."""
+
+    SCHEMA_REFRESH_SECONDS: float = 300.0
+    """Interval between background schema introspections; 0 introspects once at startup only. Default is 300."""
+
+    SCHEMA_LINKING_ENABLED: bool = True
+    """Send only the tables and columns a question refers to instead of the full schema. Default is True."""
+
+    SCHEMA_LINKING_MIN_RELATIVE_SCORE: float = 0.5
+    """Fraction of the best table's linking score another table needs to be included. Default is 0.5."""
+
+    SCHEMA_LINKING_EMBEDDING_WEIGHT: float = 0.0
+    """Weight of question-to-table embedding similarity added to the lexical score; 0 disables it. Default is 0.0."""
+
+    RAG_TOP_K: int = 3
+    """Number of schema chunks retrieved for the RAG prompt. Default is 3."""
+
+    RAG_MIN_SCORE: float = 0.0
+    """Similarity below which retrieved schema chunks are dropped; the best chunk is always kept. Default is 0.0."""
 
     @classmethod
     def validate(cls):
@@ -60,10 +234,13 @@ class Settings(BaseSettings):
         Raises:
             ValueError: If any required environment variables are missing.
         """
-        missing_vars = [var for var in ['API_KEY', 'DB_USER', 'DB_PASS', 'DB_HOST', 'DB_SERVICE_NAME','PINECONE_API_KEY','INDEX_NAME'] if not getattr(cls, var)]
+        required_vars = ['API_KEY', 'DB_USER', 'DB_PASS', 'DB_HOST', 'DB_SERVICE_NAME']
+        if getattr(cls, 'RETRIEVER_BACKEND') == "pinecone":
+            required_vars += ['PINECONE_API_KEY', 'INDEX_NAME']
+        missing_vars = [var for var in required_vars if not getattr(cls, var)]
         
         if missing_vars:
-            logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
+            logger.error("Missing required environment variables: %s", ', '.join(missing_vars))
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
         else:
             logger.info("All required environment variables are present.")
@@ -80,4 +257,11 @@ class Settings(BaseSettings):
         extra = "allow"
 
 settings = Settings()
+configure_logging(
+    level=settings.LOG_LEVEL,
+    levels=settings.LOG_LEVELS,
+    log_format=settings.LOG_FORMAT,
+    debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE,
+)
 logger.info("Settings object initialized successfully.")
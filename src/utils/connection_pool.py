@@ -0,0 +1,305 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from src.utils.config import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import POOL_CONNECTIONS, POOL_EXHAUSTED
+
+logger = get_logger("Pool_Logger")
+
+
+class PoolTimeoutError(Exception):
+    """No connection became available within the checkout timeout."""
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class _Idle:
+    __slots__ = ("connection", "returned_at")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.returned_at = time.monotonic()
+
+
+class PoolManager:
+    """
+    Thread-safe connection pool shared by the MySQL and Oracle executors.
+
+    - `prewarm` opens `min_size` connections in parallel, so the first requests do not pay
+      connect latency.
+    - Checkouts reuse the most recently returned connection. A connection idle for longer
+      than `validate_after_seconds` is checked with `validate` first (a ping), and replaced
+      if it fails.
+    - When nothing is idle the pool grows up to `max_size`. Taking the last idle connection
+      also opens a spare in the background, so a burst does not wait on connect.
+    - At `max_size`, checkouts queue for up to `checkout_timeout` seconds before raising
+      `PoolTimeoutError`.
+    - Connections beyond `min_size` that stay idle for `idle_timeout` seconds are closed on
+      the next `release`, or by `shrink`, which the API calls periodically.
+
+    Drivers plug in through `connect`, `validate` and `close` callables. Nothing is run on
+    a plain checkout or return, so no reset round trip is paid per query; callers that
+    change session state restore it themselves.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], object],
+        close: Callable[[object], None],
+        validate: Callable[[object], bool] | None = None,
+        min_size: int = 1,
+        max_size: int = 5,
+        checkout_timeout: float = 5.0,
+        validate_after_seconds: float = 30.0,
+        idle_timeout: float = 300.0,
+    ):
+        self.name = name
+        self._connect = connect
+        self._close = close
+        self._validate = validate
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.checkout_timeout = checkout_timeout
+        self.validate_after_seconds = validate_after_seconds
+        self.idle_timeout = idle_timeout
+
+        self._idle: deque[_Idle] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self.checkouts = 0
+        self.waited_checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.peak_in_use = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def prewarm(self) -> None:
+        """Opens connections until `min_size` exist. Raises the connect error if none could be opened."""
+        with self._condition:
+            missing = self.min_size - self._size
+            self._size += max(0, missing)
+        if missing <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=missing, thread_name_prefix=f"{self.name}-prewarm") as executor:
+            futures = [executor.submit(self._open) for _ in range(missing)]
+        errors = [future.exception() for future in futures if future.exception()]
+        opened = [future.result() for future in futures if not future.exception()]
+        with self._condition:
+            self._size -= len(errors)
+            for connection in opened:
+                self._idle.append(_Idle(connection))
+            self._publish()
+            self._condition.notify_all()
+        if errors and not opened:
+            raise errors[0]
+        if errors:
+            logger.warning("%s pool pre-warmed %s of %s connections: %s", self.name, len(opened), missing, errors[0])
+        else:
+            logger.info("%s pool pre-warmed with %s connections.", self.name, len(opened))
+
+    def _open(self):
+        connection = self._connect()
+        with self._condition:
+            self.created += 1
+        return connection
+
+    def _discard(self, connection) -> None:
+        with self._condition:
+            self.discarded += 1
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+
+    def acquire(self, timeout: float | None = None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        while True:
+            idle = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError(f"{self.name} pool is closed.")
+                    if self._idle:
+                        idle = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    if not waited:
+                        waited = True
+                        self.waited_checkouts += 1
+                        POOL_EXHAUSTED.inc()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(f"No {self.name} connection available within {timeout}s.")
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                self._in_use += 1
+                spare = not self._idle and self._size < self.max_size and idle is not None
+                if spare:
+                    self._size += 1
+
+            if spare:
+                threading.Thread(target=self._open_spare, name=f"{self.name}-spare", daemon=True).start()
+
+            connection = self._checkout(idle)
+            if connection is not None:
+                break
+
+        wait_seconds = time.monotonic() - started
+        with self._condition:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+            self._publish()
+        return connection
+
+    def _checkout(self, idle: _Idle | None):
+        """Validates a reused connection or opens a new one. Returns None when the slot must be retried."""
+        try:
+            if idle is None:
+                return self._open()
+            if self._validate and time.monotonic() - idle.returned_at >= self.validate_after_seconds:
+                if not self._validate(idle.connection):
+                    self._discard(idle.connection)
+                    self._release_slot()
+                    return None
+            return idle.connection
+        except Exception:
+            if idle is not None:
+                self._discard(idle.connection)
+            self._release_slot()
+            if idle is not None:
+                return None
+            raise
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._in_use -= 1
+            self._publish()
+            self._condition.notify()
+
+    def _open_spare(self) -> None:
+        try:
+            connection = self._open()
+        except Exception as e:
+            logger.warning("Opening a spare %s connection failed: %s", self.name, e)
+            with self._condition:
+                self._size -= 1
+                self._publish()
+                self._condition.notify()
+            return
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(_Idle(connection))
+                self._publish()
+                self._condition.notify()
+                return
+        self._discard(connection)
+
+    def release(self, connection, discard: bool = False) -> None:
+        """Returns `connection`; `discard` closes it instead, e.g. after a connection-level error."""
+        expired = []
+        with self._condition:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                expired.append(connection)
+            else:
+                self._idle.append(_Idle(connection))
+                expired += self._collect_expired()
+            self._publish()
+            self._condition.notify()
+        for stale in expired:
+            self._discard(stale)
+
+    def _collect_expired(self) -> list:
+        # Idle connections are ordered oldest-returned first; only the surplus over min_size is closed.
+        expired = []
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size and now - self._idle[0].returned_at >= self.idle_timeout:
+            expired.append(self._idle.popleft().connection)
+            self._size -= 1
+        return expired
+
+    def shrink(self) -> int:
+        """Closes connections idle for longer than `idle_timeout`, down to `min_size`. Returns how many were closed."""
+        with self._condition:
+            expired = self._collect_expired()
+            self._publish()
+        for connection in expired:
+            self._discard(connection)
+        return len(expired)
+
+    def close(self) -> None:
+        """Closes idle connections; connections still checked out are closed when they are released."""
+        with self._condition:
+            self._closed = True
+            idle = [entry.connection for entry in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._publish()
+            self._condition.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+    def _publish(self) -> None:
+        POOL_CONNECTIONS.labels(pool=self.name, state="in_use").set(self._in_use)
+        POOL_CONNECTIONS.labels(pool=self.name, state="idle").set(len(self._idle))
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "utilization": round(self._in_use / self.max_size, 3),
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "created": self.created,
+                "discarded": self.discarded,
+            }
+
+
+def create_pool_manager(name: str, connect: Callable[[], object], close: Callable[[object], None], validate: Callable[[object], bool], max_size: int) -> PoolManager:
+    return PoolManager(
+        name,
+        connect,
+        close,
+        validate,
+        min_size=settings.DB_MIN_CONNECTIONS,
+        max_size=max_size,
+        checkout_timeout=settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+        validate_after_seconds=settings.DB_POOL_VALIDATE_AFTER_SECONDS,
+        idle_timeout=settings.DB_POOL_IDLE_TIMEOUT_SECONDS,
+    )
@@ -84,11 +84,34 @@ forbidden_keywords = {
     "truncate index", "truncate table"
 }
 
-forbidden_patterns = [re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE) for keyword in forbidden_keywords]
+def _build_trie(keywords) -> dict:
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return trie
+
+def _trie_to_regex(node: dict) -> str:
+    is_terminal = "" in node
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not is_terminal:
+        return branches[0]
+
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if is_terminal else pattern
+
+# A single alternation derived from a trie of every keyword: shared prefixes are matched once,
+# so the query is scanned in one pass instead of once per keyword.
+forbidden_pattern = re.compile(r'\b' + _trie_to_regex(_build_trie(forbidden_keywords)) + r'\b', re.IGNORECASE)
+
+def Find_Forbidden_Keyword(query: str) -> str | None:
+    match = forbidden_pattern.search(query.strip())
+    return match.group(0).lower() if match else None
 
 def Contains_Forbidden_Keywords(query: str) -> bool:
-    query = query.strip()
-    for pattern in forbidden_patterns:
-        if pattern.search(query):
-            return True
-    return False
+    return Find_Forbidden_Keyword(query) is not None
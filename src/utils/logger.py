@@ -1,12 +1,180 @@
+"""
+Application logging.
+
+Every logger returned by `get_logger` shares one `QueueHandler`. A call only checks the
+level, samples DEBUG records and puts the record on a bounded in-memory queue. A
+`QueueListener` thread formats the records, as text or JSON lines, and writes them to
+stderr. Slow terminals or log collectors therefore never block the event loop or a
+database thread. When the queue is full, records are dropped and counted rather than
+waited on.
+
+Messages use %-style arguments (`logger.info("Generated SQL query: %s", sql)`), so nothing
+is formatted for disabled levels. Formatting itself happens on the listener thread.
+
+`configure_logging` is called once the settings are loaded and applies `LOG_LEVEL`,
+per-logger `LOG_LEVELS`, `LOG_FORMAT`, `LOG_DEBUG_SAMPLE_RATE` and `LOG_QUEUE_SIZE`.
+Until then, records go through the same queue at INFO level in text form.
+"""
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Id of the request being served, set by the API middleware. Defined here rather than in
+# tracing, which logs through this module, so stamping records never imports anything.
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id, exception and `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Passes a `rate` fraction of DEBUG records; INFO and above always pass."""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamps records with the id of the request being served; runs in the calling thread, where that context is set."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue without waiting; a full queue drops the record.
+
+    Records are handed over as they are instead of being pre-formatted, so the message is
+    only built on the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_sampler = DebugSampler()
+_queue_handler: NonBlockingQueueHandler | None = None
+_listener: logging.handlers.QueueListener | None = None
+_level = logging.INFO
+_levels: dict[str, int] = {}
+_loggers: dict[str, logging.Logger] = {}
+
+
+def _start(queue_size: int, log_format: str) -> None:
+    global _queue_handler, _listener
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=max(0, queue_size)))
+    handler.addFilter(_sampler)
+    handler.addFilter(_RequestIdFilter())
+    listener = logging.handlers.QueueListener(handler.queue, stream_handler, respect_handler_level=False)
+    listener.start()
+
+    previous_handler, previous_listener = _queue_handler, _listener
+    _queue_handler, _listener = handler, listener
+    for logger in _loggers.values():
+        if previous_handler:
+            logger.removeHandler(previous_handler)
+        logger.addHandler(handler)
+    if previous_listener:
+        previous_listener.stop()
+
+
+def stop_logging() -> None:
+    """Writes out the queued records and stops the listener thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """Per-logger levels from `"Pool_Logger=DEBUG,Execution_Logger=WARNING"`."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return {name: level for name, level in levels.items() if isinstance(level, int)}
+
+
+def configure_logging(
+    level: str = "INFO",
+    levels: str = "",
+    log_format: str = "text",
+    debug_sample_rate: float = 1.0,
+    queue_size: int = 10000,
+) -> None:
+    global _level, _levels
+    resolved = logging.getLevelName(level.upper())
+    _level = resolved if isinstance(resolved, int) else logging.INFO
+    _levels = parse_levels(levels)
+    _sampler.rate = debug_sample_rate
+    _start(queue_size, log_format)
+    for name, logger in _loggers.items():
+        logger.setLevel(_levels.get(name, _level))
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler else 0
+
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
-    if not logger.hasHandlers():
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-   
+    if name not in _loggers:
+        if _queue_handler is None:
+            _start(10000, "text")
+            atexit.register(stop_logging)
+        logger.addHandler(_queue_handler)
+        logger.setLevel(_levels.get(name, _level))
+        # Records are written by the queue listener only, not again by handlers on the root logger.
+        logger.propagate = False
+        _loggers[name] = logger
     return logger
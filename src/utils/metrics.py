@@ -0,0 +1,74 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGES = (
+    "keyword_guard",
+    "rag_retrieval",
+    "schema_linking",
+    "prompt_rendering",
+    "llm_call",
+    "sql_postprocess",
+    "sql_analysis",
+    "pool_checkout",
+    "query_execution",
+    "row_materialization",
+    "json_encoding",
+)
+
+STAGE_SECONDS = Histogram(
+    "nl2sql_stage_seconds",
+    "Time spent in each stage of the translate-and-execute pipeline.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "nl2sql_request_seconds",
+    "End-to-end HTTP request latency.",
+    ["route", "method", "status"],
+    buckets=STAGE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "nl2sql_cache_lookups_total",
+    "Cache lookups by cache and outcome.",
+    ["cache", "result"],
+)
+LLM_QUOTA_ERRORS = Counter(
+    "nl2sql_llm_quota_errors_total",
+    "LLM calls rejected because the API quota was exhausted.",
+)
+LLM_LIMITER_WAITING = Gauge(
+    "nl2sql_llm_limiter_waiting",
+    "LLM calls queued in the client-side limiter, by priority.",
+    ["priority"],
+)
+LLM_LIMITER_REJECTED = Counter(
+    "nl2sql_llm_limiter_rejected_total",
+    "LLM calls turned away by the client-side limiter, by reason.",
+    ["reason"],
+)
+POOL_EXHAUSTED = Counter(
+    "nl2sql_db_pool_exhausted_total",
+    "Connection checkouts that found every pooled connection in use.",
+)
+POOL_CONNECTIONS = Gauge(
+    "nl2sql_db_pool_connections",
+    "Pooled database connections by state.",
+    ["pool", "state"],
+)
+
+# Resolve the labelled children once; `labels()` is a dict lookup under a lock on every call.
+_stage_timers = {stage: STAGE_SECONDS.labels(stage=stage) for stage in STAGES}
+
+
+def stage_timer(stage: str):
+    """Context manager (or decorator) recording the duration of `stage` in `nl2sql_stage_seconds`."""
+    return _stage_timers[stage].time()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from src.utils.cache_backend import CacheBackend
+from src.utils.logger import get_logger
+
+logger = get_logger("Cache_Logger")
+
+KEY_PREFIX = "t:"
+
+
+class TranslationCache:
+    """
+    Cache of natural language queries to their generated SQL.
+
+    Entries are keyed on the normalized query text plus the schema version, so a schema
+    change never serves SQL generated against an older set of tables. The in-memory tier is
+    an LRU bounded by `max_entries`; every entry expires after `ttl_seconds`. When a
+    `backend` is given, entries are also written through to it. Translations made by other
+    worker processes, or before a restart, are then found there on a local miss. The shared
+    tier is only reached off the event loop, so `get`, `set` and `clear` are coroutines.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: int = 3600, backend: CacheBackend | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def normalize_query(user_query: str) -> str:
+        return " ".join(user_query.lower().split())
+
+    @classmethod
+    def make_key(cls, user_query: str, schema_version: str) -> str:
+        return f"{schema_version}:{cls.normalize_query(user_query)}"
+
+    async def get(self, user_query: str, schema_version: str) -> str | None:
+        key = self.make_key(user_query, schema_version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                sql_query, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return sql_query
+                del self._entries[key]
+
+        sql_query = await asyncio.to_thread(self._read_shared, key) if self.backend else None
+        with self._lock:
+            if sql_query is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.shared_hits += 1
+            self._store(key, sql_query, now)
+        return sql_query
+
+    async def set(self, user_query: str, schema_version: str, sql_query: str) -> None:
+        key = self.make_key(user_query, schema_version)
+        with self._lock:
+            self._store(key, sql_query, time.monotonic())
+        if self.backend:
+            await asyncio.to_thread(self._write_shared, key, sql_query)
+
+    async def get_or_compute(
+        self,
+        user_query: str,
+        schema_version: str,
+        compute: Callable[[], Awaitable[str]],
+        lease_seconds: float = 30.0,
+    ) -> tuple[str, bool]:
+        """
+        Returns `(sql_query, computed)`, running `compute` only if no worker has the translation yet.
+
+        With a backend, concurrent misses for the same query across workers share a single
+        `compute` call; the others wait for its result. Exceptions raised by `compute` reach
+        the caller that ran it.
+        """
+        if not self.backend:
+            sql_query = await compute()
+            await self.set(user_query, schema_version, sql_query)
+            return sql_query, True
+
+        async def compute_encoded() -> bytes:
+            return (await compute()).encode()
+
+        key = self.make_key(user_query, schema_version)
+        value, computed = await self.backend.get_or_compute(KEY_PREFIX + key, compute_encoded, self.ttl_seconds, lease_seconds=lease_seconds)
+        sql_query = value.decode()
+        with self._lock:
+            if not computed:
+                self.shared_hits += 1
+            self._store(key, sql_query, time.monotonic())
+        return sql_query, computed
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.backend:
+            await asyncio.to_thread(self.backend.clear, KEY_PREFIX)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store(self, key: str, sql_query: str, now: float) -> None:
+        self._entries[key] = (sql_query, now + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_shared(self, key: str) -> str | None:
+        try:
+            value = self.backend.get(KEY_PREFIX + key)
+        except Exception as e:
+            logger.error("Shared translation cache read failed: %s", e)
+            return None
+        return value.decode() if value is not None else None
+
+    def _write_shared(self, key: str, sql_query: str) -> None:
+        try:
+            self.backend.set(KEY_PREFIX + key, sql_query.encode(), self.ttl_seconds)
+        except Exception as e:
+            logger.error("Shared translation cache write failed: %s", e)
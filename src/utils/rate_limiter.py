@@ -0,0 +1,266 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, TypeVar
+from src.utils.config import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import LLM_LIMITER_REJECTED, LLM_LIMITER_WAITING, LLM_QUOTA_ERRORS
+
+logger = get_logger("RateLimiter_Logger")
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class LimiterQueueFullError(Exception):
+    """The wait queue was full, or the caller was displaced by a higher-priority one."""
+
+
+class LimiterDeadlineError(Exception):
+    """The caller's deadline passed while it was queued, backing off or waiting on the call."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "future")
+
+    def __init__(self, priority: Priority, sequence: int, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class LlmCallLimiter:
+    """
+    Client-side admission control for calls to a rate-limited LLM API.
+
+    - A token bucket keeps the call rate at `rate` per second (bursts of up to `burst`), and
+      at most `max_concurrency` calls are in flight.
+    - Callers that cannot start right away wait in a priority queue of at most `max_queue`
+      entries: interactive requests go before batch work, and a full queue makes room for
+      an interactive caller by turning away the newest batch waiter.
+    - Every call has a deadline, by default `deadlines[priority]` seconds from the first
+      attempt. Queueing, back-off and the call itself all count against it.
+    - A call failing with one of `retry_on` (the provider's quota error) is retried up to
+      `max_attempts` times after a jittered exponential back-off. The back-off also pauses
+      the whole bucket, and the rate is halved and then regained gradually on success, so
+      the limiter settles at what the provider actually accepts instead of spending calls
+      that are rejected anyway.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        max_concurrency: int = 4,
+        max_queue: int = 100,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 8.0,
+        deadlines: dict[Priority, float] | None = None,
+        retry_on: tuple[type[BaseException], ...] = (),
+        seed: int | None = None,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.deadlines = deadlines or {Priority.INTERACTIVE: 20.0, Priority.BATCH: 120.0}
+        self.retry_on = retry_on
+        self._random = random.Random(seed)
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._in_flight = 0
+        self._queue: list[_Waiter] = []
+        self._waiting = {priority: 0 for priority in Priority}
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.admitted = 0
+        self.rejected = 0
+        self.deadline_exceeded = 0
+        self.quota_errors = 0
+        self.retries = 0
+        self.total_wait_seconds = 0.0
+
+    async def run(self, call: Callable[[], Awaitable[T]], priority: Priority = Priority.INTERACTIVE, deadline: float | None = None) -> T:
+        """
+        Awaits `call()` once admitted, retrying quota errors.
+
+        `deadline` is a `time.monotonic()` timestamp. Raises `LimiterQueueFullError`,
+        `LimiterDeadlineError`, or the last quota error once the attempts are used up.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.deadlines[priority]
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._acquire(priority, deadline)
+            try:
+                return await self._call(call, deadline)
+            except self.retry_on:
+                backoff = self._on_quota_error(attempt)
+                if attempt >= self.max_attempts:
+                    raise
+                if time.monotonic() + backoff >= deadline:
+                    self._reject_deadline()
+                self.retries += 1
+                logger.warning("LLM quota exceeded; retrying in %.2fs (attempt %s of %s).", backoff, attempt + 1, self.max_attempts)
+            finally:
+                self._release()
+
+    async def _call(self, call: Callable[[], Awaitable[T]], deadline: float) -> T:
+        try:
+            result = await asyncio.wait_for(call(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._reject_deadline()
+        # Regain the configured rate a step at a time after a quota error.
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+        return result
+
+    def _on_quota_error(self, attempt: int) -> float:
+        """Halves the rate, pauses the bucket for a jittered back-off and returns that back-off."""
+        self.quota_errors += 1
+        LLM_QUOTA_ERRORS.inc()
+        self.rate = max(self.max_rate * 0.1, self.rate / 2)
+        backoff = self._random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1)))
+        self._resume_at = max(self._resume_at, time.monotonic() + backoff)
+        self._tokens = 0.0
+        self._updated = max(self._updated, self._resume_at)
+        return backoff
+
+    def _reject_deadline(self):
+        self.deadline_exceeded += 1
+        LLM_LIMITER_REJECTED.labels(reason="deadline").inc()
+        raise LimiterDeadlineError("Deadline passed before the LLM call completed.")
+
+    async def _acquire(self, priority: Priority, deadline: float) -> None:
+        queued = sum(1 for waiter in self._queue if not waiter.future.done())
+        if queued >= self.max_queue and not self._evict_below(priority):
+            self.rejected += 1
+            LLM_LIMITER_REJECTED.labels(reason="queue_full").inc()
+            raise LimiterQueueFullError("LLM request queue is full.")
+
+        started = time.monotonic()
+        waiter = _Waiter(priority, next(self._sequence), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        self._waiting[priority] += 1
+        try:
+            self._dispatch()
+            if not waiter.future.done():
+                await asyncio.wait({waiter.future}, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            self._waiting[priority] -= 1
+            self._publish()
+
+        if not waiter.future.done():
+            self._abandon(waiter)
+            self._reject_deadline()
+        waiter.future.result()
+        self.admitted += 1
+        self.total_wait_seconds += time.monotonic() - started
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        # A slot granted in the same iteration the caller gave up is handed back.
+        if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+            self._release()
+        else:
+            waiter.future.cancel()
+
+    def _evict_below(self, priority: Priority) -> bool:
+        """Turns away the newest waiter of a lower priority than `priority`, if there is one."""
+        candidates = [waiter for waiter in self._queue if waiter.priority > priority and not waiter.future.done()]
+        if not candidates:
+            return False
+        victim = max(candidates)
+        victim.future.set_exception(LimiterQueueFullError("Displaced by a higher-priority LLM request."))
+        self.rejected += 1
+        LLM_LIMITER_REJECTED.labels(reason="displaced").inc()
+        return True
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _dispatch(self) -> None:
+        """Admits queued callers while a token and a concurrency slot are free; otherwise schedules the next try."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue and self._in_flight < self.max_concurrency:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(self._resume_at - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self._tokens -= 1
+            self._in_flight += 1
+            head.future.set_result(None)
+
+    def _publish(self) -> None:
+        for priority, count in self._waiting.items():
+            LLM_LIMITER_WAITING.labels(priority=priority.name.lower()).set(count)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "in_flight": self._in_flight,
+            "waiting": {priority.name.lower(): count for priority, count in self._waiting.items()},
+            "paused_seconds": round(max(0.0, self._resume_at - time.monotonic()), 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "deadline_exceeded": self.deadline_exceeded,
+            "quota_errors": self.quota_errors,
+            "retries": self.retries,
+            "avg_wait_ms": round(self.total_wait_seconds / self.admitted * 1000, 3) if self.admitted else 0.0,
+        }
+
+
+def create_llm_limiter(retry_on: tuple[type[BaseException], ...] = ()) -> LlmCallLimiter:
+    return LlmCallLimiter(
+        rate=settings.LLM_REQUESTS_PER_SECOND,
+        burst=settings.LLM_BURST,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        max_queue=settings.LLM_MAX_QUEUE,
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        retry_base_seconds=settings.LLM_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.LLM_RETRY_MAX_SECONDS,
+        deadlines={
+            Priority.INTERACTIVE: settings.LLM_INTERACTIVE_DEADLINE_SECONDS,
+            Priority.BATCH: settings.LLM_BATCH_DEADLINE_SECONDS,
+        },
+        retry_on=retry_on,
+    )
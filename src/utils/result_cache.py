@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import re
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, NamedTuple
+from src.utils.cache_backend import CacheBackend
+from src.utils.result_set import ResultSet
+from src.utils.logger import get_logger
+from src.utils.serialization import pack_result_set, unpack_result_set
+
+logger = get_logger("Cache_Logger")
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w$.]*)", re.IGNORECASE)
+SIZE_SAMPLE_ROWS = 64
+KEY_PREFIX = "r:"
+EPOCH_KEY = "r:epoch"
+# Shared entries start with their wall-clock expiry, so a copy taken by a worker expires with the original.
+EXPIRY = struct.Struct("<d")
+# Stored in place of a result that cannot be shared, so waiting workers fetch it themselves.
+UNSHARED = b""
+# Stored in place of a result too large to cache, so no worker fetches it again until it expires.
+OVERSIZED = b"\x00"
+# Queries remembered as too large to cache; these markers hold no rows.
+MAX_OVERSIZED_ENTRIES = 4096
+
+
+class CacheLookup(NamedTuple):
+    result_set: ResultSet | None
+    """None when the query is known to return more than the cache holds; nothing was fetched."""
+    complete: bool
+    """False when the result was too large to cache, so it may have been cut off at the row cap."""
+    hit: bool
+
+
+def referenced_tables(sql_query: str) -> frozenset[str]:
+    return frozenset(name.upper() for name in TABLE_PATTERN.findall(sql_query))
+
+
+def estimate_bytes(result_set: ResultSet) -> int:
+    """Approximate memory held by a result set, extrapolated from a sample of its rows."""
+    rows = result_set.rows
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[:SIZE_SAMPLE_ROWS]
+    sample_bytes = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample)
+    return sys.getsizeof(rows) + sample_bytes * len(rows) // len(sample)
+
+
+class ResultSetCache:
+    """
+    Server-side cache of full query results, sliced into pages on demand.
+
+    Entries are keyed on the exact SQL text that produced them and expire after
+    `ttl_seconds`, which bounds how stale a page can be against the batch-refreshed report
+    tables. Results larger than `max_rows` are never cached, and the least recently used
+    entries are evicted once the estimated footprint exceeds `max_bytes`. Rows are kept as
+    tuples in a `ResultSet`; `invalidate` drops entries by SQL text or by referenced table.
+
+    With a `backend`, results are also shared between worker processes in packed form,
+    tagged with the tables they read. `get_or_fetch` runs each query once across workers.
+    Every `invalidate` bumps a shared epoch; a worker that sees a newer epoch drops its
+    in-memory entries, at most `epoch_check_seconds` after the invalidation. The shared tier
+    is only reached off the event loop, so `get`, `get_or_fetch` and `invalidate` are
+    coroutines.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        max_rows: int,
+        backend: CacheBackend | None = None,
+        epoch_check_seconds: float = 1.0,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.backend = backend
+        self.epoch_check_seconds = epoch_check_seconds
+        self._entries: OrderedDict[str, tuple[ResultSet, float, int, frozenset[str]]] = OrderedDict()
+        self._oversized: OrderedDict[str, tuple[float, frozenset[str]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._epoch = backend.counter(EPOCH_KEY) if backend else 0
+        self._epoch_checked = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.oversized_skips = 0
+        self.evictions = 0
+
+    @staticmethod
+    def shared_key(sql_query: str) -> str:
+        return KEY_PREFIX + hashlib.sha256(sql_query.encode()).hexdigest()
+
+    async def get(self, sql_query: str) -> ResultSet | None:
+        """Looks up the in-memory tier only."""
+        await self._check_epoch()
+        result_set = self._get_local(sql_query)
+        self._count(result_set is not None)
+        return result_set
+
+    def _count(self, hit: bool, shared: bool = False) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.shared_hits += shared
+            else:
+                self.misses += 1
+
+    def _get_local(self, sql_query: str) -> ResultSet | None:
+        with self._lock:
+            entry = self._entries.get(sql_query)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(sql_query)
+                return entry[0]
+            if entry is not None:
+                self._remove(sql_query)
+            return None
+
+    async def get_or_fetch(
+        self,
+        sql_query: str,
+        fetch: Callable[[], Awaitable[ResultSet]],
+        tables: frozenset[str] | None = None,
+        lease_seconds: float = 30.0,
+    ) -> CacheLookup:
+        """
+        Returns the cached result of `sql_query`, calling `fetch` only when no worker has it cached.
+
+        A query whose result did not fit is remembered for `ttl_seconds`; until then the
+        lookup returns no result set without fetching, and the caller pages in the database.
+        With a backend, concurrent misses across workers wait for a single `fetch` and then
+        read its packed result.
+        """
+        await self._check_epoch()
+        result_set = self._get_local(sql_query)
+        if result_set is not None:
+            self._count(True)
+            return CacheLookup(result_set, True, True)
+        if self._known_oversized(sql_query):
+            return CacheLookup(None, False, False)
+
+        tables = tables if tables is not None else referenced_tables(sql_query)
+        if not self.backend:
+            self._count(False)
+            result_set = await fetch()
+            return CacheLookup(result_set, self.put(sql_query, result_set, tables), False)
+
+        fetched: list[ResultSet] = []
+        fetch_errors: list[Exception] = []
+
+        async def fetch_packed() -> bytes:
+            try:
+                result_set = await fetch()
+            except Exception as e:
+                fetch_errors.append(e)
+                raise
+            fetched.append(result_set)
+            if len(result_set) > self.max_rows:
+                return OVERSIZED
+            packed = pack_result_set(result_set)
+            return EXPIRY.pack(time.time() + self.ttl_seconds) + packed if packed else UNSHARED
+
+        try:
+            value, _ = await self.backend.get_or_compute(
+                self.shared_key(sql_query), fetch_packed, self.ttl_seconds, [f"table:{table}" for table in tables], lease_seconds
+            )
+        except Exception as e:
+            self._count(False)
+            if fetch_errors:
+                raise
+            # The shared tier failed; serve from the database and keep the result in this worker only.
+            logger.error("Shared result cache unavailable: %s", e)
+            result_set = fetched[0] if fetched else await fetch()
+            return CacheLookup(result_set, self.put(sql_query, result_set, tables), False)
+
+        if fetched:
+            self._count(False)
+            return CacheLookup(fetched[0], self.put(sql_query, fetched[0], tables), False)
+        if value == OVERSIZED:
+            self._mark_oversized(sql_query, tables)
+            return CacheLookup(None, False, False)
+        if value == UNSHARED:
+            self._count(False)
+            result_set = await fetch()
+            return CacheLookup(result_set, self.put(sql_query, result_set, tables), False)
+
+        expires_at = EXPIRY.unpack_from(value)[0]
+        result_set = unpack_result_set(value[EXPIRY.size:])
+        self._count(True, shared=True)
+        self._put_local(sql_query, result_set, tables, time.monotonic() + max(0.0, expires_at - time.time()))
+        return CacheLookup(result_set, True, True)
+
+    def put(self, sql_query: str, result_set: ResultSet, tables: frozenset[str] | None = None) -> bool:
+        """
+        Caches `result_set` in this worker's memory; `get_or_fetch` shares what it fetches.
+
+        Returns False, and remembers the query as oversized, when the result is too large.
+        """
+        tables = tables if tables is not None else referenced_tables(sql_query)
+        if len(result_set) > self.max_rows or not self._put_local(sql_query, result_set, tables, time.monotonic() + self.ttl_seconds):
+            self._mark_oversized(sql_query, tables)
+            return False
+        return True
+
+    def _put_local(self, sql_query: str, result_set: ResultSet, tables: frozenset[str], expires_at: float) -> bool:
+        size = estimate_bytes(result_set)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if sql_query in self._entries:
+                self._remove(sql_query)
+            self._entries[sql_query] = (result_set, expires_at, size, tables)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _mark_oversized(self, sql_query: str, tables: frozenset[str]) -> None:
+        with self._lock:
+            self._oversized[sql_query] = (time.monotonic() + self.ttl_seconds, tables)
+            self._oversized.move_to_end(sql_query)
+            while len(self._oversized) > MAX_OVERSIZED_ENTRIES:
+                self._oversized.popitem(last=False)
+
+    def _known_oversized(self, sql_query: str) -> bool:
+        with self._lock:
+            entry = self._oversized.get(sql_query)
+            if entry is None:
+                return False
+            if entry[0] <= time.monotonic():
+                del self._oversized[sql_query]
+                return False
+            self.misses += 1
+            self.oversized_skips += 1
+            return True
+
+    async def invalidate(self, sql_query: str | None = None, table: str | None = None) -> int:
+        """Drops the entry for `sql_query`, every entry reading `table`, or everything when neither is given."""
+        with self._lock:
+            if sql_query is not None:
+                keys = [sql_query] if sql_query in self._entries else []
+                self._oversized.pop(sql_query, None)
+            elif table is not None:
+                table = table.upper()
+                keys = [key for key, entry in self._entries.items() if table in entry[3]]
+                for key in [key for key, (_, tables) in self._oversized.items() if table in tables]:
+                    del self._oversized[key]
+            else:
+                keys = list(self._entries)
+                self._oversized.clear()
+            for key in keys:
+                self._remove(key)
+        invalidated = len(keys)
+        if self.backend:
+            invalidated = max(invalidated, await asyncio.to_thread(self._invalidate_shared, sql_query, table))
+        if invalidated:
+            logger.info("Invalidated %s cached result sets.", invalidated)
+        return invalidated
+
+    def _invalidate_shared(self, sql_query: str | None, table: str | None) -> int:
+        if sql_query is not None:
+            invalidated = int(self.backend.delete(self.shared_key(sql_query)))
+        elif table is not None:
+            invalidated = self.backend.delete_tagged(f"table:{table}")
+        else:
+            invalidated = self.backend.clear(KEY_PREFIX)
+        epoch = self.backend.incr(EPOCH_KEY)
+        with self._lock:
+            self._epoch = epoch
+            self._epoch_checked = time.monotonic()
+        return invalidated
+
+    async def _check_epoch(self) -> None:
+        """Drops the in-memory tier once another worker has invalidated results."""
+        if not self.backend or time.monotonic() - self._epoch_checked < self.epoch_check_seconds:
+            return
+        # Claimed before the read, so concurrent lookups do not all read the epoch at once.
+        self._epoch_checked = time.monotonic()
+        epoch = await asyncio.to_thread(self.backend.counter, EPOCH_KEY)
+        with self._lock:
+            if epoch != self._epoch:
+                self._epoch = epoch
+                self._entries.clear()
+                self._oversized.clear()
+                self._bytes = 0
+
+    def _remove(self, sql_query: str) -> None:
+        _, _, size, _ = self._entries.pop(sql_query)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "oversized_skips": self.oversized_skips,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class ResultSet:
+    """
+    Query result kept as column names plus row tuples.
+
+    Rows stay in the compact tuple form returned by the driver; dictionaries are only built
+    for the slice that is actually sent back to the client.
+    """
+
+    columns: list[str]
+    rows: list[tuple] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_records(self, start: int = 0, stop: int | None = None) -> list[dict]:
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows[start:stop]]
+
+    def page(self, start: int = 0, stop: int | None = None) -> "ResultSet":
+        return ResultSet(self.columns, self.rows[start:stop])
+
+    def index_after(self, column: str, key) -> int | None:
+        """Position of the row following the one whose `column` equals `key`, or None if the key is absent."""
+        position = self.columns.index(column)
+        for index, row in enumerate(self.rows):
+            if row[position] == key:
+                return index + 1
+        return None
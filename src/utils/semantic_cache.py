@@ -0,0 +1,113 @@
+import re
+import threading
+from typing import Callable
+import numpy as np
+from src.utils.logger import get_logger
+
+logger = get_logger("Cache_Logger")
+
+LITERAL_PATTERN = re.compile(r"\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+
+
+class SemanticQueryCache:
+    """
+    Embedding-similarity cache of natural language queries to validated SQL.
+
+    Queries are embedded with the same model the retriever uses and compared by cosine
+    similarity against a flat, L2-normalized NumPy matrix. A lookup hits when the closest
+    entry passes `threshold`, carries the same literal values (numbers and quoted strings)
+    in the same order and the same set of content words, as returned by `query_terms`.
+    Embeddings of questions that differ only in a filter value are close, so without the
+    word check "ports in region west" would reuse the SQL generated for "region east".
+    The index is bounded to `max_entries`; the least recently used entry is overwritten
+    when it is full.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], list[float]],
+        query_terms: Callable[[str], list[str]],
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+    ):
+        self.embed_query = embed_query
+        self.query_terms = query_terms
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._matrix: np.ndarray | None = None
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._sql: list[str | None] = [None] * max_entries
+        self._keys: list[tuple | None] = [None] * max_entries
+        self._llm_seconds = np.zeros(max_entries, dtype=np.float64)
+        self._size = 0
+        self._tick = 0
+        self._schema_version: str | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_llm_seconds = 0.0
+
+    def match_key(self, user_query: str) -> tuple:
+        """What a cached question must share with `user_query` for its SQL to be reused."""
+        lowered = user_query.lower()
+        return tuple(LITERAL_PATTERN.findall(lowered)), frozenset(self.query_terms(lowered))
+
+    def embed(self, user_query: str) -> np.ndarray:
+        vector = np.asarray(self.embed_query(user_query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, user_query: str, vector: np.ndarray, schema_version: str) -> str | None:
+        key = self.match_key(user_query)
+        with self._lock:
+            self._reset_on_schema_change(schema_version)
+            if self._size:
+                scores = self._matrix[:self._size] @ vector
+                index = int(np.argmax(scores))
+                if scores[index] >= self.threshold and self._keys[index] == key:
+                    self._tick += 1
+                    self._last_used[index] = self._tick
+                    self.hits += 1
+                    self.saved_llm_seconds += float(self._llm_seconds[index])
+                    logger.debug("Semantic cache hit (similarity %.3f).", scores[index])
+                    return self._sql[index]
+            self.misses += 1
+            return None
+
+    def add(self, user_query: str, vector: np.ndarray, sql_query: str, llm_seconds: float, schema_version: str) -> None:
+        with self._lock:
+            self._reset_on_schema_change(schema_version)
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_entries:
+                index = self._size
+                self._size += 1
+            else:
+                index = int(np.argmin(self._last_used))
+
+            self._tick += 1
+            self._matrix[index] = vector
+            self._last_used[index] = self._tick
+            self._sql[index] = sql_query
+            self._keys[index] = self.match_key(user_query)
+            self._llm_seconds[index] = llm_seconds
+
+    def _reset_on_schema_change(self, schema_version: str) -> None:
+        if schema_version != self._schema_version:
+            if self._size:
+                logger.info("Schema version changed; clearing semantic cache.")
+            self._schema_version = schema_version
+            self._size = 0
+            self._last_used[:] = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_llm_seconds": round(self.saved_llm_seconds, 3),
+            }
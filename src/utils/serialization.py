@@ -0,0 +1,209 @@
+import marshal
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable
+import orjson
+from starlette.responses import Response
+from src.utils.result_set import ResultSet
+
+# Types orjson writes itself, with the same output as `jsonable_encoder`.
+NATIVE_TYPES = (str, int, float, bool, datetime, date, time)
+
+
+def json_default(value):
+    """Converts the database types orjson does not handle, mirroring `jsonable_encoder`."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _decimal(value):
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    return value
+
+
+def _binary(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    return value
+
+
+def _interval(value):
+    return value.total_seconds() if isinstance(value, timedelta) else value
+
+
+CONVERTERS: dict[type, Callable] = {
+    Decimal: _decimal,
+    bytes: _binary,
+    bytearray: _binary,
+    memoryview: _binary,
+    timedelta: _interval,
+}
+
+
+def column_converters(column_count: int, rows) -> list[Callable | None]:
+    """
+    Picks the conversion for every column once, from the first non-null value in `rows`.
+
+    A driver maps each column type to a single Python type, so one value per column is
+    enough. Columns orjson encodes natively get None and are passed through untouched.
+    """
+    converters: list[Callable | None] = [None] * column_count
+    pending = set(range(column_count))
+    for row in rows:
+        for position in list(pending):
+            value = row[position]
+            if value is None:
+                continue
+            pending.discard(position)
+            if not isinstance(value, NATIVE_TYPES):
+                converters[position] = CONVERTERS.get(type(value), json_default)
+        if not pending:
+            break
+    return converters
+
+
+def convert_rows(rows, converters: list[Callable | None]) -> list:
+    """Rows with the non-native columns converted; rows needing no conversion are returned as is."""
+    converted = [(position, convert) for position, convert in enumerate(converters) if convert]
+    if not converted:
+        return rows
+    result = []
+    for row in rows:
+        row = list(row)
+        for position, convert in converted:
+            value = row[position]
+            if value is not None:
+                row[position] = convert(value)
+        result.append(row)
+    return result
+
+
+def encodable_rows(result_set: ResultSet) -> list:
+    return convert_rows(result_set.rows, column_converters(len(result_set.columns), result_set.rows))
+
+
+def to_records(result_set: ResultSet) -> list[dict]:
+    """The legacy shape: one `{column: value}` object per row."""
+    columns = result_set.columns
+    return [dict(zip(columns, row)) for row in encodable_rows(result_set)]
+
+
+def to_compact(result_set: ResultSet) -> dict:
+    """Column names once, then every row as an array in column order."""
+    return {"columns": result_set.columns, "rows": encodable_rows(result_set)}
+
+
+# Compact binary form of a `ResultSet` for the shared cache tier. Values marshal cannot
+# write are stored per column as a string or tuple and rebuilt on load, so a result read
+# back from another worker has the same Python types as one fetched from the driver.
+PACKED_PREFIX = b"RS1"
+PACKED_TYPES: dict[type, tuple[str, Callable]] = {
+    Decimal: ("decimal", str),
+    datetime: ("datetime", datetime.isoformat),
+    date: ("date", date.isoformat),
+    time: ("time", time.isoformat),
+    timedelta: ("timedelta", lambda value: (value.days, value.seconds, value.microseconds)),
+}
+UNPACKERS: dict[str, Callable] = {
+    "decimal": Decimal,
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "timedelta": lambda value: timedelta(*value),
+}
+
+
+def pack_result_set(result_set: ResultSet) -> bytes | None:
+    """
+    Encodes a result set with `marshal`, or returns None when it holds a type that cannot be packed.
+
+    The type of each column is taken from its first non-null value, as in `column_converters`.
+    A column that mixes types is not packed.
+    """
+    columns = result_set.columns
+    rows = result_set.rows
+    kinds: list[str | None] = [None] * len(columns)
+    packers: list[tuple[int, type, Callable]] = []
+    pending = set(range(len(columns)))
+    for row in rows:
+        for position in list(pending):
+            value = row[position]
+            if value is None:
+                continue
+            pending.discard(position)
+            packed_type = PACKED_TYPES.get(type(value))
+            if packed_type:
+                kinds[position] = packed_type[0]
+                packers.append((position, type(value), packed_type[1]))
+        if not pending:
+            break
+
+    if packers:
+        packed_rows = []
+        for row in rows:
+            row = list(row)
+            for position, value_type, pack in packers:
+                value = row[position]
+                if value is not None:
+                    if type(value) is not value_type:
+                        return None
+                    row[position] = pack(value)
+            packed_rows.append(tuple(row))
+        rows = packed_rows
+    try:
+        return PACKED_PREFIX + marshal.dumps((list(columns), kinds, list(rows)))
+    except ValueError:
+        return None
+
+
+def unpack_result_set(data: bytes) -> ResultSet:
+    columns, kinds, rows = marshal.loads(memoryview(data)[len(PACKED_PREFIX):])
+    unpackers = [(position, UNPACKERS[kind]) for position, kind in enumerate(kinds) if kind]
+    if unpackers:
+        unpacked_rows = []
+        for row in rows:
+            row = list(row)
+            for position, unpack in unpackers:
+                if row[position] is not None:
+                    row[position] = unpack(row[position])
+            unpacked_rows.append(tuple(row))
+        rows = unpacked_rows
+    return ResultSet(columns, rows)
+
+
+def dumps(payload) -> bytes:
+    return orjson.dumps(payload, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def iter_ndjson(columns: list[str], row_batches):
+    """
+    Encodes a streamed result set as newline-delimited JSON.
+
+    The first line carries the column names; every following line is one row as a JSON
+    array in column order. Batches are encoded as they arrive, so memory stays bounded by
+    the fetch size rather than the size of the result. Column conversions are decided from
+    the first batch.
+    """
+    yield dumps({"columns": columns}) + b"\n"
+    converters = None
+    async for batch in row_batches:
+        if converters is None and batch:
+            converters = column_converters(len(columns), batch)
+        yield b"".join(dumps(row) + b"\n" for row in convert_rows(batch, converters or []))
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson, using `json_default` for the remaining database types."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "disconnect_checks")
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.disconnect_checks: list[Callable[[], Awaitable[bool]] | None] = []
+
+    async def all_disconnected(self) -> bool:
+        for check in list(self.disconnect_checks):
+            if check is None or not await check():
+                return False
+        return bool(self.disconnect_checks)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is in flight
+    await the same task instead of repeating it. The task is shielded, so one caller going
+    away never cancels the result the others are waiting for. The work receives an
+    `is_disconnected` callable that only reports True once every waiting client has
+    disconnected.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        work: Callable[[Callable[[], Awaitable[bool]]], Awaitable],
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ):
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(work(flight.all_disconnected))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.disconnect_checks.append(is_disconnected)
+        return await asyncio.shield(flight.task)
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Retrieve the exception so an unawaited failure is not reported as "never retrieved".
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Callable
+from src.utils.logger import get_logger
+
+logger = get_logger("Startup_Logger")
+
+
+class StartupManager:
+    """
+    Initializes the application's heavy components at startup instead of at import time.
+
+    Components are registered with a name and a blocking initializer. Required components
+    are initialized in parallel worker threads before the application starts serving;
+    background components (e.g. warming the embedding model) are started without being
+    awaited. Every initializer is timed, and the resulting breakdown is exposed through
+    `report()` together with the import time and the time to the first served request.
+    """
+
+    def __init__(self, process_started: float | None = None):
+        self.process_started = process_started or time.perf_counter()
+        self.import_seconds: float | None = None
+        self.first_request_seconds: float | None = None
+        self._components: list[tuple[str, Callable, bool]] = []
+        self._timings: dict[str, float] = {}
+        self._errors: dict[str, str] = {}
+        self._pending: set[str] = set()
+        self._background_tasks: set[asyncio.Task] = set()
+        self.started = False
+
+    def mark_imported(self) -> None:
+        self.import_seconds = time.perf_counter() - self.process_started
+
+    def add(self, name: str, initializer: Callable, background: bool = False) -> None:
+        self._components.append((name, initializer, background))
+
+    async def start(self) -> None:
+        required = [(name, initializer) for name, initializer, background in self._components if not background]
+        for name, initializer, background in self._components:
+            if background:
+                self._pending.add(name)
+                task = asyncio.create_task(self._initialize(name, initializer))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+
+        await asyncio.gather(*(self._initialize(name, initializer) for name, initializer in required))
+        self.started = True
+        logger.info("Startup completed: %s", self.report())
+
+    async def _initialize(self, name: str, initializer: Callable) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(initializer)
+        except Exception as e:
+            logger.exception("Startup component '%s' failed to initialize.", name)
+            self._errors[name] = str(e) or type(e).__name__
+        finally:
+            self._timings[name] = round(time.perf_counter() - started, 3)
+            self._pending.discard(name)
+
+    def mark_request_served(self) -> None:
+        if self.first_request_seconds is None:
+            self.first_request_seconds = round(time.perf_counter() - self.process_started, 3)
+            logger.info("First request served %ss after process start.", self.first_request_seconds)
+
+    @property
+    def ready(self) -> bool:
+        required = {name for name, _, background in self._components if not background}
+        return self.started and not (required & self._errors.keys())
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "components_seconds": dict(self._timings),
+            "pending": sorted(self._pending),
+            "errors": dict(self._errors),
+            "first_request_seconds": self.first_request_seconds,
+        }
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.utils.config import settings
+from src.utils.logger import get_logger, request_id_var
+
+logger = get_logger("Trace_Logger")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation within a trace.
+
+    A span started while another is current becomes its child. The current span is held in
+    a context variable, so nesting follows `await` chains as well as `asyncio.to_thread` and
+    executor calls that run under a copied context. The trace id is the request id when the
+    span is opened inside a request.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "duration_ms", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_ms: float | None = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Receives every finished span. `export` runs on the thread that closed the span and must not block for long."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def get_trace(self, trace_id: str) -> list[dict] | None:
+        """Spans recorded for `trace_id`, or None when this exporter does not keep spans around."""
+        return None
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent `max_spans` finished spans, for tests and the `/traces` endpoint."""
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> list[dict]:
+        return [span.to_dict() for span in list(self.spans) if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends each finished span as one JSON line to `path`.
+
+    `export` only puts the span on a bounded queue, like the logging queue handler. A writer
+    thread serializes whatever has queued up and writes it with a single flush, so a slow disk
+    never blocks the event loop or a database thread. When the queue is full, spans are
+    dropped and counted rather than waited on.
+    """
+
+    def __init__(self, path: str, queue_size: int = 10000, max_batch: int = 512):
+        self.path = path
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._queue: queue.Queue = queue.Queue(maxsize=max(0, queue_size))
+        self._writer = threading.Thread(target=self._run, name="span-writer", daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            lines = [json.dumps(span.to_dict(), default=str) + "\n" for span in batch if span is not None]
+            try:
+                self._file.writelines(lines)
+                self._file.flush()
+            except (OSError, ValueError):
+                logger.exception("Failed to write %d spans to %s.", len(lines), self.path)
+            if stopping:
+                self._file.close()
+                return
+
+    def shutdown(self) -> None:
+        """Writes out the queued spans and stops the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+
+class LoggingSpanExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        logger.info("span %s", json.dumps(span.to_dict(), default=str))
+
+
+_exporter: SpanExporter | None = None
+
+
+def create_exporter() -> SpanExporter | None:
+    if settings.TRACING_EXPORTER == "none":
+        return None
+    if settings.TRACING_EXPORTER == "memory":
+        return InMemorySpanExporter(settings.TRACING_MAX_SPANS)
+    if settings.TRACING_EXPORTER == "file":
+        return FileSpanExporter(settings.TRACING_FILE_PATH, queue_size=settings.TRACING_MAX_SPANS)
+    if settings.TRACING_EXPORTER == "logging":
+        return LoggingSpanExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {settings.TRACING_EXPORTER}")
+
+
+def get_exporter() -> SpanExporter | None:
+    return _exporter
+
+
+def set_exporter(exporter: SpanExporter | None) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def fingerprint(text: str) -> str:
+    """Short stable hash used to correlate spans that ran the same SQL without recording the SQL itself."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Opens a span named `name` as a child of the current one and yields it.
+
+    An exception escaping the block marks the span as failed and is re-raised. With no
+    exporter configured this yields a no-op span and records nothing.
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else (request_id_var.get() or new_request_id())
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = type(e).__name__
+        status_code = getattr(e, "status_code", None)
+        if status_code is not None:
+            current.attributes["status_code"] = status_code
+        raise
+    finally:
+        current.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        _current_span.reset(token)
+        try:
+            exporter.export(current)
+        except Exception:
+            logger.exception("Failed to export span.")
+
+
+def traced(name: str):
+    """Decorator running each call of a coroutine function inside a span named `name`."""
+    def decorator(function):
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Settings are read at import time and require these; tests never reach a real database.
+for name in ("API_KEY", "DB_USER", "DB_PASS", "DB_HOST", "DB_SERVICE_NAME"):
+    os.environ.setdefault(name, "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
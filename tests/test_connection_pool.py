@@ -0,0 +1,103 @@
+import itertools
+import threading
+import time
+import pytest
+from src.utils.connection_pool import PoolClosedError, PoolManager, PoolTimeoutError
+
+
+class FakeDriver:
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.closed = []
+        self.healthy = True
+
+    def connect(self):
+        return next(self._ids)
+
+    def close(self, connection):
+        self.closed.append(connection)
+
+    def validate(self, connection):
+        return self.healthy
+
+
+def make_pool(driver: FakeDriver, **options) -> PoolManager:
+    return PoolManager("test", driver.connect, driver.close, driver.validate, **options)
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = make_pool(FakeDriver(), min_size=0, max_size=1, checkout_timeout=0.05)
+    connection = pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+    pool.release(connection)
+    assert pool.acquire() == connection
+
+
+def test_waiting_checkout_gets_released_connection():
+    pool = make_pool(FakeDriver(), min_size=0, max_size=1, checkout_timeout=2.0)
+    connection = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(connection,)).start()
+
+    assert pool.acquire() == connection
+    stats = pool.stats()
+    assert stats["waited_checkouts"] == 1
+    assert stats["timeouts"] == 0
+
+
+def test_shrink_reaps_idle_connections_down_to_min_size():
+    driver = FakeDriver()
+    pool = make_pool(driver, min_size=1, max_size=3, idle_timeout=0.05)
+    connections = [pool.acquire() for _ in range(3)]
+    for connection in connections:
+        pool.release(connection)
+    assert pool.stats()["size"] == 3
+
+    assert pool.shrink() == 0
+    time.sleep(0.1)
+    assert pool.shrink() == 2
+    stats = pool.stats()
+    assert stats["size"] == stats["idle"] == 1
+    assert len(driver.closed) == 2
+
+
+def test_release_reaps_expired_idle_connections():
+    driver = FakeDriver()
+    pool = make_pool(driver, min_size=0, max_size=2, idle_timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    time.sleep(0.1)
+
+    pool.release(second)
+    assert driver.closed == [first]
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_validation_replaces_connection():
+    driver = FakeDriver()
+    pool = make_pool(driver, min_size=0, max_size=1, validate_after_seconds=0.0)
+    connection = pool.acquire()
+    pool.release(connection)
+
+    driver.healthy = False
+    replacement = pool.acquire()
+    assert replacement != connection
+    assert driver.closed == [connection]
+
+
+def test_discarded_and_closed_pool():
+    driver = FakeDriver()
+    pool = make_pool(driver, min_size=0, max_size=2)
+    connection = pool.acquire()
+    pool.release(connection, discard=True)
+    assert pool.stats()["size"] == 0
+    assert driver.closed == [connection]
+
+    pool.close()
+    with pytest.raises(PoolClosedError):
+        pool.acquire()